@@ -1,3 +1,9 @@
-from .performance_metrics import run_benchmark, generate_report
-
+# performance_metrics (and with it the reporting stack) is imported on first
+# access, so importing a single benchmarking submodule stays cheap.
 __all__ = ['run_benchmark', 'generate_report']
+
+def __getattr__(name):
+    if name in __all__:
+        from . import performance_metrics
+        return getattr(performance_metrics, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,140 @@
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+VARIANTS = ('TextMoE', 'ImageMoE', 'SwitchedMoE')
+INPUT_TYPES = {'TextMoE': 'text', 'ImageMoE': 'image', 'SwitchedMoE': 'text'}
+
+def run_variant(name, save_path="results/benchmarks", iterations=100, text_length=None, image_size=32,
+                trace=False, quiet=False, workload_dir=None):
+    """Benchmark one variant and write its text and JSON reports without plots.
+
+    Safe to run in a worker process: the router is built where it runs and
+    only the report path is sent back.
+    """
+    from . import performance_metrics
+    from .concurrency import make_router
+
+    if quiet:
+        performance_metrics.console.quiet = True
+    workload = None
+    if workload_dir is not None:
+        from .workloads import Workload
+        workload = Workload(cache_dir=workload_dir, image_side=image_size)
+    results = performance_metrics.run_benchmark(make_router(name), input_type=INPUT_TYPES[name],
+                                                num_iterations=iterations, trace=trace,
+                                                text_length=text_length, image_size=image_size,
+                                                workload=workload)
+    performance_metrics.generate_report(results, name, save_path, plot=False)
+    return Path(save_path) / f"{name.lower()}_benchmark.json"
+
+def run_variants(variants=VARIANTS, save_path="results/benchmarks", jobs=1, **options):
+    """Benchmark variants serially or in up to `jobs` worker processes.
+
+    Returns {variant: path of its JSON results}. A failing variant is
+    reported and skipped so the others still complete.
+    """
+    paths = {}
+    if jobs <= 1:
+        for name in variants:
+            console.print(f"\n[bold cyan]Benchmarking {name}...[/]")
+            try:
+                paths[name] = run_variant(name, save_path, **options)
+            except Exception as e:
+                console.print(f"[red]Error benchmarking {name}:[/] {str(e)}")
+        return paths
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {name: pool.submit(run_variant, name, save_path, quiet=True, **options) for name in variants}
+        for name, future in futures.items():
+            try:
+                paths[name] = future.result()
+                console.print(f"[green]Finished {name}[/]")
+            except Exception as e:
+                console.print(f"[red]Error benchmarking {name}:[/] {str(e)}")
+    return paths
+
+def print_summary(paths):
+    """Print a one-line summary per variant from saved JSON results."""
+    import numpy as np
+    from utils.latency_sketch import format_quantile_label
+    from .regression import load_run
+
+    table = Table(title="Benchmark Summary")
+    table.add_column("Variant", style="cyan")
+    table.add_column("Calls", justify="right")
+    table.add_column("Mean (ms)", justify="right", style="green")
+    quantiles = None
+    for name, path in paths.items():
+        record = load_run(path)['variants'][name]
+        times = record['samples']['execution_time']
+        if quantiles is None:
+            quantiles = list(record.get('quantiles', {}))
+            for q in quantiles:
+                table.add_column(f"{format_quantile_label(float(q))} (ms)", justify="right")
+        row = [name, str(len(times)), f"{np.mean(times) * 1000:.3f}" if times else "-"]
+        row += [f"{record['quantiles'][q] * 1000:.3f}" for q in quantiles if q in record.get('quantiles', {})]
+        table.add_row(*row)
+    console.print(table)
+
+def plot_saved_results(save_path="results/benchmarks", variants=None):
+    """Render figures for every saved *_benchmark.json in save_path."""
+    from .performance_metrics import plot_results
+    from .regression import load_run, results_from_record
+
+    run = load_run(save_path)
+    rendered = []
+    for name, record in run['variants'].items():
+        if variants and name not in variants:
+            continue
+        plot_results(results_from_record(record), name, save_path)
+        rendered.append(name)
+    return rendered
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="moe-bench", description="Run MoE benchmarks headlessly")
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS),
+                        help="Variants to benchmark (default: all)")
+    parser.add_argument("--iterations", type=int, default=100, help="Timed calls per variant")
+    parser.add_argument("--text-length", type=int, default=None,
+                        help="Characters per text sample (default: single words)")
+    parser.add_argument("--image-size", type=int, default=32, help="Side of square image samples")
+    parser.add_argument("--workload-dir", default=None,
+                        help="Use the seeded synthetic workload cached in this directory")
+    parser.add_argument("--output-dir", default="results/benchmarks", help="Directory for reports")
+    parser.add_argument("--jobs", type=int, default=1, help="Variants to run in parallel processes")
+    parser.add_argument("--trace", action="store_true", help="Record per-stage tracing spans")
+    parser.add_argument("--plot", action="store_true", help="Render figures after all runs finish")
+    parser.add_argument("--plot-only", action="store_true",
+                        help="Skip benchmarking and render figures from saved results")
+    return parser
+
+def main(argv=None):
+    """Entry point for the moe-bench command."""
+    args = build_parser().parse_args(argv)
+
+    if not args.plot_only:
+        paths = run_variants(args.variants, args.output_dir, jobs=args.jobs, iterations=args.iterations,
+                             text_length=args.text_length, image_size=args.image_size, trace=args.trace,
+                             workload_dir=args.workload_dir)
+        if paths:
+            print_summary(paths)
+        if len(paths) < len(args.variants):
+            return 1
+
+    if args.plot or args.plot_only:
+        try:
+            rendered = plot_saved_results(args.output_dir, args.variants)
+        except FileNotFoundError as e:
+            console.print(f"[red]{e}[/]")
+            return 1
+        console.print(f"[green]Rendered figures for {', '.join(rendered) or 'no variants'} in {args.output_dir}[/]")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
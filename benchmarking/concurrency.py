@@ -0,0 +1,225 @@
+import time
+import queue
+import threading
+import multiprocessing as mp
+from pathlib import Path
+from rich.console import Console
+from rich.table import Table
+from utils.latency_sketch import LatencySketch
+from .scaling import generate_image, generate_text
+
+console = Console()
+
+VARIANTS = ('TextMoE', 'ImageMoE', 'SwitchedMoE')
+# Variants that report into a ComplexityDashboard
+DASHBOARD_VARIANTS = ('TextMoE', 'ImageMoE')
+
+def make_router(variant_name, dashboard=None):
+    """Build a router by name, optionally reporting into a given dashboard."""
+    if variant_name == 'TextMoE':
+        from text_processing.text_moe import TextMoE
+        return TextMoE(num_experts=3, dashboard=dashboard)
+    if variant_name == 'ImageMoE':
+        from image_processing.image_moe import ImageMoE
+        return ImageMoE(num_experts=4, dashboard=dashboard)
+    if variant_name == 'SwitchedMoE':
+        from moe_variants.switched_moe import SwitchedMoE
+        return SwitchedMoE(num_experts=3)
+    raise ValueError(f"Unknown variant: {variant_name}")
+
+def make_workload(variant_name, count, seed=0, text_length=200, image_side=64):
+    """Pre-generate a fixed, seeded workload for one worker."""
+    if variant_name == 'ImageMoE':
+        return [generate_image(image_side, seed=seed + i) for i in range(count)]
+    return [generate_text(text_length, seed=seed + i) for i in range(count)]
+
+def _run_calls(router, samples, barrier):
+    """Time each call after all workers are ready; returns worker stats."""
+    sketch = LatencySketch()
+    timer = time.perf_counter
+    barrier.wait()
+    start = timer()
+    for sample in samples:
+        call_start = timer()
+        router.process(sample)
+        sketch.add(timer() - call_start)
+    return {'start': start, 'end': timer(), 'calls': len(samples), 'latency': sketch}
+
+def _process_worker(variant_name, publish, samples, barrier, results):
+    from utils.dashboard import ComplexityDashboard
+
+    dashboard = ComplexityDashboard(publish=publish) if variant_name in DASHBOARD_VARIANTS else None
+    router = make_router(variant_name, dashboard)
+    try:
+        results.put(_run_calls(router, samples, barrier))
+    finally:
+        if dashboard is not None:
+            dashboard.close()
+
+def _collect_results(processes, results, poll_interval=0.5):
+    """Gather one result per worker process, failing fast if a worker dies first."""
+    stats = []
+    while len(stats) < len(processes):
+        try:
+            stats.append(results.get(timeout=poll_interval))
+            continue
+        except queue.Empty:
+            pass
+        dead = [p for p in processes if not p.is_alive() and p.exitcode != 0]
+        if dead or not any(p.is_alive() for p in processes):
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()  # Survivors would wait at the barrier forever
+            for process in processes:
+                process.join()
+            if dead:
+                raise RuntimeError(f"Worker process {dead[0].pid} exited with code {dead[0].exitcode} "
+                                   f"before reporting results ({len(stats)}/{len(processes)} received)")
+            raise RuntimeError(f"Worker processes exited after reporting {len(stats)}/{len(processes)} results")
+    return stats
+
+def run_concurrent(variant_name, workers, mode='threads', shared_dashboard=False, total_calls=400,
+                   seed=0, **workload_kwargs):
+    """Run a fixed total workload split across workers.
+
+    mode is 'threads' or 'processes'. With shared_dashboard, thread workers
+    report into one ComplexityDashboard and process workers publish into
+    shared memory; otherwise each worker has a private dashboard.
+    Returns aggregate throughput and per-call latency quantiles.
+    """
+    per_worker = [total_calls // workers + (i < total_calls % workers) for i in range(workers)]
+    workloads = [make_workload(variant_name, count, seed=seed + 1000 * i, **workload_kwargs)
+                 for i, count in enumerate(per_worker)]
+
+    if mode == 'threads':
+        from utils.dashboard import ComplexityDashboard
+
+        uses_dashboard = variant_name in DASHBOARD_VARIANTS
+        shared = ComplexityDashboard(publish=False) if shared_dashboard and uses_dashboard else None
+
+        def worker_dashboard():
+            if not uses_dashboard:
+                return None
+            return shared if shared is not None else ComplexityDashboard(publish=False)
+
+        routers = [make_router(variant_name, worker_dashboard()) for _ in range(workers)]
+        barrier = threading.Barrier(workers)
+        stats = [None] * workers
+
+        def run(index):
+            stats[index] = _run_calls(routers[index], workloads[index], barrier)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elif mode == 'processes':
+        context = mp.get_context()
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [context.Process(target=_process_worker,
+                                     args=(variant_name, shared_dashboard, workloads[i], barrier, results))
+                     for i in range(workers)]
+        for process in processes:
+            process.start()
+        stats = _collect_results(processes, results)
+        for process in processes:
+            process.join()
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+    # perf_counter is system-wide monotonic, so process timestamps compare
+    wall = max(s['end'] for s in stats) - min(s['start'] for s in stats)
+    latency = LatencySketch()
+    for s in stats:
+        latency.merge(s['latency'])
+    calls = sum(s['calls'] for s in stats)
+    return {
+        'variant': variant_name,
+        'mode': mode,
+        'workers': workers,
+        'shared_dashboard': shared_dashboard,
+        'calls': calls,
+        'wall_seconds': wall,
+        'throughput': calls / wall if wall > 0 else float('inf'),
+        'latency': latency.quantiles()
+    }
+
+def run_concurrency_suite(variants=VARIANTS, max_workers=4, modes=('threads', 'processes'),
+                          total_calls=400, save_path="results/benchmarks", plot=True):
+    """Measure throughput scaling for 1..max_workers threads and processes.
+
+    Every variant runs with and without a shared dashboard (SwitchedMoE has
+    no dashboard and runs once per mode). Scaling efficiency is the speedup
+    over one worker divided by the worker count.
+    """
+    results = []
+    for variant_name in variants:
+        dashboard_options = (False, True) if variant_name in DASHBOARD_VARIANTS else (False,)
+        for mode in modes:
+            for shared in dashboard_options:
+                label = f"{mode}{' + shared dashboard' if shared else ''}"
+                console.print(f"[yellow]{variant_name}: {label}[/]")
+                series = [run_concurrent(variant_name, workers, mode, shared, total_calls)
+                          for workers in range(1, max_workers + 1)]
+                baseline = series[0]['throughput']
+                for point in series:
+                    point['speedup'] = point['throughput'] / baseline
+                    point['efficiency'] = point['speedup'] / point['workers']
+                results.extend(series)
+
+    print_concurrency_report(results)
+    if plot:
+        Path(save_path).mkdir(parents=True, exist_ok=True)
+        plot_speedup(results, save_path)
+    return results
+
+def print_concurrency_report(results):
+    """Print throughput, latency and efficiency per configuration."""
+    table = Table(title="Concurrency Scaling")
+    table.add_column("Variant", style="cyan")
+    table.add_column("Mode", style="cyan")
+    table.add_column("Dashboard", justify="center")
+    table.add_column("Workers", justify="right")
+    table.add_column("Calls/s", justify="right", style="green")
+    table.add_column("p50 (ms)", justify="right")
+    table.add_column("p99 (ms)", justify="right")
+    table.add_column("Speedup", justify="right", style="yellow")
+    table.add_column("Efficiency", justify="right", style="yellow")
+
+    for point in results:
+        table.add_row(
+            point['variant'], point['mode'],
+            "shared" if point['shared_dashboard'] else "private",
+            str(point['workers']),
+            f"{point['throughput']:,.0f}",
+            f"{point['latency'][0.5] * 1000:.3f}",
+            f"{point['latency'][0.99] * 1000:.3f}",
+            f"{point.get('speedup', 1.0):.2f}x",
+            f"{point.get('efficiency', 1.0) * 100:.0f}%"
+        )
+    console.print(table)
+
+def plot_speedup(results, save_path):
+    """Save one speedup-vs-workers plot per variant."""
+    import matplotlib.pyplot as plt
+
+    for variant_name in dict.fromkeys(point['variant'] for point in results):
+        points = [p for p in results if p['variant'] == variant_name]
+        fig, ax = plt.subplots(figsize=(8, 6))
+        max_workers = max(p['workers'] for p in points)
+        ax.plot([1, max_workers], [1, max_workers], 'k--', alpha=0.4, label='Ideal')
+        for mode in dict.fromkeys(p['mode'] for p in points):
+            for shared in (False, True):
+                series = [p for p in points if p['mode'] == mode and p['shared_dashboard'] == shared]
+                if series:
+                    label = f"{mode}{' + shared dashboard' if shared else ''}"
+                    ax.plot([p['workers'] for p in series], [p['speedup'] for p in series], 'o-', label=label)
+        ax.set_title(f'Concurrency Speedup - {variant_name}')
+        ax.set_xlabel('Workers')
+        ax.set_ylabel('Speedup vs 1 worker')
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+        fig.savefig(Path(save_path) / f'{variant_name.lower()}_concurrency.png')
+        plt.close(fig)
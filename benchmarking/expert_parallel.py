@@ -0,0 +1,365 @@
+import time
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+DTYPE = np.float32
+
+def round_robin_placement(num_experts, num_workers):
+    """Expert e lives on worker e % num_workers."""
+    return np.arange(num_experts) % num_workers
+
+def contiguous_placement(num_experts, num_workers):
+    """Consecutive experts share a worker."""
+    return np.arange(num_experts) * num_workers // num_experts
+
+def balanced_placement(expert_load, num_workers):
+    """Greedy longest-processing-time placement from observed expert loads."""
+    expert_load = np.asarray(expert_load)
+    placement = np.empty(len(expert_load), dtype=np.int64)
+    worker_load = np.zeros(num_workers)
+    for expert in np.argsort(expert_load, kind='stable')[::-1]:
+        worker = int(np.argmin(worker_load))
+        placement[expert] = worker
+        worker_load[worker] += expert_load[expert]
+    return placement
+
+PLACEMENTS = {'round_robin': round_robin_placement, 'contiguous': contiguous_placement}
+
+def _expert_weights(expert, hidden_dim, seed):
+    rng = np.random.default_rng([seed, expert])
+    scale = 1 / np.sqrt(hidden_dim)
+    w_in = rng.normal(0.0, scale, size=(hidden_dim, 2 * hidden_dim)).astype(DTYPE)
+    w_out = rng.normal(0.0, scale, size=(2 * hidden_dim, hidden_dim)).astype(DTYPE)
+    return w_in, w_out
+
+def _expert_worker(experts, hidden_dim, seed, max_rows, input_name, output_name, conn):
+    """Run the feed-forward experts of one worker over rows placed in shared memory."""
+    inputs_shm = shared_memory.SharedMemory(name=input_name)
+    outputs_shm = shared_memory.SharedMemory(name=output_name)
+    inputs = np.ndarray((max_rows, hidden_dim), dtype=DTYPE, buffer=inputs_shm.buf)
+    outputs = np.ndarray((max_rows, hidden_dim), dtype=DTYPE, buffer=outputs_shm.buf)
+    weights = {expert: _expert_weights(expert, hidden_dim, seed) for expert in experts}
+    timer = time.perf_counter
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, ConnectionError):
+                break  # The parent is gone; it owns and unlinks the queues
+            if message is None:
+                break
+            step, segments = message
+            start = timer()
+            for expert, offset, count in segments:
+                w_in, w_out = weights[expert]
+                hidden = inputs[offset:offset + count] @ w_in
+                np.maximum(hidden, 0, out=hidden)
+                outputs[offset:offset + count] = hidden @ w_out
+            conn.send((step, start, timer()))
+    finally:
+        del inputs, outputs
+        inputs_shm.close()
+        outputs_shm.close()
+
+class ExpertParallelSimulator:
+    """Simulate expert-parallel MoE inference across local worker processes.
+
+    Experts are placed on num_workers processes. Each step, a router assigns
+    tokens to experts, tokens over an expert's capacity are dropped, and the
+    rest are copied into the owning worker's shared-memory input queue, run
+    through that expert's feed-forward block and combined from the output
+    queue. Tokens originate round-robin on the workers, as in data-parallel
+    serving, so a token whose expert lives elsewhere crosses the all-to-all
+    twice (dispatch and combine); those crossings are counted as bytes moved.
+
+    router is 'gating' (seeded linear top-1 gate over the token vectors),
+    'switched' (SwitchedMoE.route per token) or a callable returning
+    (experts, gate_values) for a token batch. gate_skew > 0 adds a Zipf
+    bias to the gate logits to create hot experts.
+    """
+
+    def __init__(self, num_experts=8, num_workers=4, placement='round_robin', capacity_factor=1.25,
+                 hidden_dim=64, router='gating', gate_skew=0.0, seed=0):
+        self.num_experts = num_experts
+        self.num_workers = num_workers
+        self.capacity_factor = capacity_factor
+        self.hidden_dim = hidden_dim
+        self.gate_skew = gate_skew
+        self.seed = seed
+        if isinstance(placement, str):
+            placement = PLACEMENTS[placement](num_experts, num_workers)
+        self.placement = np.asarray(placement, dtype=np.int64)
+        if len(self.placement) != num_experts or self.placement.max() >= num_workers:
+            raise ValueError("placement must map every expert to a worker")
+
+        rng = np.random.default_rng(seed)
+        # Unit-variance logits, so gate_skew is on the same scale as the token signal
+        self._gate_weights = rng.normal(0.0, 1 / np.sqrt(hidden_dim),
+                                        size=(hidden_dim, num_experts)).astype(DTYPE)
+        self._gate_bias = gate_skew * np.log(1.0 / np.arange(1, num_experts + 1))
+        self._router = router
+        self._switched = None
+        self._workers = []
+
+    def route(self, tokens):
+        """Return (expert per token, gate value per token)."""
+        if callable(self._router):
+            return self._router(tokens)
+        if self._router == 'switched':
+            if self._switched is None:
+                from moe_variants.switched_moe import SwitchedMoE
+                self._switched = SwitchedMoE(num_experts=min(self.num_experts, 3))
+            experts = np.array([self._switched.route(token) for token in tokens])
+            return experts, np.ones(len(tokens), dtype=DTYPE)
+        logits = tokens @ self._gate_weights + self._gate_bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        experts = probabilities.argmax(axis=1)
+        return experts, probabilities[np.arange(len(tokens)), experts].astype(DTYPE)
+
+    def _capacity_mask(self, experts, capacity):
+        """Keep the first `capacity` tokens of each expert, in token order."""
+        order = np.argsort(experts, kind='stable')
+        counts = np.bincount(experts, minlength=self.num_experts)
+        starts = np.cumsum(counts) - counts
+        position = np.empty(len(experts), dtype=np.int64)
+        position[order] = np.arange(len(experts)) - starts[experts[order]]
+        return position < capacity
+
+    def start(self, max_rows):
+        """Start worker processes and allocate their shared-memory queues."""
+        self.max_rows = max_rows
+        context = mp.get_context()
+        nbytes = max_rows * self.hidden_dim * np.dtype(DTYPE).itemsize
+        try:
+            for worker in range(self.num_workers):
+                experts = [int(e) for e in np.flatnonzero(self.placement == worker)]
+                entry = {'experts': experts, 'process': None, 'conn': None}
+                self._workers.append(entry)  # Registered first so close() unlinks whatever exists
+                entry['inputs_shm'] = shared_memory.SharedMemory(create=True, size=nbytes)
+                entry['outputs_shm'] = shared_memory.SharedMemory(create=True, size=nbytes)
+                parent_conn, child_conn = context.Pipe()
+                entry['conn'] = parent_conn
+                entry['process'] = context.Process(target=_expert_worker,
+                                                   args=(experts, self.hidden_dim, self.seed, max_rows,
+                                                         entry['inputs_shm'].name, entry['outputs_shm'].name,
+                                                         child_conn),
+                                                   daemon=True)
+                entry['process'].start()
+                entry['inputs'] = np.ndarray((max_rows, self.hidden_dim), dtype=DTYPE,
+                                             buffer=entry['inputs_shm'].buf)
+                entry['outputs'] = np.ndarray((max_rows, self.hidden_dim), dtype=DTYPE,
+                                              buffer=entry['outputs_shm'].buf)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        """Stop workers and release their shared memory, even after a worker died."""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            if worker['conn'] is not None:
+                try:
+                    worker['conn'].send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+        for worker in workers:
+            try:
+                process = worker['process']
+                if process is not None and process.pid is not None:
+                    process.join(timeout=5)
+                    if process.is_alive():
+                        process.terminate()
+                        process.join()
+            finally:
+                worker.pop('inputs', None)
+                worker.pop('outputs', None)
+                for key in ('inputs_shm', 'outputs_shm'):
+                    if key in worker:
+                        worker[key].close()
+                        try:
+                            worker[key].unlink()
+                        except FileNotFoundError:
+                            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _dead_worker(self, worker_id):
+        """Release every worker and build the error naming the one that died."""
+        worker = self._workers[worker_id]
+        process = worker['process']
+        process.join(timeout=1)
+        exitcode = process.exitcode
+        self.close()
+        return RuntimeError(f"Expert worker {worker_id} (experts {worker['experts']}) died"
+                            + (f" with exit code {exitcode}" if exitcode is not None else ""))
+
+    def _receive(self, worker_id, poll_interval=0.5):
+        """Wait for a worker's reply, raising if the worker dies instead of answering."""
+        worker = self._workers[worker_id]
+        try:
+            while not worker['conn'].poll(poll_interval):
+                if not worker['process'].is_alive():
+                    raise EOFError
+            return worker['conn'].recv()
+        except (EOFError, ConnectionError) as error:
+            raise self._dead_worker(worker_id) from error
+
+    def step(self, tokens, step_id=0):
+        """Dispatch, compute and combine one token batch; returns (outputs, stats)."""
+        num_tokens = len(tokens)
+        if not self._workers:
+            self.start(num_tokens)
+        if num_tokens > self.max_rows:
+            raise ValueError(f"Batch of {num_tokens} tokens exceeds the {self.max_rows}-row queues")
+        timer = time.perf_counter
+
+        start = timer()
+        experts, gate = self.route(tokens)
+        capacity = int(np.ceil(self.capacity_factor * num_tokens / self.num_experts))
+        kept = self._capacity_mask(experts, capacity)
+        routed = timer()
+
+        # Dispatch: group kept tokens by worker, then by expert, into each input queue
+        plans = []
+        for worker_id, worker in enumerate(self._workers):
+            rows = np.flatnonzero(kept & (self.placement[experts] == worker_id))
+            rows = rows[np.argsort(experts[rows], kind='stable')]
+            worker['inputs'][:len(rows)] = tokens[rows]
+            counts = np.bincount(experts[rows], minlength=self.num_experts)
+            offsets = np.cumsum(counts) - counts
+            segments = [(int(e), int(offsets[e]), int(counts[e])) for e in np.flatnonzero(counts)]
+            plans.append(rows)
+            try:
+                worker['conn'].send((step_id, segments))
+            except (BrokenPipeError, ConnectionError) as error:
+                raise self._dead_worker(worker_id) from error
+        dispatched = timer()
+
+        finishes = np.empty(self.num_workers)
+        compute = np.empty(self.num_workers)
+        for worker_id in range(self.num_workers):
+            _, begin, end = self._receive(worker_id)
+            finishes[worker_id] = end
+            compute[worker_id] = end - begin
+        collected = timer()
+
+        # Combine: scale expert outputs by their gate value; dropped tokens pass through
+        outputs = tokens.copy()
+        for worker, rows in zip(self._workers, plans):
+            outputs[rows] = worker['outputs'][:len(rows)] * gate[rows, None]
+        end = timer()
+
+        origin = np.arange(num_tokens) % self.num_workers
+        remote = int((kept & (self.placement[experts] != origin)).sum())
+        expert_load = np.bincount(experts[kept], minlength=self.num_experts)
+        worker_rows = np.array([len(rows) for rows in plans])
+        return outputs, {
+            'step': step_id,
+            'tokens': num_tokens,
+            'dropped': int(num_tokens - kept.sum()),
+            'expert_load': expert_load,
+            'worker_rows': worker_rows,
+            'bytes_moved': 2 * remote * self.hidden_dim * np.dtype(DTYPE).itemsize,
+            'remote_fraction': remote / max(int(kept.sum()), 1),
+            'route_time': routed - start,
+            'dispatch_time': dispatched - routed,
+            'compute_time': compute,
+            'straggler_wait': float(finishes.max() - finishes.min()),
+            'combine_time': end - collected,
+            'step_time': end - start,
+            'expert_imbalance': float(expert_load.max() / expert_load.mean()) if expert_load.any() else 1.0,
+            'worker_imbalance': float(worker_rows.max() / worker_rows.mean()) if worker_rows.any() else 1.0
+        }
+
+    def run(self, steps=20, tokens_per_step=1024, warmup=2):
+        """Run seeded token batches and return per-step stats plus a summary."""
+        rng = np.random.default_rng(self.seed + 1)
+        history = []
+        for step_id in range(warmup + steps):
+            tokens = rng.standard_normal((tokens_per_step, self.hidden_dim)).astype(DTYPE)
+            _, stats = self.step(tokens, step_id)
+            if step_id >= warmup:
+                history.append(stats)
+        return {'steps': history, 'summary': summarize_steps(history)}
+
+def summarize_steps(history):
+    """Aggregate per-step stats into means and totals."""
+    def mean(key):
+        return float(np.mean([s[key] for s in history]))
+
+    total_time = sum(s['step_time'] for s in history)
+    tokens = sum(s['tokens'] for s in history)
+    return {
+        'steps': len(history),
+        'tokens_per_sec': tokens / total_time if total_time > 0 else float('inf'),
+        'step_time': mean('step_time'),
+        'dispatch_time': mean('dispatch_time'),
+        'compute_time': float(np.mean([s['compute_time'].max() for s in history])),
+        'straggler_wait': mean('straggler_wait'),
+        'combine_time': mean('combine_time'),
+        'bytes_per_step': mean('bytes_moved'),
+        'remote_fraction': mean('remote_fraction'),
+        'drop_rate': sum(s['dropped'] for s in history) / tokens if tokens else 0.0,
+        'expert_imbalance': mean('expert_imbalance'),
+        'worker_imbalance': mean('worker_imbalance'),
+        'expert_load': np.sum([s['expert_load'] for s in history], axis=0)
+    }
+
+def compare_placements(num_experts=8, num_workers=4, capacity_factors=(1.0, 1.25, 2.0), steps=20,
+                       tokens_per_step=1024, gate_skew=1.0, **simulator_kwargs):
+    """Simulate each placement and capacity factor and print a comparison.
+
+    'balanced' placement is derived from the expert loads of the first
+    round-robin run.
+    """
+    results = []
+    balanced = None
+    for capacity_factor in capacity_factors:
+        for name in ('round_robin', 'contiguous', 'balanced'):
+            placement = balanced if name == 'balanced' else name
+            with ExpertParallelSimulator(num_experts, num_workers, placement=placement,
+                                         capacity_factor=capacity_factor, gate_skew=gate_skew,
+                                         **simulator_kwargs) as simulator:
+                summary = simulator.run(steps, tokens_per_step)['summary']
+            if balanced is None:
+                balanced = balanced_placement(summary['expert_load'], num_workers)
+            results.append({'placement': name, 'capacity_factor': capacity_factor, **summary})
+    print_placement_report(results)
+    return results
+
+def print_placement_report(results):
+    """Print one row per placement and capacity setting."""
+    table = Table(title="Expert-Parallel Simulation")
+    table.add_column("Placement", style="cyan")
+    table.add_column("Capacity", justify="right", style="cyan")
+    table.add_column("Tokens/s", justify="right", style="green")
+    table.add_column("Step (ms)", justify="right")
+    table.add_column("Straggler (ms)", justify="right", style="yellow")
+    table.add_column("KiB moved/step", justify="right")
+    table.add_column("Remote", justify="right")
+    table.add_column("Dropped", justify="right", style="red")
+    table.add_column("Expert / worker imbalance", justify="right", style="yellow")
+
+    for row in results:
+        table.add_row(
+            row['placement'], f"{row['capacity_factor']:.2f}",
+            f"{row['tokens_per_sec']:,.0f}",
+            f"{row['step_time'] * 1000:.3f}",
+            f"{row['straggler_wait'] * 1000:.3f}",
+            f"{row['bytes_per_step'] / 1024:,.1f}",
+            f"{row['remote_fraction'] * 100:.0f}%",
+            f"{row['drop_rate'] * 100:.1f}%",
+            f"{row['expert_imbalance']:.2f} / {row['worker_imbalance']:.2f}"
+        )
+    console.print(table)
@@ -0,0 +1,109 @@
+import gc
+import time
+import numpy as np
+
+_timer_overhead_ns = None
+
+def calibrate_timer(samples=20000):
+    """Estimate the cost of one back-to-back perf_counter_ns() pair in ns."""
+    global _timer_overhead_ns
+    deltas = np.empty(samples, dtype=np.int64)
+    timer = time.perf_counter_ns
+    for i in range(samples):
+        start = timer()
+        deltas[i] = timer() - start
+    _timer_overhead_ns = float(np.median(deltas))
+    return _timer_overhead_ns
+
+def timer_overhead_ns():
+    """Return the cached timer overhead, calibrating on first use."""
+    if _timer_overhead_ns is None:
+        calibrate_timer()
+    return _timer_overhead_ns
+
+class GCDisabled:
+    """Disable the cyclic garbage collector inside a timed region.
+
+    With collect=True, pending garbage is collected first so a timed region
+    does not start with a collection already due.
+    """
+
+    def __init__(self, collect=True):
+        self.collect = collect
+
+    def __enter__(self):
+        self._was_enabled = gc.isenabled()
+        if self.collect:
+            gc.collect()
+        gc.disable()
+
+    def __exit__(self, *exc):
+        if self._was_enabled:
+            gc.enable()
+
+def _time_loop(fn, batch):
+    """Time one pass of fn over a pre-built batch of inputs, in ns."""
+    timer = time.perf_counter_ns
+    start = timer()
+    for sample in batch:
+        fn(sample)
+    return timer() - start
+
+def _build_batch(inputs, size):
+    repeats = -(-size // len(inputs))
+    return (list(inputs) * repeats)[:size]
+
+def measure(fn, inputs, warmup=3, rounds=15, min_round_time=0.005, max_inner_loops=1 << 20,
+            disable_gc=True):
+    """Time fn over pre-generated inputs with warmup, calibration and GC control.
+
+    The inner loop count doubles until one round takes at least
+    min_round_time, so sub-microsecond calls are timed in bulk; the calibrated
+    timer overhead is subtracted from every round. Returns per-op statistics
+    (median and IQR across rounds) in nanoseconds.
+    """
+    inputs = list(inputs)
+    if not inputs:
+        raise ValueError("measure() needs at least one input")
+    overhead = timer_overhead_ns()
+    gc_guard = GCDisabled() if disable_gc else None
+
+    if warmup:
+        for sample in _build_batch(inputs, warmup):
+            fn(sample)
+
+    # Calibrate the inner loop count; these runs double as extra warmup
+    inner_loops = 1
+    while True:
+        batch = _build_batch(inputs, inner_loops)
+        elapsed = _time_loop(fn, batch)
+        if elapsed >= min_round_time * 1e9 or inner_loops >= max_inner_loops:
+            break
+        inner_loops = min(inner_loops * 2, max_inner_loops)
+
+    per_op = np.empty(rounds, dtype=np.float64)
+    for i in range(rounds):
+        if gc_guard is not None:
+            with gc_guard:
+                elapsed = _time_loop(fn, batch)
+        else:
+            elapsed = _time_loop(fn, batch)
+        per_op[i] = max(elapsed - overhead, 0) / inner_loops
+
+    q1, median, q3 = np.percentile(per_op, [25, 50, 75])
+    return {
+        'ns_per_op': float(median),
+        'iqr_ns': float(q3 - q1),
+        'ops_per_sec': 1e9 / median if median > 0 else float('inf'),
+        'rounds': rounds,
+        'inner_loops': inner_loops,
+        'timer_overhead_ns': overhead,
+        'round_ns_per_op': per_op.tolist()
+    }
+
+def format_ns(ns):
+    """Format a duration in ns with an adaptive unit."""
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("µs", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f} {unit}"
+    return f"{ns:.1f} ns"
@@ -0,0 +1,289 @@
+import time
+import queue
+import threading
+import numpy as np
+from pathlib import Path
+from rich.console import Console
+from rich.table import Table
+from utils.latency_sketch import LatencySketch
+from .concurrency import DASHBOARD_VARIANTS, make_router
+from .scaling import generate_image, generate_text
+
+console = Console()
+
+# 'Mixed' sends text to a TextMoE and images to an ImageMoE
+LOAD_VARIANTS = ('TextMoE', 'ImageMoE', 'SwitchedMoE', 'Mixed')
+# Offered load as a fraction of the estimated capacity
+DEFAULT_LOAD_FRACTIONS = (0.1, 0.25, 0.5, 0.7, 0.8, 0.9, 1.0, 1.1, 1.25)
+
+class _MixedRouter:
+    """Dispatch text payloads to a TextMoE and image payloads to an ImageMoE."""
+
+    def __init__(self, dashboard=None):
+        self.text = make_router('TextMoE', dashboard)
+        self.image = make_router('ImageMoE', dashboard)
+
+    def process(self, payload):
+        router = self.text if isinstance(payload, str) else self.image
+        return router.process(payload)
+
+    def process_batch(self, payloads):
+        """Text payloads go to TextMoE.process_batch together; images one by one."""
+        results = [None] * len(payloads)
+        texts = [i for i, payload in enumerate(payloads) if isinstance(payload, str)]
+        for i, result in zip(texts, self.text.process_batch([payloads[i] for i in texts])):
+            results[i] = result
+        for i, payload in enumerate(payloads):
+            if not isinstance(payload, str):
+                try:
+                    results[i] = self.image.process(payload)
+                except Exception as error:
+                    results[i] = error
+        return results
+
+def make_load_router(variant_name, dashboard=None):
+    """Build a router by name, including the 'Mixed' text/image pool."""
+    if variant_name == 'Mixed':
+        return _MixedRouter(dashboard)
+    return make_router(variant_name, dashboard)
+
+def default_text_fraction(variant_name):
+    """Share of text payloads a variant can accept by default."""
+    return {'TextMoE': 1.0, 'ImageMoE': 0.0}.get(variant_name, 0.5)
+
+def make_payloads(count, text_fraction=0.5, seed=0, text_length=200, image_side=64):
+    """Pre-generate a seeded, shuffled mix of text and image payloads."""
+    rng = np.random.default_rng(seed)
+    is_text = rng.random(count) < text_fraction
+    return [generate_text(text_length, seed=seed + i) if text else generate_image(image_side, seed=seed + i)
+            for i, text in enumerate(is_text)]
+
+def poisson_arrivals(rate, duration, seed=0):
+    """Arrival offsets in seconds of a Poisson process over [0, duration)."""
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+    rng = np.random.default_rng(seed)
+    chunks = []
+    last = 0.0
+    chunk_size = max(int(rate * duration * 1.2), 16)
+    while last < duration:
+        offsets = last + np.cumsum(rng.exponential(1 / rate, size=chunk_size))
+        chunks.append(offsets)
+        last = offsets[-1]
+    offsets = np.concatenate(chunks)
+    return offsets[offsets < duration]
+
+def scale_arrivals(offsets, rate):
+    """Rescale recorded arrival times so their average rate equals rate.
+
+    Used for trace-driven load: the inter-arrival pattern of the trace is
+    kept while the offered load is swept.
+    """
+    offsets = np.sort(np.asarray(offsets, dtype=np.float64))
+    offsets = offsets - offsets[0]
+    if len(offsets) < 2 or offsets[-1] <= 0:
+        raise ValueError("A trace needs at least two distinct arrival times")
+    current_rate = (len(offsets) - 1) / offsets[-1]
+    return offsets * (current_rate / rate)
+
+def run_open_loop(routers, payloads, arrivals, timeout=1.0):
+    """Replay an arrival schedule against a pool of routers.
+
+    One dispatcher enqueues request i at arrivals[i] regardless of
+    completions; each router is served by its own worker thread. Latency is
+    measured from the scheduled arrival, so it includes queue wait and any
+    dispatcher lag. Requests that waited longer than timeout seconds are
+    dropped and counted instead of processed, which bounds overloaded runs.
+    """
+    requests = queue.SimpleQueue()
+    timer = time.perf_counter
+    stats = []
+
+    def serve(router):
+        latency, wait, service = LatencySketch(), LatencySketch(), LatencySketch()
+        completed = timed_out = 0
+        last_end = None
+        while True:
+            item = requests.get()
+            if item is None:
+                break
+            scheduled, payload = item
+            begin = timer()
+            if begin - scheduled > timeout:
+                timed_out += 1
+                continue
+            router.process(payload)
+            last_end = timer()
+            completed += 1
+            latency.add(last_end - scheduled)
+            wait.add(max(begin - scheduled, 0.0))
+            service.add(last_end - begin)
+        stats.append({'latency': latency, 'wait': wait, 'service': service,
+                      'completed': completed, 'timed_out': timed_out, 'last_end': last_end})
+
+    workers = [threading.Thread(target=serve, args=(router,)) for router in routers]
+    for worker in workers:
+        worker.start()
+
+    start = timer() + 0.005  # Small lead so the first arrival is not already late
+    for i, offset in enumerate(arrivals):
+        due = start + offset
+        delay = due - timer()
+        if delay > 0:
+            time.sleep(delay)
+        requests.put((due, payloads[i % len(payloads)]))
+    for _ in workers:
+        requests.put(None)
+    for worker in workers:
+        worker.join()
+
+    latency, wait, service = LatencySketch(), LatencySketch(), LatencySketch()
+    for s in stats:
+        latency.merge(s['latency'])
+        wait.merge(s['wait'])
+        service.merge(s['service'])
+    completed = sum(s['completed'] for s in stats)
+    ends = [s['last_end'] for s in stats if s['last_end'] is not None]
+    elapsed = max(max(ends) - start, float(arrivals[-1])) if ends else 0.0
+    return {
+        'requests': len(arrivals),
+        'completed': completed,
+        'timed_out': sum(s['timed_out'] for s in stats),
+        'elapsed': elapsed,
+        'achieved_rate': completed / elapsed if elapsed > 0 else 0.0,
+        'latency': latency.quantiles(),
+        'mean_latency': latency.mean,
+        'queue_wait': wait.quantiles(),
+        'mean_service': service.mean
+    }
+
+def estimate_capacity(router, payloads, workers=1, warmup=3):
+    """Estimate the sustainable request rate from closed-loop service times."""
+    for payload in payloads[:warmup]:
+        router.process(payload)
+    timer = time.perf_counter
+    start = timer()
+    for payload in payloads:
+        router.process(payload)
+    service = (timer() - start) / len(payloads)
+    return workers / service
+
+def find_saturation(points, tolerance=0.95, latency_slo=None):
+    """Return the highest offered rate the system still keeps up with.
+
+    A point keeps up when it completes at least tolerance of the offered
+    load, drops nothing and, with latency_slo set, keeps p99 within it.
+    Returns None when even the lowest load fails.
+    """
+    sustained = [p for p in points
+                 if p['completed'] >= tolerance * p['requests'] and not p['timed_out']
+                 and p['achieved_rate'] >= tolerance * p['offered_rate']
+                 and (latency_slo is None or p['latency'][0.99] <= latency_slo)]
+    return max((p['offered_rate'] for p in sustained), default=None)
+
+def run_load_sweep(variant_name, rates=None, duration=2.0, workers=1, text_fraction=None,
+                   arrivals=None, seed=0, timeout=1.0, latency_slo=None, pool_size=64, **payload_kwargs):
+    """Sweep the offered load for one variant and locate its saturation point.
+
+    rates defaults to fractions of the estimated capacity. arrivals may hold
+    recorded arrival times; they are rescaled to each rate instead of
+    drawing Poisson arrivals. Returns the curve points and saturation rate.
+    """
+    from utils.dashboard import ComplexityDashboard
+
+    if text_fraction is None:
+        text_fraction = default_text_fraction(variant_name)
+    payloads = make_payloads(pool_size, text_fraction, seed=seed, **payload_kwargs)
+    dashboard = None
+    if variant_name in DASHBOARD_VARIANTS or variant_name == 'Mixed':
+        dashboard = ComplexityDashboard(publish=False)
+    routers = [make_load_router(variant_name, dashboard) for _ in range(workers)]
+
+    capacity = estimate_capacity(routers[0], payloads, workers)
+    if rates is None:
+        rates = [capacity * fraction for fraction in DEFAULT_LOAD_FRACTIONS]
+
+    points = []
+    for i, rate in enumerate(rates):
+        if arrivals is None:
+            schedule = poisson_arrivals(rate, duration, seed=seed + i)
+        else:
+            schedule = scale_arrivals(arrivals, rate)
+        if len(schedule) == 0:
+            continue
+        point = run_open_loop(routers, payloads, schedule, timeout=timeout)
+        point['offered_rate'] = rate
+        points.append(point)
+
+    return {
+        'variant': variant_name,
+        'workers': workers,
+        'text_fraction': text_fraction,
+        'capacity_estimate': capacity,
+        'points': points,
+        'saturation_rate': find_saturation(points, latency_slo=latency_slo)
+    }
+
+def run_load_suite(variants=LOAD_VARIANTS, duration=2.0, workers=1, save_path="results/benchmarks",
+                   plot=True, **sweep_kwargs):
+    """Run load sweeps for several variants, print reports and save curves."""
+    curves = []
+    for variant_name in variants:
+        console.print(f"[yellow]Load sweep: {variant_name}[/]")
+        curves.append(run_load_sweep(variant_name, duration=duration, workers=workers, **sweep_kwargs))
+        print_load_report(curves[-1])
+    if plot:
+        Path(save_path).mkdir(parents=True, exist_ok=True)
+        plot_load_curves(curves, save_path)
+    return curves
+
+def print_load_report(curve):
+    """Print one variant's latency-vs-load table."""
+    table = Table(title=f"Open-Loop Load - {curve['variant']}")
+    table.add_column("Offered (req/s)", justify="right", style="cyan")
+    table.add_column("Achieved (req/s)", justify="right", style="green")
+    table.add_column("p50 (ms)", justify="right")
+    table.add_column("p99 (ms)", justify="right")
+    table.add_column("p99 wait (ms)", justify="right")
+    table.add_column("Service (ms)", justify="right")
+    table.add_column("Dropped", justify="right", style="red")
+
+    for point in curve['points']:
+        table.add_row(
+            f"{point['offered_rate']:,.1f}",
+            f"{point['achieved_rate']:,.1f}",
+            f"{point['latency'][0.5] * 1000:.3f}",
+            f"{point['latency'][0.99] * 1000:.3f}",
+            f"{point['queue_wait'][0.99] * 1000:.3f}",
+            f"{point['mean_service'] * 1000:.3f}",
+            str(point['timed_out'])
+        )
+    console.print(table)
+
+    saturation = curve['saturation_rate']
+    console.print(f"Estimated capacity: [green]{curve['capacity_estimate']:,.1f} req/s[/], "
+                  f"saturation point: [yellow]"
+                  f"{f'{saturation:,.1f} req/s' if saturation is not None else 'below lowest load'}[/]")
+
+def plot_load_curves(curves, save_path):
+    """Save one latency-vs-throughput plot per variant."""
+    import matplotlib.pyplot as plt
+
+    for curve in curves:
+        points = [p for p in curve['points'] if p['completed']]
+        if not points:
+            continue
+        achieved = [p['achieved_rate'] for p in points]
+        fig, ax = plt.subplots(figsize=(8, 6))
+        for q, style in ((0.5, 'o-'), (0.99, 's-')):
+            ax.plot(achieved, [p['latency'][q] * 1000 for p in points], style, label=f'p{q * 100:g}')
+        if curve['saturation_rate'] is not None:
+            ax.axvline(curve['saturation_rate'], color='r', linestyle='--', alpha=0.5, label='Saturation')
+        ax.set_yscale('log')
+        ax.set_title(f"Latency vs Throughput - {curve['variant']}")
+        ax.set_xlabel('Achieved throughput (req/s)')
+        ax.set_ylabel('End-to-end latency (ms)')
+        ax.grid(True, which='both', alpha=0.3)
+        ax.legend()
+        fig.savefig(Path(save_path) / f"{curve['variant'].lower()}_load_curve.png")
+        plt.close(fig)
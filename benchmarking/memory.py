@@ -0,0 +1,179 @@
+import os
+import sys
+import tracemalloc
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+# Router sources whose allocation sites are listed by default
+DEFAULT_SITE_FILES = ('text_moe.py', 'image_moe.py', 'switched_moe.py')
+
+def deep_sizeof(obj, _seen=None):
+    """Approximate resident size of an object graph in bytes."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)  # Includes the data buffer of arrays that own it
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, _seen) for item in obj)
+    elif isinstance(obj, np.ndarray) and obj.base is not None:
+        size += deep_sizeof(obj.base, _seen)
+    return size
+
+class _AllocationTracer:
+    """Attribute traced-memory growth to source lines via profile events.
+
+    Between consecutive call/return events the growth of tracemalloc's
+    current size is charged to the line executing in the caller frame. C
+    functions report their own c_call/c_return events, so an allocation
+    such as a per-token np.zeros is charged to the line that called it.
+    Memory allocated and freed between two events is not seen, so totals
+    are a lower bound. events counts the intervals with net growth, not
+    individual allocations. With record_sites off, only totals are kept.
+    """
+
+    def __init__(self, site_files, record_sites=True):
+        self.site_files = site_files
+        self.record_sites = record_sites
+        self.total_bytes = 0
+        self.events = 0
+        self.sites = {}
+        self._last = 0
+
+    def __call__(self, frame, event, arg):
+        current, _ = tracemalloc.get_traced_memory()
+        delta = current - self._last
+        self._last = current
+        if delta <= 0:
+            return
+        self._charge(frame, event, delta)
+        # Exclude the tracer's own bookkeeping from the next delta
+        self._last = tracemalloc.get_traced_memory()[0]
+
+    def _charge(self, frame, event, delta):
+        self.total_bytes += delta
+        self.events += 1
+        if not self.record_sites:
+            return
+        # For call events the new frame has not run yet; charge the caller
+        if event == 'call' and frame.f_back is not None:
+            frame = frame.f_back
+        file_name = os.path.basename(frame.f_code.co_filename)
+        if self.site_files is None or file_name in self.site_files:
+            key = (file_name, frame.f_lineno)
+            bytes_, count = self.sites.get(key, (0, 0))
+            self.sites[key] = (bytes_ + delta, count + 1)
+
+def profile_allocations(fn, sample, site_files=DEFAULT_SITE_FILES, trace_sites=True):
+    """Profile the memory behaviour of one fn(sample) call.
+
+    Always returns peak and retained bytes, allocated bytes (a lower bound
+    on everything allocated, from profile events), growth events (intervals
+    with net growth), the number of blocks allocated during the call that
+    are still live afterwards (from tracemalloc snapshots) and the deep
+    size of the result. trace_sites adds per-line allocation sites in
+    site_files.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+
+    tracer = _AllocationTracer(site_files, record_sites=trace_sites)
+    try:
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        tracer._last = before
+        sys.setprofile(tracer)
+        try:
+            result = fn(sample)
+        finally:
+            sys.setprofile(None)
+        after, peak = tracemalloc.get_traced_memory()
+        own_frames = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        new_blocks = sum(max(stat.count_diff, 0) for stat in tracemalloc.take_snapshot().filter_traces(own_frames)
+                         .compare_to(snapshot.filter_traces(own_frames), 'lineno'))
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    profile = {
+        'peak_bytes': peak - before,
+        'retained_bytes': after - before,
+        'allocated_bytes': tracer.total_bytes,
+        'growth_events': tracer.events,
+        'retained_blocks': new_blocks,
+        'result_bytes': deep_sizeof(result)
+    }
+    if trace_sites:
+        profile['sites'] = sorted(
+            ({'file': file_name, 'line': line, 'bytes': bytes_, 'count': count}
+             for (file_name, line), (bytes_, count) in tracer.sites.items()),
+            key=lambda site: site['bytes'], reverse=True
+        )
+    return profile
+
+def print_memory_report(profiles, top_sites=0):
+    """Print per-variant, per-input memory profiles.
+
+    profiles maps variant name to {input label: profile}. With top_sites,
+    the heaviest allocation sites of each variant are listed too.
+    """
+    table = Table(title="Memory Profile per process() Call")
+    table.add_column("Variant", style="cyan")
+    table.add_column("Input", style="cyan")
+    table.add_column("Peak", justify="right", style="green")
+    table.add_column("Allocated", justify="right", style="green")
+    table.add_column("Growth events", justify="right")
+    table.add_column("Retained", justify="right")
+    table.add_column("Retained blocks", justify="right")
+    table.add_column("Result size", justify="right", style="yellow")
+
+    for variant, by_input in profiles.items():
+        for label, profile in by_input.items():
+            table.add_row(
+                variant, label,
+                format_bytes(profile['peak_bytes']),
+                format_bytes(profile['allocated_bytes']),
+                f"{profile['growth_events']:,}",
+                format_bytes(profile['retained_bytes']),
+                f"{profile['retained_blocks']:,}",
+                format_bytes(profile['result_bytes'])
+            )
+    console.print(table)
+
+    if not top_sites:
+        return
+    for variant, by_input in profiles.items():
+        sites = {}
+        for profile in by_input.values():
+            for site in profile.get('sites', []):
+                key = (site['file'], site['line'])
+                bytes_, count = sites.get(key, (0, 0))
+                sites[key] = (bytes_ + site['bytes'], count + site['count'])
+        if not sites:
+            continue
+
+        site_table = Table(title=f"Top Allocation Sites - {variant}")
+        site_table.add_column("Site", style="cyan")
+        site_table.add_column("Bytes", justify="right", style="green")
+        site_table.add_column("Events", justify="right")
+        ranked = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)[:top_sites]
+        for (file_name, line), (bytes_, count) in ranked:
+            site_table.add_row(f"{file_name}:{line}", format_bytes(bytes_), f"{count:,}")
+        console.print(site_table)
+
+def format_bytes(num_bytes):
+    """Format a byte count with a binary unit."""
+    for unit in ("B", "KiB", "MiB"):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GiB"
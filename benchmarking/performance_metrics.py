@@ -1,35 +1,70 @@
 import time
+import threading
 import numpy as np
-import matplotlib.pyplot as plt
+from collections import OrderedDict
 from rich.console import Console
 from rich.table import Table
 from pathlib import Path
+from utils.dashboard import ComplexityDashboard
+from .harness import GCDisabled, format_ns, measure
+from .memory import print_memory_report, profile_allocations
+from .regression import save_results_json
+from utils.latency_sketch import DEFAULT_QUANTILES, LatencySketch, format_quantile_label
+from utils import tracing
 
 console = Console()
 
+COMPLEXITIES = ['simple', 'medium', 'complex']
+ROUTE_CACHE_SIZE = 1024  # Most recently routed distinct samples kept by MoEBenchmark
+
 class MoEBenchmark:
-    def __init__(self, moe_variant, num_iterations=100):
+    """Time a router's process() and track which experts it uses.
+
+    Routers with process_with_decision() report the expert of each timed
+    call. For the others route() is called after each timed call. With
+    cache_routes, each distinct sample is routed once and later repeats
+    reuse that expert. Only enable it for stateless routers: an adaptive
+    router can send the same input elsewhere later, and expert_usage
+    would then report routes it did not take.
+    """
+
+    def __init__(self, moe_variant, num_iterations=100, seed=0, text_length=None, image_size=32,
+                 workload=None, cache_routes=False):
         self.moe_variant = moe_variant
+        self.cache_routes = cache_routes
+        self.workload = workload  # benchmarking.workloads.Workload, replaces the built-in samples
         self.num_iterations = num_iterations
+        self.text_length = text_length
+        self.image_size = image_size
+        self._rng = np.random.default_rng(seed)
+        self._route_cache = OrderedDict()
         self.results = {
             'execution_times': [],
             'routing_decisions': [],
             'expert_usage': {},
-            'complexity_scores': []
+            'complexity_scores': [],
+            'latency_sketch': LatencySketch()
         }
 
     def _generate_text_sample(self, complexity='medium'):
-        """Generate text samples of varying complexity."""
+        """Generate text samples of varying complexity.
+
+        By default a sample is one word; with text_length set, words of the
+        same complexity are joined up to that many characters.
+        """
         samples = {
             'simple': ['The', 'cat', 'dog', 'ran'],
             'medium': ['Python', 'programming', 'language'],
             'complex': ['Supercalifragilisticexpialidocious', 'Incomprehensibilities']
         }
-        return np.random.choice(samples[complexity])
+        if self.text_length is None:
+            return str(self._rng.choice(samples[complexity]))
+        words = self._rng.choice(samples[complexity], size=self.text_length // 4 + 1)
+        return ' '.join(words)[:self.text_length].rstrip()
 
     def _generate_image_sample(self, complexity='medium'):
         """Generate synthetic image samples of varying complexity."""
-        size = 32
+        size = self.image_size
         if complexity == 'simple':
             # Uniform image
             return np.ones((size, size)) * 0.5
@@ -40,47 +75,244 @@ class MoEBenchmark:
             return img
         else:
             # Complex pattern
-            return np.random.rand(size, size)
+            return self._rng.random((size, size))
 
-    def run_single_benchmark(self, input_type='text', complexity='medium'):
-        """Run a single benchmark iteration."""
-        if input_type == 'text':
-            sample = self._generate_text_sample(complexity)
+    def _prepare_inputs(self, input_type, complexity, count):
+        """Pre-generate inputs so sampling never happens inside a timed region."""
+        if self.workload is not None:
+            return self.workload.samples(input_type, complexity, count)
+        generate = self._generate_text_sample if input_type == 'text' else self._generate_image_sample
+        return [generate(complexity) for _ in range(count)]
+
+    def _route_once(self, sample):
+        """Route each distinct sample once; repeated samples reuse the decision.
+
+        Arrays are keyed by a content digest, so the cache never keeps them
+        alive, and only the ROUTE_CACHE_SIZE most recent samples are kept.
+        """
+        if isinstance(sample, str):
+            key = sample
+        elif isinstance(sample, np.ndarray):
+            from utils.routing_trace import input_hash
+            key = input_hash(sample)
         else:
-            sample = self._generate_image_sample(complexity)
+            return self.moe_variant.route(sample)
 
-        start_time = time.perf_counter()
-        result = self.moe_variant.process(sample)
-        end_time = time.perf_counter()
+        cache = self._route_cache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        expert = cache[key] = self.moe_variant.route(sample)
+        if len(cache) > ROUTE_CACHE_SIZE:
+            cache.popitem(last=False)
+        return expert
+
+    def run_single_benchmark(self, input_type='text', complexity='medium', sample=None):
+        """Run a single benchmark iteration."""
+        if sample is None:
+            sample = self._prepare_inputs(input_type, complexity, 1)[0]
+
+        # Routers that expose their decision report the expert they actually chose
+        process_with_decision = getattr(self.moe_variant, 'process_with_decision', None)
+        decision = None
+        with GCDisabled(collect=False):
+            start_time = time.perf_counter()
+            if process_with_decision is not None:
+                result, decision = process_with_decision(sample)
+            else:
+                result = self.moe_variant.process(sample)
+            end_time = time.perf_counter()
 
         execution_time = end_time - start_time
         self.results['execution_times'].append(execution_time)
+        self.results['latency_sketch'].add(execution_time)
         self.results['complexity_scores'].append(complexity)
 
         # Track expert usage if available
-        if hasattr(self.moe_variant, 'route'):
-            expert = self.moe_variant.route(sample)
+        if decision is not None or hasattr(self.moe_variant, 'route'):
+            if decision is not None:
+                expert = decision['expert_id']
+            elif self.cache_routes:
+                expert = self._route_once(sample)
+            else:
+                expert = self.moe_variant.route(sample)
             self.results['routing_decisions'].append(expert)
             self.results['expert_usage'][expert] = self.results['expert_usage'].get(expert, 0) + 1
 
         return execution_time
 
-    def run_full_benchmark(self, input_type='text'):
+    def run_full_benchmark(self, input_type='text', warmup=5):
         """Run complete benchmark suite."""
-        complexities = ['simple', 'medium', 'complex']
-        for complexity in complexities:
+        for complexity in COMPLEXITIES:
             console.print(f"\n[yellow]Running {complexity} complexity benchmarks...[/]")
-            for _ in range(self.num_iterations // len(complexities)):
-                self.run_single_benchmark(input_type, complexity)
+            samples = self._prepare_inputs(input_type, complexity, self.num_iterations // len(COMPLEXITIES))
+            for sample in samples[:warmup]:
+                self.moe_variant.process(sample)
+            for sample in samples:
+                self.run_single_benchmark(input_type, complexity, sample)
+
+    def run_harness(self, input_type='text', pool_size=32, **measure_kwargs):
+        """Time process() per complexity with the micro-benchmark harness.
+
+        Returns {complexity: stats} with ns/op, IQR and ops/s; see
+        benchmarking.harness.measure for the available options.
+        """
+        stats = {}
+        for complexity in COMPLEXITIES:
+            samples = self._prepare_inputs(input_type, complexity, pool_size)
+            stats[complexity] = measure(self.moe_variant.process, samples, **measure_kwargs)
+        self.results['harness'] = stats
+        return stats
+
+    def run_memory_profile(self, input_type='text', sizes=(), trace_sites=True):
+        """Profile allocations of one process() call per complexity and input size.
 
-def run_benchmark(moe_variant, input_type='text', num_iterations=100):
-    """Run benchmarks for a given MoE variant."""
-    benchmark = MoEBenchmark(moe_variant, num_iterations)
+        sizes are text lengths in characters or square image sides. Returns
+        {input label: profile}; see benchmarking.memory.profile_allocations.
+        """
+        from .scaling import generate_image, generate_text
+
+        samples = [(complexity, self._prepare_inputs(input_type, complexity, 1)[0])
+                   for complexity in COMPLEXITIES]
+        for size in sizes:
+            if input_type == 'text':
+                samples.append((f"{size:,} chars", generate_text(size)))
+            else:
+                samples.append((f"{size}x{size}", generate_image(size)))
+
+        profiles = {}
+        for label, sample in samples:
+            self.moe_variant.process(sample)  # Warm caches and lazy imports first
+            profiles[label] = profile_allocations(self.moe_variant.process, sample, trace_sites=trace_sites)
+        self.results['memory'] = profiles
+        return profiles
+
+    def run_stage_profile(self, input_type='text', samples_per_complexity=20):
+        """Record per-stage tracing spans over process() calls.
+
+        Stores the tracer under results['trace'] and its per-stage summary
+        under results['stages']; see utils.tracing.Tracer.stage_summary.
+        """
+        samples = [sample for complexity in COMPLEXITIES
+                   for sample in self._prepare_inputs(input_type, complexity, samples_per_complexity)]
+        self.moe_variant.process(samples[0])  # Keep one-off warmup costs out of the trace
+        with tracing.recording() as tracer:
+            for sample in samples:
+                self.moe_variant.process(sample)
+        self.results['trace'] = tracer
+        self.results['stages'] = tracer.stage_summary()
+        return self.results['stages']
+
+def run_memory_benchmarks(variants, sizes=None, top_sites=0):
+    """Profile memory for several variants and print the report.
+
+    variants maps a display name to (moe_variant, input_type); sizes maps
+    an input type to the text lengths or image sides to profile.
+    """
+    sizes = sizes or {}
+    profiles = {}
+    for name, (variant, input_type) in variants.items():
+        benchmark = MoEBenchmark(variant)
+        profiles[name] = benchmark.run_memory_profile(input_type, sizes.get(input_type, ()),
+                                                      trace_sites=bool(top_sites))
+    print_memory_report(profiles, top_sites=top_sites)
+    return profiles
+
+def run_benchmark(moe_variant, input_type='text', num_iterations=100, trace=False, **benchmark_kwargs):
+    """Run benchmarks for a given MoE variant.
+
+    With trace, per-stage spans are recorded after the timed run so the
+    report can break time down by stage. Extra keyword arguments such as
+    text_length and image_size are passed to MoEBenchmark.
+    """
+    benchmark = MoEBenchmark(moe_variant, num_iterations, **benchmark_kwargs)
     benchmark.run_full_benchmark(input_type)
+    if trace:
+        benchmark.run_stage_profile(input_type)
     return benchmark.results
 
+def run_microbenchmarks(variants, **measure_kwargs):
+    """Run the harness for several variants and print ns/op and ops/s.
+
+    variants maps a display name to (moe_variant, input_type).
+    Returns {name: {complexity: stats}}.
+    """
+    results = {}
+    table = Table(title="Micro-benchmark Results")
+    table.add_column("Variant", style="cyan")
+    table.add_column("Complexity", style="cyan")
+    table.add_column("Time/op", justify="right", style="green")
+    table.add_column("IQR", justify="right", style="yellow")
+    table.add_column("Ops/s", justify="right", style="green")
+    table.add_column("Loops x Rounds", justify="right", style="dim")
+
+    for name, (variant, input_type) in variants.items():
+        results[name] = MoEBenchmark(variant).run_harness(input_type, **measure_kwargs)
+        for complexity, stats in results[name].items():
+            table.add_row(
+                name, complexity,
+                format_ns(stats['ns_per_op']),
+                format_ns(stats['iqr_ns']),
+                f"{stats['ops_per_sec']:,.0f}",
+                f"{stats['inner_loops']} x {stats['rounds']}"
+            )
+
+    console.print(table)
+    return results
+
+def benchmark_dashboard_updates(thread_counts=(1, 2, 4, 8), updates_per_thread=50000, batch_size=None):
+    """Measure aggregate ComplexityDashboard update throughput per thread count.
+
+    Every thread shares one dashboard, as routers in a worker pool do. With
+    batch_size set, updates go through update_many in chunks of that size.
+    Returns a mapping of thread count to updates per second.
+    """
+    throughput = {}
+    for num_threads in thread_counts:
+        dashboard = ComplexityDashboard()
+        barrier = threading.Barrier(num_threads + 1)
+
+        def worker():
+            barrier.wait()
+            if batch_size:
+                batch = [0.5] * batch_size
+                assignments = [1] * batch_size
+                for _ in range(updates_per_thread // (2 * batch_size)):
+                    dashboard.update_many('text_complexity', batch)
+                    dashboard.update_many('expert_assignment', assignments)
+            else:
+                for _ in range(updates_per_thread // 2):
+                    dashboard.update_metrics('text_complexity', 0.5)
+                    dashboard.update_metrics('expert_assignment', 1)
+
+        threads = [threading.Thread(target=worker) for _ in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start_time = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start_time
+
+        # Each loop records one complexity sample per expert assignment
+        total_updates = 2 * sum(dashboard.merge()['expert_assignments'].values())
+        throughput[num_threads] = total_updates / elapsed
+
+    table = Table(title="Dashboard Update Throughput")
+    table.add_column("Threads", style="cyan")
+    table.add_column("Updates/s", justify="right", style="green")
+    table.add_column("vs 1 thread", justify="right", style="yellow")
+    baseline = throughput[thread_counts[0]]
+    for num_threads, rate in throughput.items():
+        table.add_row(str(num_threads), f"{rate:,.0f}", f"{rate / baseline:.2f}x")
+    console.print(table)
+
+    return throughput
+
 def plot_execution_times(results, variant_name, save_path):
     """Generate and save execution time distribution plot."""
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(10, 6))
     plt.hist(np.array(results['execution_times']) * 1000, bins=30, alpha=0.7)
     plt.title(f'Execution Time Distribution - {variant_name}')
@@ -92,6 +324,8 @@ def plot_execution_times(results, variant_name, save_path):
 
 def plot_expert_usage(results, variant_name, save_path):
     """Generate and save expert usage pie chart."""
+    import matplotlib.pyplot as plt
+
     if results['expert_usage']:
         plt.figure(figsize=(8, 8))
         experts = list(results['expert_usage'].keys())
@@ -103,6 +337,8 @@ def plot_expert_usage(results, variant_name, save_path):
 
 def plot_complexity_performance(results, variant_name, save_path):
     """Generate and save complexity vs performance plot."""
+    import matplotlib.pyplot as plt
+
     if results['complexity_scores']:
         plt.figure(figsize=(10, 6))
         times_by_complexity = {
@@ -115,27 +351,62 @@ def plot_complexity_performance(results, variant_name, save_path):
             times_by_complexity[complexity].append(time * 1000)  # Convert to ms
 
         plt.boxplot([times_by_complexity[c] for c in ['simple', 'medium', 'complex']], 
-                   labels=['Simple', 'Medium', 'Complex'])
+                   tick_labels=['Simple', 'Medium', 'Complex'])
         plt.title(f'Performance by Complexity - {variant_name}')
         plt.ylabel('Execution Time (ms)')
         plt.grid(True, alpha=0.3)
         plt.savefig(Path(save_path) / f'{variant_name.lower()}_complexity_performance.png')
         plt.close()
 
-def generate_report(results, variant_name, save_path="results/benchmarks"):
-    """Generate and save benchmark report with visualizations."""
+def _stage_rows(stages):
+    """Yield (name, count, total ms, self ms, share of top-level time) per stage."""
+    # Top-level spans (*.process) define 100%; fall back to the summed self time
+    top_level = sum(stats['total_ns'] for name, stats in stages.items() if name.endswith('.process'))
+    reference = top_level or sum(stats['self_ns'] for stats in stages.values())
+    for name, stats in sorted(stages.items(), key=lambda item: item[1]['self_ns'], reverse=True):
+        share = stats['self_ns'] / reference * 100 if reference else 0.0
+        yield name, stats['count'], stats['total_ns'] / 1e6, stats['self_ns'] / 1e6, share
+
+def print_stage_table(stages, variant_name):
+    """Print aggregated per-stage time from a tracing summary."""
+    table = Table(title=f"Per-Stage Time: {variant_name}")
+    table.add_column("Stage", style="cyan")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total (ms)", justify="right", style="green")
+    table.add_column("Self (ms)", justify="right", style="green")
+    table.add_column("Self share", justify="right", style="yellow")
+    for name, count, total_ms, self_ms, share in _stage_rows(stages):
+        table.add_row(name, f"{count:,}", f"{total_ms:.3f}", f"{self_ms:.3f}", f"{share:.1f}%")
+    console.print(table)
+
+def plot_results(results, variant_name, save_path="results/benchmarks"):
+    """Render the standard benchmark figures for one variant."""
+    plot_execution_times(results, variant_name, save_path)
+    plot_expert_usage(results, variant_name, save_path)
+    plot_complexity_performance(results, variant_name, save_path)
+
+def generate_report(results, variant_name, save_path="results/benchmarks", plot=True):
+    """Generate and save benchmark report with visualizations.
+
+    With plot=False only the text and JSON reports are written; figures can
+    be rendered later from the JSON with plot_results.
+    """
     # Create results directory if it doesn't exist
     Path(save_path).mkdir(parents=True, exist_ok=True)
 
     # Calculate statistics
     avg_time = np.mean(results['execution_times']) * 1000  # Convert to ms
     std_time = np.std(results['execution_times']) * 1000
-    p95_time = np.percentile(results['execution_times'], 95) * 1000
+
+    # Tail latency from the streaming sketch (fixed memory, mergeable across runs)
+    latency = results.get('latency_sketch')
+    if latency is None:
+        latency = LatencySketch.from_values(results['execution_times'])
+    percentiles = {q: value * 1000 for q, value in latency.quantiles(DEFAULT_QUANTILES).items()}
 
     # Generate visualizations
-    plot_execution_times(results, variant_name, save_path)
-    plot_expert_usage(results, variant_name, save_path)
-    plot_complexity_performance(results, variant_name, save_path)
+    if plot:
+        plot_results(results, variant_name, save_path)
 
     # Create performance table
     table = Table(title=f"Performance Metrics: {variant_name}")
@@ -144,7 +415,8 @@ def generate_report(results, variant_name, save_path="results/benchmarks"):
 
     table.add_row("Average Time (ms)", f"{avg_time:.2f}")
     table.add_row("Std Deviation (ms)", f"{std_time:.2f}")
-    table.add_row("95th Percentile (ms)", f"{p95_time:.2f}")
+    for q, value in percentiles.items():
+        table.add_row(f"{format_quantile_label(q)} (ms)", f"{value:.3f}")
 
     # Expert utilization if available
     if results['expert_usage']:
@@ -156,6 +428,8 @@ def generate_report(results, variant_name, save_path="results/benchmarks"):
 
     # Save and display results
     console.print(table)
+    if results.get('stages'):
+        print_stage_table(results['stages'], variant_name)
 
     # Save detailed results to file
     report_path = Path(save_path) / f"{variant_name.lower()}_benchmark.txt"
@@ -165,7 +439,9 @@ def generate_report(results, variant_name, save_path="results/benchmarks"):
         f.write(f"Number of iterations: {len(results['execution_times'])}\n")
         f.write(f"Average execution time: {avg_time:.2f} ms\n")
         f.write(f"Standard deviation: {std_time:.2f} ms\n")
-        f.write(f"95th percentile: {p95_time:.2f} ms\n\n")
+        for q, value in percentiles.items():
+            f.write(f"{format_quantile_label(q)}: {value:.3f} ms\n")
+        f.write("\n")
 
         if results['expert_usage']:
             total_calls = sum(results['expert_usage'].values())  # Calculate total_calls here too
@@ -174,4 +450,16 @@ def generate_report(results, variant_name, save_path="results/benchmarks"):
                 percentage = (count / total_calls) * 100
                 f.write(f"Expert {expert}: {percentage:.1f}%\n")
 
+        if results.get('stages'):
+            f.write("\nPer-stage time (self time excludes nested stages):\n")
+            for name, count, total_ms, self_ms, share in _stage_rows(results['stages']):
+                f.write(f"{name}: {count} calls, total {total_ms:.3f} ms, self {self_ms:.3f} ms ({share:.1f}%)\n")
+
+    if results.get('trace') is not None:
+        results['trace'].export_chrome_trace(Path(save_path) / f"{variant_name.lower()}_trace.json",
+                                             process_name=variant_name)
+
+    # Machine-readable copy for diffing runs and regression checks
+    save_results_json(results, variant_name, save_path)
+
     console.print(f"\n[green]Detailed report and visualizations saved to: {save_path}[/]")
\ No newline at end of file
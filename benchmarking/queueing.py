@@ -0,0 +1,312 @@
+import heapq
+import bisect
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+SERVICE_DISTRIBUTIONS = ('exponential', 'deterministic', 'lognormal')
+
+def synthetic_jobs(rate, num_jobs, probabilities, seed=0):
+    """Poisson arrivals at rate jobs/s, each routed to an expert drawn from probabilities.
+
+    Returns (arrival times, expert ids), both generated in one vectorized pass.
+    """
+    rng = np.random.default_rng(seed)
+    arrivals = np.cumsum(rng.exponential(1.0 / rate, size=num_jobs))
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    experts = rng.choice(len(probabilities), size=num_jobs, p=probabilities / probabilities.sum())
+    return arrivals, experts
+
+class _DecisionCollector:
+    """Stands in for a TraceRecorder and keeps only the chosen experts."""
+
+    def __init__(self):
+        self.experts = []
+
+    def record(self, variant, data, experts, complexities, confidences, timestamp=None):
+        self.experts.extend(np.atleast_1d(experts).tolist())
+
+def routing_distribution(variant_name, samples=None, count=300, seed=0):
+    """Share of routing decisions per expert when a variant routes live inputs.
+
+    Decisions are per token for TextMoE, per region for ImageMoE and per
+    input for SwitchedMoE. By default inputs come from the seeded workload
+    cache, mixing the three complexity tiers equally.
+    """
+    from .concurrency import make_router
+    from .workloads import Workload
+
+    router = make_router(variant_name)
+    router.recorder = collector = _DecisionCollector()
+    if samples is None:
+        workload = Workload(seed=seed)
+        input_type = 'image' if variant_name == 'ImageMoE' else 'text'
+        samples = [sample for complexity in ('simple', 'medium', 'complex')
+                   for sample in workload.samples(input_type, complexity, count // 3)]
+    for sample in samples:
+        router.process(sample)
+    counts = np.bincount(collector.experts, minlength=router.num_experts)
+    return counts / counts.sum()
+
+def trace_jobs(path, variant_name=None):
+    """Arrival offsets and experts of the decisions in a recorded routing trace.
+
+    With variant_name, only that variant's decisions are returned.
+    """
+    from utils.routing_trace import VARIANT_CODES, TraceReader
+
+    arrivals, experts = [], []
+    for records in TraceReader(path):
+        if variant_name is not None:
+            records = records[records['variant'] == VARIANT_CODES[variant_name]]
+        arrivals.append(np.asarray(records['timestamp'], dtype=np.float64))
+        experts.append(np.asarray(records['expert'], dtype=np.int64))
+    if not arrivals:
+        return np.zeros(0), np.zeros(0, dtype=np.int64)
+    arrivals, experts = np.concatenate(arrivals), np.concatenate(experts)
+    if len(arrivals) == 0:
+        return arrivals, experts
+    order = np.argsort(arrivals, kind='stable')
+    return arrivals[order] - arrivals[order[0]], experts[order]
+
+def _service_multipliers(distribution, size, cv, rng):
+    """Random factors with mean 1 that scale the mean service time."""
+    if distribution == 'exponential':
+        return rng.exponential(1.0, size=size)
+    if distribution == 'deterministic':
+        return np.ones(size)
+    if distribution == 'lognormal':
+        sigma = np.sqrt(np.log1p(cv ** 2))
+        return rng.lognormal(-sigma ** 2 / 2, sigma, size=size)
+    raise ValueError(f"Unknown service distribution: {distribution}")
+
+def _simulate_single_server(arrivals, service):
+    """FIFO single server without batching, fully vectorized.
+
+    A job finishes at S_n + max over k <= n of (a_k - S_(k-1)), where S is
+    the running sum of service times.
+    """
+    total = np.cumsum(service)
+    finish = total + np.maximum.accumulate(arrivals - (total - service))
+    return finish, np.ones(len(arrivals), dtype=np.int64)
+
+def _simulate_multi_server(arrivals, service, workers):
+    """FIFO queue with several workers and no batching: each job takes the earliest free worker."""
+    finish = np.empty(len(arrivals))
+    free = [0.0] * workers
+    replace = heapq.heapreplace
+    for index, (arrival, duration) in enumerate(zip(arrivals.tolist(), service.tolist())):
+        done = (free[0] if free[0] > arrival else arrival) + duration
+        replace(free, done)
+        finish[index] = done
+    return finish, np.ones(len(arrivals), dtype=np.int64)
+
+def _simulate_batched(arrivals, multipliers, mean_service, workers, batch_window, max_batch, batch_cost):
+    """Heap-based event loop over batches for one expert's FIFO queue.
+
+    An idle worker starts a batch once max_batch jobs wait or the oldest
+    waiting job has waited batch_window, whichever comes first, and takes
+    every waiting job up to max_batch. A batch of n jobs takes
+    mean_service * (1 + batch_cost * (n - 1)), times a random factor.
+    """
+    times = arrivals.tolist()
+    factors = multipliers.tolist()
+    count = len(times)
+    finish = np.empty(count)
+    sizes = []
+    free = [times[0]] * workers if count else []
+    i = 0
+    while i < count:
+        worker_free = heapq.heappop(free)
+        first = times[i]
+        full_at = times[i + max_batch - 1] if i + max_batch - 1 < count else float('inf')
+        start = max(worker_free, min(first + batch_window, full_at))
+        end = min(bisect.bisect_right(times, start, i), i + max_batch)
+        size = end - i
+        done = start + mean_service * (1 + batch_cost * (size - 1)) * factors[len(sizes)]
+        finish[i:end] = done
+        sizes.append(size)
+        heapq.heappush(free, done)
+        i = end
+    return finish, np.asarray(sizes, dtype=np.int64)
+
+def simulate_queues(arrivals, experts, num_experts, service_time, workers=1, batch_window=0.0, max_batch=1,
+                    batch_cost=1.0, distribution='exponential', cv=1.0, seed=0):
+    """Simulate per-expert FIFO queues and predict latency and utilization.
+
+    arrivals are sorted job arrival times in seconds and experts their
+    routed expert. service_time is the mean time for one job, and workers
+    the number of parallel servers. Both may be one value per expert.
+    Batches of n jobs take service_time * (1 + batch_cost * (n - 1)), so
+    batch_cost=1 gives no batching gain and 0 makes batches free. Expert
+    queues are independent, so each one is simulated on its own. A single
+    worker without batching uses a vectorized recursion. Several workers
+    use a heap of worker free times. Batching runs an event loop over
+    batches.
+    """
+    arrivals = np.asarray(arrivals, dtype=np.float64)
+    experts = np.asarray(experts, dtype=np.int64)
+    service_time = np.broadcast_to(np.asarray(service_time, dtype=np.float64), (num_experts,))
+    workers = np.broadcast_to(np.asarray(workers, dtype=np.int64), (num_experts,))
+    rng = np.random.default_rng(seed)
+    duration = float(arrivals[-1] - arrivals[0]) if len(arrivals) > 1 else 0.0
+
+    latencies = np.empty(len(arrivals))
+    per_expert = []
+    for expert in range(num_experts):
+        mask = experts == expert
+        times = arrivals[mask]
+        if not len(times):
+            per_expert.append({'expert': expert, 'jobs': 0, 'workers': int(workers[expert]),
+                               'utilization': 0.0, 'offered_load': 0.0, 'mean_batch': 0.0,
+                               'p50': float('nan'), 'p99': float('nan'), 'mean_wait': float('nan')})
+            continue
+        mean_service = float(service_time[expert])
+        if max_batch == 1:
+            service = mean_service * _service_multipliers(distribution, len(times), cv, rng)
+            if workers[expert] == 1:
+                finish, sizes = _simulate_single_server(times, service)
+            else:
+                finish, sizes = _simulate_multi_server(times, service, int(workers[expert]))
+            busy = float(service.sum())
+        else:
+            # One factor per job bounds the number of batches from above
+            factors = _service_multipliers(distribution, len(times), cv, rng)
+            finish, sizes = _simulate_batched(times, factors, mean_service, int(workers[expert]),
+                                              batch_window, max_batch, batch_cost)
+            busy = float((mean_service * (1 + batch_cost * (sizes - 1)) * factors[:len(sizes)]).sum())
+
+        latency = finish - times
+        latencies[mask] = latency
+        span = max(float(finish.max()) - float(arrivals[0]), duration)
+        rate = len(times) / duration if duration else 0.0
+        per_expert.append({
+            'expert': expert,
+            'jobs': int(len(times)),
+            'workers': int(workers[expert]),
+            'utilization': busy / (workers[expert] * span) if span else 0.0,
+            # Load offered without batching; above 1 the queue grows without bound
+            'offered_load': rate * mean_service / workers[expert],
+            'mean_batch': float(sizes.mean()),
+            'p50': float(np.quantile(latency, 0.5)),
+            'p99': float(np.quantile(latency, 0.99)),
+            'mean_wait': float(latency.mean() - mean_service)
+        })
+
+    return {
+        'jobs': int(len(arrivals)),
+        'duration': duration,
+        'arrival_rate': len(arrivals) / duration if duration else 0.0,
+        'p50': float(np.quantile(latencies, 0.5)) if len(latencies) else float('nan'),
+        'p99': float(np.quantile(latencies, 0.99)) if len(latencies) else float('nan'),
+        'experts': per_expert
+    }
+
+def _trace_mix(trace, variant_name):
+    """Expert shares of one variant's decisions in a trace, trimmed to the experts it used."""
+    from utils.routing_trace import analyze_trace
+
+    counts = analyze_trace(trace)['experts'].get(variant_name)
+    if counts is None or not counts.any():
+        raise ValueError(f"Trace {trace} has no {variant_name} decisions")
+    counts = counts[:int(np.flatnonzero(counts).max()) + 1]
+    return counts / counts.sum()
+
+def plan_capacity(variant_name, rate, service_time, num_jobs=1_000_000, workers=1, trace=None, replay=False,
+                  seed=0, **simulation_kwargs):
+    """Predict serving latency for a variant's routing at a given request rate.
+
+    Routing comes from the variant's decisions in a recorded trace when one
+    is given, otherwise from running the variant live on workload inputs.
+    Arrivals are Poisson at rate, except with replay: then the trace's own
+    decisions and arrival times are simulated, rescaled to rate unless
+    rate is None.
+    """
+    if replay:
+        if trace is None:
+            raise ValueError("replay needs a trace")
+        arrivals, experts = trace_jobs(trace, variant_name)
+        if len(arrivals) == 0:
+            raise ValueError(f"Trace {trace} has no {variant_name} decisions")
+        if rate is not None:
+            from .loadgen import scale_arrivals
+            arrivals = scale_arrivals(arrivals, rate)
+        counts = np.bincount(experts)
+        probabilities = counts / counts.sum()
+    else:
+        probabilities = _trace_mix(trace, variant_name) if trace is not None else \
+            routing_distribution(variant_name, seed=seed)
+        arrivals, experts = synthetic_jobs(rate, num_jobs, probabilities, seed=seed)
+    result = simulate_queues(arrivals, experts, len(probabilities), service_time, workers=workers, seed=seed,
+                             **simulation_kwargs)
+    result.update(variant=variant_name, routing=probabilities.tolist())
+    return result
+
+def print_queue_report(result):
+    """Print predicted latency and utilization per expert."""
+    title = (f"Queueing Simulation - {result.get('variant', 'jobs')} "
+             f"({result['jobs']:,} jobs at {result['arrival_rate']:,.0f}/s: "
+             f"p50 {result['p50'] * 1000:.2f} ms, p99 {result['p99'] * 1000:.2f} ms)")
+    table = Table(title=title)
+    table.add_column("Expert", justify="right", style="cyan")
+    table.add_column("Jobs", justify="right")
+    table.add_column("Workers", justify="right")
+    table.add_column("Offered load", justify="right")
+    table.add_column("Utilization", justify="right", style="green")
+    table.add_column("Mean batch", justify="right")
+    table.add_column("p50 (ms)", justify="right", style="magenta")
+    table.add_column("p99 (ms)", justify="right", style="magenta")
+
+    for expert in result['experts']:
+        unstable = expert['offered_load'] >= 1 and expert['mean_batch'] <= 1
+        table.add_row(
+            str(expert['expert']),
+            f"{expert['jobs']:,}",
+            str(expert['workers']),
+            f"[red]{expert['offered_load']:.2f}[/]" if unstable else f"{expert['offered_load']:.2f}",
+            f"{expert['utilization']:.1%}",
+            f"{expert['mean_batch']:.1f}",
+            f"{expert['p50'] * 1000:.2f}",
+            f"{expert['p99'] * 1000:.2f}"
+        )
+    console.print(table)
+
+def main(argv=None):
+    """Predict per-expert latency and utilization for a variant at a request rate."""
+    import argparse
+    from .concurrency import VARIANTS
+
+    parser = argparse.ArgumentParser(description="Simulate expert serving queues")
+    parser.add_argument("--variant", choices=VARIANTS, default='SwitchedMoE')
+    parser.add_argument("--trace", default=None, help="Routing trace directory to take the expert mix from")
+    parser.add_argument("--replay", action="store_true",
+                        help="Simulate the trace's own decisions and arrival times instead of Poisson arrivals")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Routing decisions per second (required unless replaying a trace at its recorded speed)")
+    parser.add_argument("--service-ms", type=float, nargs='+', required=True,
+                        help="Mean service time per job in ms (one value, or one per expert)")
+    parser.add_argument("--workers", type=int, nargs='+', default=[1], help="Workers (one, or one per expert)")
+    parser.add_argument("--jobs", type=int, default=1_000_000)
+    parser.add_argument("--max-batch", type=int, default=1)
+    parser.add_argument("--batch-window-ms", type=float, default=0.0)
+    parser.add_argument("--batch-cost", type=float, default=1.0)
+    parser.add_argument("--distribution", choices=SERVICE_DISTRIBUTIONS, default='exponential')
+    args = parser.parse_args(argv)
+    if args.replay and args.trace is None:
+        parser.error("--replay needs --trace")
+    if args.rate is None and not args.replay:
+        parser.error("--rate is required unless --replay is given")
+
+    result = plan_capacity(args.variant, args.rate, np.array(args.service_ms) / 1000, num_jobs=args.jobs,
+                           workers=np.array(args.workers), trace=args.trace, replay=args.replay,
+                           max_batch=args.max_batch,
+                           batch_window=args.batch_window_ms / 1000, batch_cost=args.batch_cost,
+                           distribution=args.distribution)
+    print_queue_report(result)
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
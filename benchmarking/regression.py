@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import subprocess
+import numpy as np
+from pathlib import Path
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+SCHEMA_VERSION = 1
+
+def _cpu_model():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+def _git_commit():
+    try:
+        output = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                timeout=5, cwd=Path(__file__).resolve().parent)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+def collect_environment():
+    """Describe the machine and code version a benchmark ran on."""
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu': _cpu_model(),
+        'cpu_count': os.cpu_count(),
+        'commit': _git_commit(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    }
+
+def results_to_record(results):
+    """Convert MoEBenchmark results into JSON-serializable data.
+
+    Raw samples are kept so later comparisons can run statistical tests.
+    """
+    record = {
+        'samples': {'execution_time': [float(t) for t in results.get('execution_times', [])]},
+        'expert_usage': {str(expert): int(count) for expert, count in results.get('expert_usage', {}).items()},
+        'complexity_scores': list(results.get('complexity_scores', []))
+    }
+    latency = results.get('latency_sketch')
+    if latency is not None and latency.count:
+        record['quantiles'] = {str(q): float(v) for q, v in latency.quantiles().items()}
+    if results.get('stages'):
+        record['stages'] = {name: dict(stats) for name, stats in results['stages'].items()}
+    for complexity, stats in results.get('harness', {}).items():
+        record['samples'][f'harness_{complexity}'] = [v / 1e9 for v in stats['round_ns_per_op']]
+    return record
+
+def results_from_record(record):
+    """Rebuild the MoEBenchmark results fields a saved record preserves."""
+    expert_usage = {}
+    for expert, count in record.get('expert_usage', {}).items():
+        expert_usage[int(expert) if expert.lstrip('-').isdigit() else expert] = count
+    return {
+        'execution_times': list(record['samples'].get('execution_time', [])),
+        'expert_usage': expert_usage,
+        'complexity_scores': list(record.get('complexity_scores', [])),
+        'stages': record.get('stages', {})
+    }
+
+def build_run(variant_results, environment=None):
+    """Build a run document from {variant_name: MoEBenchmark results}."""
+    return {
+        'schema': SCHEMA_VERSION,
+        'environment': collect_environment() if environment is None else environment,
+        'variants': {name: results_to_record(results) for name, results in variant_results.items()}
+    }
+
+def save_results_json(results, variant_name, save_path="results/benchmarks"):
+    """Save one variant's results as <variant>_benchmark.json."""
+    Path(save_path).mkdir(parents=True, exist_ok=True)
+    path = Path(save_path) / f"{variant_name.lower()}_benchmark.json"
+    with open(path, 'w') as f:
+        json.dump(build_run({variant_name: results}), f, indent=2)
+    return path
+
+def load_run(path):
+    """Load a run from a JSON file, or merge every *_benchmark.json in a directory."""
+    path = Path(path)
+    files = sorted(path.glob("*_benchmark.json")) if path.is_dir() else [path]
+    if not files:
+        raise FileNotFoundError(f"No benchmark results found in {path}")
+
+    run = {'schema': SCHEMA_VERSION, 'environment': None, 'variants': {}}
+    for file in files:
+        with open(file) as f:
+            data = json.load(f)
+        if data.get('schema') != SCHEMA_VERSION:
+            raise ValueError(f"{file}: unsupported schema {data.get('schema')}")
+        run['environment'] = run['environment'] or data['environment']
+        run['variants'].update(data['variants'])
+    return run
+
+def _average_ranks(values):
+    order = np.argsort(values, kind='mergesort')
+    _, inverse, counts = np.unique(values[order], return_inverse=True, return_counts=True)
+    ends = np.cumsum(counts)
+    average = (ends - counts + 1 + ends) / 2
+    ranks = np.empty(len(values))
+    ranks[order] = average[inverse]
+    return ranks, counts
+
+def mann_whitney_greater(baseline, current):
+    """One-sided Mann-Whitney U test that current is stochastically greater.
+
+    Uses the normal approximation with tie and continuity corrections.
+    Returns (U, p_value).
+    """
+    baseline = np.asarray(baseline, dtype=np.float64)
+    current = np.asarray(current, dtype=np.float64)
+    n_a, n_b = len(baseline), len(current)
+    if n_a == 0 or n_b == 0:
+        return float('nan'), 1.0
+
+    ranks, ties = _average_ranks(np.concatenate([baseline, current]))
+    n = n_a + n_b
+    u = ranks[n_a:].sum() - n_b * (n_b + 1) / 2
+    mean = n_a * n_b / 2
+    tie_term = (ties ** 3 - ties).sum() / (n * (n - 1)) if n > 1 else 0.0
+    variance = n_a * n_b / 12 * ((n + 1) - tie_term)
+    if variance <= 0:
+        return float(u), 1.0
+    z = (u - mean - 0.5) / math.sqrt(variance)
+    return float(u), 0.5 * math.erfc(z / math.sqrt(2))
+
+def compare_runs(baseline, current, alpha=0.01, min_change=0.05):
+    """Compare two runs per variant and metric.
+
+    A metric regresses when its median grew by more than min_change
+    (relative) and the Mann-Whitney test rejects "not slower" at alpha.
+    Returns a list of comparison rows.
+    """
+    rows = []
+    for variant, current_record in current['variants'].items():
+        baseline_record = baseline['variants'].get(variant)
+        if baseline_record is None:
+            continue
+        for metric, current_samples in current_record['samples'].items():
+            baseline_samples = baseline_record['samples'].get(metric)
+            if not baseline_samples or not current_samples:
+                continue
+            base_median = float(np.median(baseline_samples))
+            new_median = float(np.median(current_samples))
+            change = new_median / base_median - 1 if base_median > 0 else 0.0
+            _, p_value = mann_whitney_greater(baseline_samples, current_samples)
+            rows.append({
+                'variant': variant,
+                'metric': metric,
+                'baseline_median': base_median,
+                'current_median': new_median,
+                'change': change,
+                'p_value': p_value,
+                'regression': p_value < alpha and change > min_change
+            })
+    return rows
+
+def print_comparison(rows):
+    """Print a comparison table."""
+    table = Table(title="Benchmark Comparison")
+    table.add_column("Variant", style="cyan")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Baseline (ms)", justify="right")
+    table.add_column("Current (ms)", justify="right")
+    table.add_column("Change", justify="right")
+    table.add_column("p-value", justify="right")
+    table.add_column("Status", justify="right")
+
+    for row in rows:
+        status = "[red]REGRESSION[/]" if row['regression'] else "[green]ok[/]"
+        table.add_row(
+            row['variant'], row['metric'],
+            f"{row['baseline_median'] * 1000:.4f}",
+            f"{row['current_median'] * 1000:.4f}",
+            f"{row['change'] * 100:+.1f}%",
+            f"{row['p_value']:.3g}",
+            status
+        )
+    console.print(table)
+
+def main(argv=None):
+    """Compare benchmark results; exit status 1 when a regression is found."""
+    parser = argparse.ArgumentParser(description="Detect performance regressions between benchmark runs")
+    parser.add_argument("baseline", help="Baseline JSON file or results directory")
+    parser.add_argument("current", help="Current JSON file or results directory")
+    parser.add_argument("--alpha", type=float, default=0.01, help="Significance level")
+    parser.add_argument("--min-change", type=float, default=0.05,
+                        help="Minimum relative median slowdown to report")
+    args = parser.parse_args(argv)
+
+    baseline = load_run(args.baseline)
+    current = load_run(args.current)
+    rows = compare_runs(baseline, current, alpha=args.alpha, min_change=args.min_change)
+    print_comparison(rows)
+
+    for label, run in (("Baseline", baseline), ("Current", current)):
+        env = run['environment'] or {}
+        console.print(f"[dim]{label}: commit {env.get('commit')}, Python {env.get('python')}, "
+                      f"NumPy {env.get('numpy')}, {env.get('cpu')}[/]")
+
+    regressions = [row for row in rows if row['regression']]
+    if regressions:
+        console.print(f"[red]{len(regressions)} regression(s) detected[/]")
+        return 1
+    console.print("[green]No regressions detected[/]")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import time
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from utils.latency_sketch import LatencySketch
+from utils.routing_trace import TraceReader, analyze_trace
+from .concurrency import make_router
+
+console = Console()
+
+def trace_arrivals(path):
+    """Return recorded call times as offsets from the first call.
+
+    The offsets plug into loadgen.scale_arrivals/run_open_loop to replay a
+    recorded traffic pattern at any rate.
+    """
+    times = np.fromiter((timestamp for timestamp, _, _ in TraceReader(path).calls()), dtype=np.float64)
+    return times - times[0] if len(times) else times
+
+def replay_trace(path, variant, speed=None, recorder=None, router=None):
+    """Feed every recorded input, in call order, through a router.
+
+    Any variant can replay any trace whose inputs it accepts: text calls
+    are skipped by ImageMoE and image calls by TextMoE. With speed, calls
+    keep their recorded spacing divided by speed; otherwise they run back to
+    back. Decisions of the replaying router go to recorder, if given, so
+    two variants can be compared on identical traffic.
+    """
+    router = router if router is not None else make_router(variant)
+    if recorder is not None:
+        router.recorder = recorder
+    inputs = TraceReader(path).load_inputs()
+    accepts = {'TextMoE': str, 'ImageMoE': np.ndarray}.get(variant, (str, np.ndarray))
+
+    sketch = LatencySketch()
+    stats = {'calls': 0, 'replayed': 0, 'missing': 0, 'skipped': 0}
+    timer = time.perf_counter
+    start = timer()
+    first = None
+    for timestamp, _, digest in TraceReader(path).calls():
+        stats['calls'] += 1
+        data = inputs.get(digest)
+        if data is None:
+            stats['missing'] += 1
+            continue
+        if not isinstance(data, accepts):
+            stats['skipped'] += 1
+            continue
+        if speed:
+            first = timestamp if first is None else first
+            delay = (timestamp - first) / speed - (timer() - start)
+            if delay > 0:
+                time.sleep(delay)
+        call_start = timer()
+        router.process(data)
+        sketch.add(timer() - call_start)
+        stats['replayed'] += 1
+
+    if recorder is not None:
+        recorder.flush()
+    stats.update(variant=variant, elapsed=timer() - start, latency=sketch.quantiles(), mean_latency=sketch.mean)
+    return stats
+
+def print_trace_report(analysis):
+    """Print expert histograms and the windows with the most routing drift."""
+    table = Table(title=f"Routing Trace ({analysis['decisions']} decisions)")
+    table.add_column("Variant", style="cyan")
+    table.add_column("Decisions", justify="right")
+    table.add_column("Expert share", style="green")
+    for name, counts in analysis['experts'].items():
+        total = counts.sum()
+        table.add_row(name, str(total), "  ".join(f"{e}:{c / total:.0%}" for e, c in enumerate(counts) if c))
+    console.print(table)
+
+    drift = Table(title=f"Routing Drift (max {analysis['max_drift']:.3f})")
+    drift.add_column("Window", justify="right", style="cyan")
+    drift.add_column("Decisions", justify="right")
+    drift.add_column("Expert share", style="green")
+    drift.add_column("Drift (TV)", justify="right", style="yellow")
+    for window in sorted(analysis['windows'], key=lambda w: w['drift'], reverse=True)[:10]:
+        drift.add_row(str(window['window']), str(window['decisions']),
+                      "  ".join(f"{share:.0%}" for share in window['expert_share']),
+                      f"{window['drift']:.3f}")
+    console.print(drift)
+
+def run_trace_report(path, window_seconds=60.0):
+    """Analyze a recorded trace without loading it into memory and print the report."""
+    analysis = analyze_trace(path, window_seconds=window_seconds)
+    print_trace_report(analysis)
+    return analysis
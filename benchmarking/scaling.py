@@ -0,0 +1,156 @@
+import string
+import numpy as np
+from pathlib import Path
+from rich.console import Console
+from rich.table import Table
+from .harness import format_ns, measure
+
+console = Console()
+
+# Square image sides (32² .. 8192² pixels) and text lengths (10 .. 10⁷ characters)
+DEFAULT_IMAGE_SIZES = (32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+DEFAULT_TEXT_LENGTHS = tuple(10 ** exponent for exponent in range(1, 8))
+
+def generate_text(length, seed=0):
+    """Generate seeded text of exactly `length` characters."""
+    rng = np.random.default_rng(seed)
+    letters = np.frombuffer(string.ascii_lowercase.encode(), dtype=np.uint8)
+    chars = letters[rng.integers(0, len(letters), size=length)]
+    # Roughly one space every six characters, never at either end
+    spaces = rng.random(length) < 1 / 6
+    spaces[[0, -1]] = False
+    chars[spaces] = ord(' ')
+    return chars.tobytes().decode('ascii')
+
+def generate_image(side, seed=0):
+    """Generate a seeded side x side noise image."""
+    return np.random.default_rng(seed).random((side, side))
+
+def fit_exponent(sizes, times):
+    """Fit time ~ size**k on a log-log scale and return k."""
+    if len(sizes) < 2:
+        return float('nan')
+    slope, _ = np.polyfit(np.log(sizes), np.log(times), 1)
+    return float(slope)
+
+def run_scaling(name, fn, sizes, make_input, count_units, max_call_time=10.0, rounds=3):
+    """Time fn over increasing input sizes and fit its complexity exponent.
+
+    make_input(size) builds the input for one size; count_units(input) gives
+    the work units used for throughput (pixels or tokens). Sizes whose
+    extrapolated single-call time exceeds max_call_time seconds are skipped.
+    """
+    points = []
+    skipped = []
+    for size in sizes:
+        if len(points) >= 2:
+            exponent = fit_exponent([p['size'] for p in points], [p['seconds'] for p in points])
+            last = points[-1]
+            predicted = last['seconds'] * (size / last['size']) ** max(exponent, 1.0)
+            if predicted > max_call_time:
+                skipped.append(size)
+                continue
+
+        sample = make_input(size)
+        units = count_units(sample)
+        stats = measure(fn, [sample], warmup=1, rounds=rounds, min_round_time=0.05, disable_gc=True)
+        seconds = stats['ns_per_op'] / 1e9
+        points.append({
+            'size': size,
+            'units': units,
+            'seconds': seconds,
+            'iqr_seconds': stats['iqr_ns'] / 1e9,
+            'throughput': units / seconds if seconds > 0 else float('inf')
+        })
+        del sample
+
+    exponent = fit_exponent([p['size'] for p in points], [p['seconds'] for p in points])
+    return {'name': name, 'points': points, 'exponent': exponent, 'skipped': skipped}
+
+def plot_scaling(scaling, unit_label, save_path):
+    """Save a log-log time and throughput plot next to the other benchmark plots."""
+    import matplotlib.pyplot as plt
+
+    sizes = [p['size'] for p in scaling['points']]
+    times = [p['seconds'] * 1000 for p in scaling['points']]
+    throughput = [p['throughput'] for p in scaling['points']]
+
+    fig, (ax_time, ax_rate) = plt.subplots(1, 2, figsize=(14, 6))
+    ax_time.loglog(sizes, times, 'o-')
+    ax_time.set_title(f"Scaling - {scaling['name']} (exponent {scaling['exponent']:.2f})")
+    ax_time.set_xlabel(f'Input size ({unit_label})')
+    ax_time.set_ylabel('Time per call (ms)')
+    ax_time.grid(True, which='both', alpha=0.3)
+
+    ax_rate.loglog(sizes, throughput, 'o-', color='tab:green')
+    ax_rate.set_title(f"Throughput - {scaling['name']}")
+    ax_rate.set_xlabel(f'Input size ({unit_label})')
+    ax_rate.set_ylabel('Units per second')
+    ax_rate.grid(True, which='both', alpha=0.3)
+
+    file_name = scaling['name'].lower().replace(' ', '_').replace('(', '').replace(')', '')
+    fig.savefig(Path(save_path) / f"{file_name}_scaling.png")
+    plt.close(fig)
+
+def _count_tokens(text):
+    return len(text.split())
+
+def _count_pixels(image):
+    return image.size
+
+def _image_from_pixels(pixels):
+    return generate_image(int(round(pixels ** 0.5)))
+
+def run_scaling_suite(image_sizes=DEFAULT_IMAGE_SIZES, text_lengths=DEFAULT_TEXT_LENGTHS,
+                      save_path="results/benchmarks", max_call_time=10.0, plot=True):
+    """Sweep input sizes for ImageMoE, TextMoE and SwitchedMoE.
+
+    Returns a list of scaling results; prints a table with the fitted
+    exponents and throughput, and saves log-log plots to save_path.
+    """
+    from image_processing.image_moe import ImageMoE
+    from moe_variants.switched_moe import SwitchedMoE
+    from text_processing.text_moe import TextMoE
+
+    Path(save_path).mkdir(parents=True, exist_ok=True)
+    switched = SwitchedMoE(num_experts=3)
+    pixels = [side * side for side in image_sizes]
+    image_args = (pixels, _image_from_pixels, _count_pixels)
+    text_args = (list(text_lengths), generate_text, _count_tokens)
+    runs = [
+        ("ImageMoE", ImageMoE(num_experts=4).process, image_args, "pixels", "pixels/s"),
+        ("TextMoE", TextMoE(num_experts=3).process, text_args, "characters", "tokens/s"),
+        ("SwitchedMoE (image)", switched.process, image_args, "pixels", "pixels/s"),
+        ("SwitchedMoE (text)", switched.process, text_args, "characters", "tokens/s")
+    ]
+
+    table = Table(title="Scaling Benchmarks")
+    table.add_column("Variant", style="cyan")
+    table.add_column("Sizes", justify="right")
+    table.add_column("Exponent", justify="right", style="yellow")
+    table.add_column("Largest input time", justify="right", style="green")
+    table.add_column("Peak throughput", justify="right", style="green")
+    table.add_column("Skipped sizes", justify="right", style="dim")
+
+    results = []
+    for name, fn, (sizes, make_input, count_units), unit_label, rate_label in runs:
+        console.print(f"[yellow]Scaling {name}...[/]")
+        scaling = run_scaling(name, fn, sizes, make_input, count_units, max_call_time=max_call_time)
+        scaling['unit'] = unit_label
+        scaling['rate_unit'] = rate_label
+        results.append(scaling)
+        if plot and scaling['points']:
+            plot_scaling(scaling, unit_label, save_path)
+
+        points = scaling['points']
+        table.add_row(
+            name,
+            f"{points[0]['size']:,}..{points[-1]['size']:,}" if points else "-",
+            f"{scaling['exponent']:.2f}",
+            format_ns(points[-1]['seconds'] * 1e9) if points else "-",
+            f"{max(p['throughput'] for p in points):,.0f} {rate_label}" if points else "-",
+            ", ".join(f"{size:,}" for size in scaling['skipped']) or "-"
+        )
+
+    console.print(table)
+    return results
@@ -0,0 +1,143 @@
+import json
+import time
+import asyncio
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from utils.latency_sketch import DEFAULT_QUANTILES, LatencySketch, format_quantile_label
+from utils.routing_service import RoutingHTTPServer, RoutingService
+from .loadgen import LOAD_VARIANTS, default_text_fraction, make_load_router, make_payloads
+
+console = Console()
+
+def encode_payload(payload):
+    """JSON request body for a text or image payload."""
+    if isinstance(payload, str):
+        return json.dumps({'text': payload}).encode()
+    return json.dumps({'image': np.asarray(payload).tolist()}).encode()
+
+async def _post(reader, writer, host, body):
+    writer.write((f"POST /route HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode() + body)
+    await writer.drain()
+    status = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status.split(b' ', 2)[1] == b'200'
+
+async def run_http_load(host, port, bodies, total_requests, connections=32):
+    """Closed-loop load over keep-alive connections to a RoutingHTTPServer.
+
+    Each connection sends its next request as soon as the previous answer
+    arrives, so connections is the number of requests in flight.
+    """
+    latency = LatencySketch()
+    counter = iter(range(total_requests))
+    failures = 0
+
+    async def client():
+        nonlocal failures
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in counter:
+                begin = time.perf_counter()
+                ok = await _post(reader, writer, host, bodies[i % len(bodies)])
+                latency.add(time.perf_counter() - begin)
+                failures += not ok
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': total_requests,
+        'failures': failures,
+        'elapsed': elapsed,
+        'throughput': total_requests / elapsed if elapsed > 0 else 0.0,
+        'latency': latency.quantiles(),
+        'mean_latency': latency.mean
+    }
+
+async def _serve_and_load(variant_name, max_batch_size, max_wait, total_requests, connections, bodies):
+    service = RoutingService(make_load_router(variant_name), max_batch_size=max_batch_size, max_wait=max_wait)
+    server = await RoutingHTTPServer(service, port=0).start()
+    try:
+        client = await run_http_load(server.host, server.port, bodies, total_requests, connections)
+    finally:
+        await server.stop()
+    return {'variant': variant_name, 'max_batch_size': max_batch_size, 'max_wait': max_wait,
+            'connections': connections, 'client': client, 'server': service.stats()}
+
+def run_serving_benchmark(variant_name='SwitchedMoE', batch_sizes=(1, 8, 32), max_wait=0.002,
+                          total_requests=2000, connections=32, text_fraction=None, seed=0, pool_size=64,
+                          **payload_kwargs):
+    """Load-test an in-process routing server once per max batch size.
+
+    Client and server share one event loop on localhost, so no external
+    services are involved; max batch size 1 is the unbatched baseline.
+    """
+    if text_fraction is None:
+        text_fraction = default_text_fraction(variant_name)
+    bodies = [encode_payload(p) for p in make_payloads(pool_size, text_fraction, seed=seed, **payload_kwargs)]
+    return [asyncio.run(_serve_and_load(variant_name, size, max_wait, total_requests, connections, bodies))
+            for size in batch_sizes]
+
+def print_serving_report(results):
+    table = Table(title="Micro-batched Routing Service")
+    table.add_column("Variant", style="cyan")
+    table.add_column("Max batch", justify="right")
+    table.add_column("Req/s", justify="right", style="green")
+    for q in DEFAULT_QUANTILES[:3]:
+        table.add_column(f"{format_quantile_label(q)} (ms)", justify="right", style="magenta")
+    table.add_column("Mean batch", justify="right")
+    table.add_column("p99 batch", justify="right")
+    table.add_column("Wait p50/p99 (ms)", justify="right")
+    table.add_column("Failures", justify="right", style="red")
+
+    for r in results:
+        client, server = r['client'], r['server']
+        wait = server['queue_wait']
+        table.add_row(
+            r['variant'],
+            str(r['max_batch_size']),
+            f"{client['throughput']:.0f}",
+            *(f"{client['latency'][q] * 1000:.3f}" for q in DEFAULT_QUANTILES[:3]),
+            f"{server['mean_batch']:.1f}",
+            f"{server['p99_batch']:.0f}",
+            f"{wait[0.5] * 1000:.3f} / {wait[0.99] * 1000:.3f}",
+            str(client['failures'] + server['errors'])
+        )
+    console.print(table)
+
+    for r in results:
+        sizes = ", ".join(f"{size}: {count}" for size, count in r['server']['batch_sizes'].items())
+        console.print(f"[bold]{r['variant']} max batch {r['max_batch_size']}[/] batch sizes: {sizes}")
+
+def main(argv=None):
+    """Serve a variant over local HTTP and load-test it at several max batch sizes."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load-test the micro-batching routing service")
+    parser.add_argument("--variant", choices=LOAD_VARIANTS, default='SwitchedMoE')
+    parser.add_argument("--batch-sizes", type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--connections", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    results = run_serving_benchmark(args.variant, args.batch_sizes, args.max_wait_ms / 1000,
+                                    args.requests, args.connections)
+    print_serving_report(results)
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import sys
+import argparse
+import subprocess
+import numpy as np
+from pathlib import Path
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+PROJECT_PACKAGES = ('benchmarking', 'image_processing', 'moe_variants', 'text_processing', 'utils', 'main')
+
+# Modules a routing worker imports; they must load with NumPy alone
+ROUTING_MODULES = ('moe_variants.switched_moe', 'text_processing.text_moe', 'image_processing.image_moe')
+# Dependencies that must only load on first use
+HEAVY_MODULES = ('matplotlib', 'rich', 'utils.tutorial', 'utils.visualizer')
+# Cold-import budgets in milliseconds, cumulative including NumPy
+DEFAULT_BUDGETS_MS = {
+    'moe_variants.switched_moe': 250,
+    'text_processing.text_moe': 250,
+    'image_processing.image_moe': 250,
+    'benchmarking': 250,
+    'main': 400
+}
+
+def parse_importtime(output):
+    """Parse `python -X importtime` output into (name, self_us, cumulative_us, depth) rows."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def _is_heavy(name):
+    return any(name == heavy or name.startswith(heavy + ".") for heavy in HEAVY_MODULES)
+
+def measure_import(module, runs=5, python=sys.executable):
+    """Cold-import module in fresh interpreters and return its import profile.
+
+    The cumulative time is the median over runs. Also returns the heavy
+    modules the import pulled in and its most expensive dependencies.
+    """
+    totals = []
+    rows = []
+    for _ in range(runs):
+        completed = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"],
+                                   capture_output=True, text=True, cwd=PROJECT_ROOT)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{completed.stderr.strip()}")
+        rows = parse_importtime(completed.stderr)
+        totals.append(sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000)
+
+    # Rank external top-level packages, which is where startup time goes
+    external = sorted(((name, cumulative / 1000) for name, _, cumulative, _ in rows
+                       if '.' not in name and name not in PROJECT_PACKAGES),
+                      key=lambda item: item[1], reverse=True)
+    return {
+        'module': module,
+        'cumulative_ms': float(np.median(totals)),
+        'heavy_imports': sorted({name for name, _, _, _ in rows if _is_heavy(name)}),
+        'slowest': external[:5]
+    }
+
+def check_startup(budgets=None, runs=5):
+    """Measure every budgeted module and flag budget or lazy-import violations."""
+    budgets = budgets or DEFAULT_BUDGETS_MS
+    results = []
+    for module, budget_ms in budgets.items():
+        result = measure_import(module, runs=runs)
+        result['budget_ms'] = budget_ms
+        heavy_forbidden = module in ROUTING_MODULES or module == 'benchmarking'
+        result['ok'] = (result['cumulative_ms'] <= budget_ms
+                        and not (heavy_forbidden and result['heavy_imports']))
+        results.append(result)
+    return results
+
+def print_startup_report(results):
+    """Print import times against their budgets."""
+    table = Table(title="Startup Import Time")
+    table.add_column("Module", style="cyan")
+    table.add_column("Import (ms)", justify="right", style="green")
+    table.add_column("Budget (ms)", justify="right")
+    table.add_column("Heavy imports", style="yellow")
+    table.add_column("Slowest packages", style="dim")
+    table.add_column("Status", justify="right")
+
+    for result in results:
+        table.add_row(
+            result['module'],
+            f"{result['cumulative_ms']:.1f}",
+            f"{result['budget_ms']:.0f}",
+            ", ".join(name for name in result['heavy_imports'] if '.' not in name) or "-",
+            ", ".join(f"{name} {ms:.0f}ms" for name, ms in result['slowest'][:3]),
+            "[green]ok[/]" if result['ok'] else "[red]OVER[/]"
+        )
+    console.print(table)
+
+def main(argv=None):
+    """Check cold-start import budgets; exit status 1 on a violation."""
+    parser = argparse.ArgumentParser(description="Measure cold-start import time against budgets")
+    parser.add_argument("modules", nargs="*", help="Modules to check (default: all budgeted modules)")
+    parser.add_argument("--budget", type=float, default=None, help="Budget in ms for the given modules")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    args = parser.parse_args(argv)
+
+    budgets = DEFAULT_BUDGETS_MS
+    if args.modules:
+        budgets = {module: args.budget or DEFAULT_BUDGETS_MS.get(module, 250) for module in args.modules}
+    results = check_startup(budgets, runs=args.runs)
+    print_startup_report(results)
+    return 0 if all(result['ok'] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import os
+import json
+import string
+import hashlib
+import numpy as np
+from pathlib import Path
+
+# Bump when generation changes so stale cache files are not reused
+WORKLOAD_VERSION = 1
+DEFAULT_CACHE_DIR = "results/workloads"
+
+IMAGE_KINDS = ('gradient', 'checkerboard', 'texture', 'document')
+# Tokens per document and image kinds behind each benchmark complexity
+TEXT_TIERS = {'simple': 8, 'medium': 64, 'complex': 512}
+IMAGE_TIERS = {'simple': ('gradient',), 'medium': ('checkerboard', 'document'), 'complex': ('texture',)}
+
+def zipf_probabilities(n, exponent):
+    """Probabilities of ranks 1..n under a Zipf law with the given exponent."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+def build_vocabulary(size, seed=0, length_exponent=1.0, max_length=20):
+    """Random lowercase words whose lengths follow a Zipf law over 1..max_length.
+
+    Lengths are drawn from ranks 1..max_length, so short words dominate and
+    long words form a heavy tail.
+    """
+    rng = np.random.default_rng(seed)
+    lengths = rng.choice(np.arange(1, max_length + 1), size=size,
+                         p=zipf_probabilities(max_length, length_exponent))
+    letters = np.frombuffer(string.ascii_lowercase.encode(), dtype=np.uint8)
+    chars = letters[rng.integers(0, len(letters), size=int(lengths.sum()))]
+    ends = np.cumsum(lengths)
+    text = chars.tobytes().decode('ascii')
+    return [text[end - length:end] for end, length in zip(ends, lengths)]
+
+def generate_corpus(num_docs, tokens_per_doc, seed=0, vocab_size=5000, length_exponent=1.0,
+                    frequency_exponent=1.1):
+    """Generate seeded documents of space-separated words.
+
+    Word frequencies follow a Zipf law over vocabulary rank, word lengths a
+    Zipf law over length (see build_vocabulary). Document lengths are
+    Poisson around tokens_per_doc.
+    """
+    # Corpora with the same seed share a vocabulary but not their documents
+    rng = np.random.default_rng([seed, tokens_per_doc, num_docs])
+    vocabulary = np.array(build_vocabulary(vocab_size, seed=seed, length_exponent=length_exponent))
+    frequencies = zipf_probabilities(vocab_size, frequency_exponent)
+    doc_tokens = np.maximum(rng.poisson(tokens_per_doc, size=num_docs), 1)
+    words = vocabulary[rng.choice(vocab_size, size=int(doc_tokens.sum()), p=frequencies)]
+    ends = np.cumsum(doc_tokens)
+    return [' '.join(words[end - count:end]) for end, count in zip(ends, doc_tokens)]
+
+def _normalize(image):
+    low, high = image.min(), image.max()
+    return (image - low) / (high - low) if high > low else np.zeros_like(image)
+
+def generate_image(kind, side, rng):
+    """Generate one side x side image of the given kind with values in [0, 1]."""
+    if kind == 'gradient':
+        angle = rng.uniform(0, 2 * np.pi)
+        y, x = np.mgrid[0:side, 0:side] / max(side - 1, 1)
+        return _normalize(np.cos(angle) * x + np.sin(angle) * y)
+    if kind == 'checkerboard':
+        cell = int(rng.integers(2, max(side // 4, 3)))
+        y, x = np.indices((side, side))
+        return ((x // cell + y // cell) % 2).astype(np.float64)
+    if kind == 'texture':
+        # 1/f ("pink") noise: natural images have roughly this power spectrum
+        frequency = np.hypot(*np.meshgrid(np.fft.fftfreq(side), np.fft.fftfreq(side), indexing='ij'))
+        frequency[0, 0] = 1.0
+        spectrum = (rng.standard_normal((side, side)) + 1j * rng.standard_normal((side, side))) / frequency
+        return _normalize(np.fft.ifft2(spectrum).real)
+    if kind == 'document':
+        # Dark text lines of word-sized blocks on a light page
+        page = np.full((side, side), 0.95)
+        line_height = max(side // 16, 2)
+        margin = max(side // 16, 1)
+        for top in range(margin, side - margin - line_height, 2 * line_height):
+            x = margin
+            while x < side - margin:
+                width = int(rng.integers(2, max(side // 8, 3)))
+                page[top:top + line_height, x:min(x + width, side - margin)] = rng.uniform(0.0, 0.3)
+                x += width + max(line_height // 2, 1)
+        return page
+    raise ValueError(f"Unknown image kind: {kind}")
+
+def generate_images(count, side, kinds=IMAGE_KINDS, seed=0):
+    """Generate a seeded (count, side, side) stack, cycling through kinds."""
+    rng = np.random.default_rng(seed)
+    images = np.empty((count, side, side), dtype=np.float64)
+    for i in range(count):
+        images[i] = generate_image(kinds[i % len(kinds)], side, rng)
+    return images
+
+def _cache_key(kind, params):
+    blob = json.dumps({'kind': kind, 'version': WORKLOAD_VERSION, **params}, sort_keys=True)
+    return f"{kind}_{hashlib.sha1(blob.encode()).hexdigest()[:12]}"
+
+def _save_npy(path, array):
+    """Write an .npy file atomically so concurrent runs never read a partial file."""
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+class Corpus:
+    """Read-only sequence of documents stored as one memory-mapped byte buffer.
+
+    Documents are decoded on access, so opening a large cached corpus costs
+    no more than mapping its two files.
+    """
+
+    def __init__(self, data, offsets):
+        self._data = data
+        self._offsets = offsets
+
+    @classmethod
+    def from_texts(cls, texts):
+        encoded = [text.encode('ascii') for text in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(chunk) for chunk in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("corpus index out of range")
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._data[start:end].tobytes().decode('ascii')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+def load_corpus(num_docs, tokens_per_doc, seed=0, cache_dir=DEFAULT_CACHE_DIR, **corpus_kwargs):
+    """Return a cached corpus, generating and saving it on first use."""
+    params = {'num_docs': num_docs, 'tokens_per_doc': tokens_per_doc, 'seed': seed, **corpus_kwargs}
+    base = Path(cache_dir) / _cache_key('corpus', params)
+    data_path = base.with_name(base.name + "_data.npy")
+    offsets_path = base.with_name(base.name + "_offsets.npy")
+    if not (data_path.exists() and offsets_path.exists()):
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        corpus = Corpus.from_texts(generate_corpus(num_docs, tokens_per_doc, seed=seed, **corpus_kwargs))
+        _save_npy(data_path, corpus._data)
+        _save_npy(offsets_path, corpus._offsets)
+    return Corpus(np.load(data_path, mmap_mode='r'), np.load(offsets_path, mmap_mode='r'))
+
+def load_images(count, side, kinds=IMAGE_KINDS, seed=0, cache_dir=DEFAULT_CACHE_DIR):
+    """Return a cached, memory-mapped image stack, generating it on first use."""
+    params = {'count': count, 'side': side, 'kinds': list(kinds), 'seed': seed}
+    path = Path(cache_dir) / f"{_cache_key('images', params)}.npy"
+    if not path.exists():
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        _save_npy(path, generate_images(count, side, kinds, seed=seed))
+    return np.load(path, mmap_mode='r')
+
+class Workload:
+    """Seeded benchmark inputs per complexity tier, backed by the on-disk cache.
+
+    Text tiers differ in document length and image tiers in image kind (see
+    TEXT_TIERS and IMAGE_TIERS). The same parameters always yield the same
+    inputs, so every variant and every run sees identical data.
+    """
+
+    def __init__(self, seed=0, cache_dir=DEFAULT_CACHE_DIR, docs_per_tier=64, images_per_tier=64,
+                 image_side=32, **corpus_kwargs):
+        self.seed = seed
+        self.cache_dir = cache_dir
+        self.docs_per_tier = docs_per_tier
+        self.images_per_tier = images_per_tier
+        self.image_side = image_side
+        self.corpus_kwargs = corpus_kwargs
+        self._texts = {}
+        self._images = {}
+
+    def texts(self, complexity):
+        if complexity not in self._texts:
+            self._texts[complexity] = load_corpus(self.docs_per_tier, TEXT_TIERS[complexity], seed=self.seed,
+                                                  cache_dir=self.cache_dir, **self.corpus_kwargs)
+        return self._texts[complexity]
+
+    def images(self, complexity):
+        if complexity not in self._images:
+            self._images[complexity] = load_images(self.images_per_tier, self.image_side,
+                                                   IMAGE_TIERS[complexity], seed=self.seed,
+                                                   cache_dir=self.cache_dir)
+        return self._images[complexity]
+
+    def samples(self, input_type, complexity, count):
+        """Return the first count inputs of a tier, cycling if it is smaller."""
+        if input_type == 'text':
+            pool = self.texts(complexity)
+            return [pool[i % len(pool)] for i in range(count)]
+        pool = self.images(complexity)
+        # Plain ndarray views of the mapped stack: no copy, no memmap subclass
+        return [np.asarray(pool[i % len(pool)]) for i in range(count)]
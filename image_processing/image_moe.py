@@ -1,13 +1,22 @@
 import numpy as np
 import time
-from rich.console import Console
 from utils.dashboard import ComplexityDashboard
+from utils.tracing import span
 
 class ImageMoE:
-    def __init__(self, num_experts=4):
+    def __init__(self, num_experts=4, dashboard=None, recorder=None):
         self.num_experts = num_experts
-        self.console = Console()
-        self.dashboard = ComplexityDashboard()
+        self._console = None
+        self.dashboard = dashboard if dashboard is not None else ComplexityDashboard()
+        self.recorder = recorder  # Optional utils.routing_trace.TraceRecorder
+
+    @property
+    def console(self):
+        """Rich console, created on first use so routing never imports rich."""
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return self._console
 
     def _compute_complexity(self, region):
         """Compute region complexity score."""
@@ -60,30 +69,46 @@ class ImageMoE:
         if image.ndim != 2:
             raise ValueError("Input must be a 2D grayscale image")
 
-        start_time = time.perf_counter()
-        height, width = image.shape
-        results = []
-
-        # Process image in 8x8 regions
-        for i in range(0, height, 8):
-            for j in range(0, width, 8):
-                region = image[i:min(i+8, height), j:min(j+8, width)]
-                features = self._get_region_features(region)
-                expert_weights = self._get_expert_weights(features)
-                chosen_expert = np.argmax(expert_weights)
-                self.dashboard.update_metrics('expert_assignment', chosen_expert)
-
-                results.append({
-                    'region': (i, j),
-                    'expert': chosen_expert,
-                    'features': features,
-                    'confidence': expert_weights[chosen_expert]
-                })
-
-        processing_time = time.perf_counter() - start_time
-        self.dashboard.update_metrics('processing_time', processing_time)
-
-        return self._format_results(results)
+        with span("image.process"):
+            start_time = time.perf_counter()
+            height, width = image.shape
+
+            # Extract all region features first so each stage can be timed on its own
+            with span("image.features"):
+                regions = []
+                for i in range(0, height, 8):
+                    for j in range(0, width, 8):
+                        region = image[i:min(i+8, height), j:min(j+8, width)]
+                        regions.append(((i, j), self._get_region_features(region)))
+
+            results = []
+            assignments = []
+            with span("image.route", regions=len(regions)):
+                for position, features in regions:
+                    expert_weights = self._get_expert_weights(features)
+                    chosen_expert = np.argmax(expert_weights)
+                    assignments.append(chosen_expert)
+
+                    results.append({
+                        'region': position,
+                        'expert': chosen_expert,
+                        'features': features,
+                        'confidence': expert_weights[chosen_expert]
+                    })
+
+            with span("image.dashboard"):
+                self.dashboard.update_many('expert_assignment', assignments)
+                processing_time = time.perf_counter() - start_time
+                self.dashboard.update_metrics('processing_time', processing_time)
+
+            if self.recorder is not None:
+                # Region std is the routing feature, so it is recorded as the complexity
+                self.recorder.record('ImageMoE', image, assignments,
+                                     [result['features']['std'] for result in results],
+                                     [result['confidence'] for result in results])
+
+            with span("image.format"):
+                return self._format_results(results)
 
     def _format_results(self, results):
         """Format results for display with enhanced descriptions."""
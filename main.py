@@ -1,15 +1,7 @@
 #!/usr/bin/env python3
 from rich.console import Console
-from rich.panel import Panel
-from rich.prompt import Prompt
 import numpy as np
-from text_processing.text_moe import TextMoE
-from image_processing.image_moe import ImageMoE
-from moe_variants.switched_moe import SwitchedMoE
 from utils.visualizer import print_banner, print_separator
-from utils.tutorial import run_tutorial
-from utils.dashboard import launch_dashboard
-from benchmarking import run_benchmark, generate_report
 
 console = Console()
 
@@ -20,26 +12,16 @@ def main():
 
 def run_benchmarks():
     print_separator("MoE Benchmarking Suite")
+    from benchmarking.cli import VARIANTS, plot_saved_results, run_variants
 
-    # Initialize variants
-    variants = {
-        'TextMoE': TextMoE(num_experts=3),
-        'ImageMoE': ImageMoE(num_experts=4),
-        'SwitchedMoE': SwitchedMoE(num_experts=3)
-    }
-
-    # Run benchmarks for each variant
-    for name, variant in variants.items():
-        console.print(f"\n[bold cyan]Benchmarking {name}...[/]")
-        input_type = 'image' if name == 'ImageMoE' else 'text'
-        try:
-            results = run_benchmark(variant, input_type=input_type)
-            generate_report(results, name)
-        except Exception as e:
-            console.print(f"[red]Error benchmarking {name}:[/] {str(e)}")
+    save_path = "results/benchmarks"
+    paths = run_variants(VARIANTS, save_path)
+    # Figures are rendered once, after every variant has finished timing
+    plot_saved_results(save_path, list(paths))
 
 def demo_switched_moe():
     print_separator("Switched MoE Demo")
+    from moe_variants.switched_moe import SwitchedMoE
 
     # Initialize Switched MoE with adjusted complexity threshold
     switched_moe = SwitchedMoE(num_experts=3, complexity_threshold=0.6)
@@ -65,25 +47,26 @@ def demo_switched_moe():
     # Process each input and show detailed results
     for text in text_inputs:
         try:
-            result = switched_moe.process(text)
+            # One routing pass yields the decision and its complexity breakdown
+            decision = switched_moe.explain(text)
+            result = switched_moe.format_decision(decision)
             metrics = switched_moe.get_metrics()
-            complexity = switched_moe._compute_complexity(text)
+            complexity = decision['complexity_score']
 
             complexities.append(complexity)
-            expert_assignments.append(switched_moe.route(text))
+            expert_assignments.append(decision['expert_id'])
 
             # Display input and results with rich formatting
             console.print(f"\nInput: [cyan]{text}[/]")
             console.print(f"[green]{result}[/]")
 
             # Show complexity breakdown
-            special_chars = sum(not c.isalnum() and not c.isspace() for c in text) / len(text)
-            unique_ratio = len(set(text.lower())) / len(text)
-
+            terms = decision['breakdown']['terms']
             console.print("[dim]Complexity Breakdown:[/]")
-            console.print(f"[dim]- Length Factor: {len(text)/100 * 0.3:.2f}[/]")
-            console.print(f"[dim]- Character Variety: {unique_ratio * 0.3:.2f}[/]")
-            console.print(f"[dim]- Special Characters: {special_chars * 0.2:.2f}[/]")
+            console.print(f"[dim]- Length Factor: {terms['length']:.2f}[/]")
+            console.print(f"[dim]- Character Variety: {terms['variety']:.2f}[/]")
+            console.print(f"[dim]- Special Characters: {terms['special']:.2f}[/]")
+            console.print(f"[dim]- Word Length: {terms['word_length']:.2f}[/]")
 
             # Show threshold reference
             threshold_info = (
@@ -122,6 +105,8 @@ def demo_switched_moe():
 
 def demo_text_moe():
     print_separator("Text MoE Demo")
+    from text_processing.text_moe import TextMoE
+    from utils.text_features import token_features
 
     # Example text data with varied complexity and patterns
     texts = [
@@ -154,13 +139,11 @@ def demo_text_moe():
             complexity = text_moe._compute_complexity(text)
             complexity_scores.append(complexity)
 
-            # Track token assignments
-            tokens = text.split()
-            for token in tokens:
-                expert_weights = text_moe._get_expert_weights(token)
-                expert = np.argmax(expert_weights)
+            # Track the router's token assignments; process() already published them to the dashboard
+            for length in token_features(text)[1].tolist():
+                expert = int(np.argmax(text_moe._weights_for_length(length)))
                 expert_assignments[expert] = expert_assignments.get(expert, 0) + 1
-                token_lengths.append(len(token))
+                token_lengths.append(length)
 
             # Display results
             console.print("[green]Expert assignments:[/]")
@@ -217,6 +200,7 @@ def demo_text_moe():
 
 def demo_image_moe():
     print_separator("Image MoE Demo")
+    from image_processing.image_moe import ImageMoE
 
     try:
         # Generate diverse test images
@@ -1,4 +1,7 @@
 from .base_moe import BaseMoE
 from .switched_moe import SwitchedMoE
+from .multimodal_moe import MultimodalMoE
+from .calibration import ThresholdCalibrator
+from .approximation import SampledComplexity
 
-__all__ = ['BaseMoE', 'SwitchedMoE']
+__all__ = ['BaseMoE', 'SwitchedMoE', 'MultimodalMoE', 'ThresholdCalibrator', 'SampledComplexity']
@@ -0,0 +1,210 @@
+import math
+import threading
+import numpy as np
+from statistics import NormalDist
+
+SAMPLING_METHODS = ('random', 'strided')
+
+def _wilson(successes, trials, z):
+    """Wilson score interval for a proportion; sensible even at 0 or all successes."""
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    half = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(center - half, 0.0), min(center + half, 1.0)
+
+class SampledComplexity:
+    """Estimate SwitchedMoE complexity features from a sample of a very large input.
+
+    Inputs with at least min_size elements (characters for text) are
+    sampled instead of scanned. A pilot sample of pilot_size gives the
+    spread of each term. The final sample is large enough that the
+    estimate lies within margin of the exact complexity with the requested
+    confidence (normal approximation). Each estimate has an interval, and
+    SwitchedMoE falls back to the exact computation when that interval
+    crosses a routing boundary. Inputs whose required sample exceeds
+    max_fraction of the input are computed exactly without sampling.
+
+    Sampled routes are not guaranteed to match the exact ones: an interval
+    misses the exact score with probability up to 1 - confidence, and then
+    the route can differ. An image estimate rests on one interval, so at
+    most about 1 - confidence of its sampled routes differ. A text estimate
+    rests on three (special share, word length, distinct characters), so
+    by the union bound up to 3 * (1 - confidence). metrics() reports this
+    bound averaged over the sampled routes.
+
+    method='random' draws uniform positions; 'strided' takes evenly spaced
+    ones, which is deterministic but assumes the input has no period
+    aligned with the stride.
+    """
+
+    def __init__(self, confidence=0.99, margin=0.01, min_size=1 << 20, pilot_size=1024, max_fraction=0.25,
+                 method='random', seed=0):
+        if not 0 < confidence < 1:
+            raise ValueError("confidence must be between 0 and 1")
+        if method not in SAMPLING_METHODS:
+            raise ValueError(f"method must be one of {SAMPLING_METHODS}")
+        self.confidence = confidence
+        self.margin = margin
+        self.min_size = min_size
+        self.pilot_size = pilot_size
+        self.max_fraction = max_fraction
+        self.method = method
+        self._z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self.approximated = 0
+        self.fallbacks = 0
+        self.skipped = 0  # Inputs that needed more than max_fraction sampled
+        self._sampled = 0
+        self._elements = 0
+        self._misroute_bound = 0.0  # Summed over approximated routes
+
+    def _positions(self, population, size):
+        if self.method == 'strided':
+            step = population / size
+            return (np.arange(size) * step + step / 2).astype(np.int64)
+        with self._lock:  # Generators are not thread-safe
+            return self._rng.integers(0, population, size=size)
+
+    def _sample_size(self, spread, population):
+        """Sample size for the margin at the confidence, or None when sampling would not pay."""
+        size = max(self.pilot_size, int(math.ceil((self._z * spread / self.margin) ** 2)))
+        if size > self.max_fraction * population:
+            with self._lock:
+                self.skipped += 1
+            return None
+        return size
+
+    def _image_sample(self, data, size):
+        """Per-sample contributions of the value terms and of the edge term."""
+        values = data[np.unravel_index(self._positions(data.size, size), data.shape)].astype(np.float64)
+        # np.diff runs along the last axis, so pairs never cross a row
+        columns = data.shape[-1] - 1
+        pairs = self._positions(data.size // data.shape[-1] * columns, size)
+        rows, column = np.divmod(pairs, columns)
+        row_index = np.unravel_index(rows, data.shape[:-1]) if data.ndim > 1 else ()
+        edges = np.abs(data[row_index + (column + 1,)].astype(np.float64) - data[row_index + (column,)])
+        deviations = values - values.mean()
+        return deviations, edges
+
+    def image_estimate(self, data):
+        """Estimated image terms with a confidence half-width, or None to compute exactly."""
+        if data.size < self.min_size or data.ndim == 0 or data.shape[-1] < 2:
+            return None
+        deviations, edges = self._image_sample(data, self.pilot_size)
+        spread = math.sqrt(np.var(0.4 * deviations ** 2 + 0.2 * np.abs(deviations)) + np.var(0.4 * edges))
+        size = self._sample_size(spread, data.size)
+        if size is None:
+            return None
+        if size > self.pilot_size:
+            deviations, edges = self._image_sample(data, size)
+
+        value_terms = 0.4 * deviations ** 2 + 0.2 * np.abs(deviations)
+        spread = math.sqrt(np.var(value_terms) + np.var(0.4 * edges))
+        terms = {
+            'variance': float(np.mean(deviations ** 2)) * 0.4,
+            'edges': float(np.mean(edges)) * 0.4,
+            'local_patterns': float(np.mean(np.abs(deviations))) * 0.2
+        }
+        return {'terms': terms, 'half_width': self._z * spread / math.sqrt(size),
+                'sample_size': size, 'population': data.size, 'misroute_bound': 1 - self.confidence}
+
+    def _text_sample(self, text, size):
+        """Sampled characters plus whether each one starts a word."""
+        positions = self._positions(len(text), size)
+        chars = [text[i] for i in positions]
+        previous = [text[i - 1] if i else ' ' for i in positions]
+        is_space = np.array([c.isspace() for c in chars])
+        special = np.array([not c.isalnum() and not c.isspace() for c in chars])
+        starts = ~is_space & np.array([c.isspace() for c in previous])
+        return chars, special, ~is_space, starts
+
+    def _text_spread(self, special, word_chars, starts):
+        if not starts.any():
+            return None
+        ratio = word_chars.mean() / starts.mean()
+        # Delta method for the ratio estimator of the mean word length
+        linear = 0.2 * special + 0.02 * (word_chars - ratio * starts) / starts.mean()
+        return float(np.std(linear))
+
+    def text_estimate(self, text):
+        """Estimated text features with lower and upper bounds, or None to compute exactly.
+
+        Length is exact. The special-character share and mean word length
+        come from sampled characters. Distinct characters are counted in the
+        sample; unseen ones are bounded by the Good-Turing missing mass
+        (the share of characters seen once).
+        """
+        length = len(text)
+        if length < self.min_size:
+            return None
+        chars, special, word_chars, starts = self._text_sample(text, self.pilot_size)
+        spread = self._text_spread(special, word_chars, starts)
+        if spread is None:
+            return None
+        size = self._sample_size(spread, length)
+        if size is None:
+            return None
+        if size > self.pilot_size:
+            chars, special, word_chars, starts = self._text_sample(text, size)
+            if not starts.any():
+                return None
+
+        z = self._z
+        special_low, special_high = _wilson(int(special.sum()), size, z)
+        word_starts = float(starts.mean())
+        mean_word_length = float(word_chars.mean() / word_starts)
+        word_half = z * float(np.std(word_chars - mean_word_length * starts)) / math.sqrt(size) / word_starts
+        lowered = np.unique([c.lower() for c in chars], return_counts=True)[1]
+        _, missing_high = _wilson(int(np.count_nonzero(lowered == 1)), size, z)
+
+        def features(unique_ratio, special_ratio, word_length):
+            return {
+                'length': length,
+                'unique_ratio': unique_ratio,
+                'special_ratio': special_ratio,
+                'word_count': int(round(length * word_starts)),
+                'mean_word_length': max(word_length, 0.0)
+            }
+
+        seen = len(lowered) / length
+        return {
+            'features': features(seen, float(special.mean()), mean_word_length),
+            'lower': features(seen, special_low, mean_word_length - word_half),
+            'upper': features(min(seen + missing_high, 1.0), special_high, mean_word_length + word_half),
+            'sample_size': size,
+            'population': length,
+            'misroute_bound': min(3 * (1 - self.confidence), 1.0)
+        }
+
+    def record(self, fallback, sample_size=0, population=0, misroute_bound=0.0):
+        """Count one sampled estimate and whether it fell back to the exact computation."""
+        with self._lock:
+            if fallback:
+                self.fallbacks += 1
+            else:
+                self.approximated += 1
+                self._misroute_bound += misroute_bound
+            self._sampled += sample_size
+            self._elements += population
+
+    def metrics(self):
+        """Return how often sampling was used, skipped, or fell back near a boundary.
+
+        misroute_bound is the highest expected share of approximated routes
+        that differ from the exact route.
+        """
+        with self._lock:
+            estimated = self.approximated + self.fallbacks
+            return {
+                'confidence': self.confidence,
+                'margin': self.margin,
+                'method': self.method,
+                'approximated': self.approximated,
+                'fallbacks': self.fallbacks,
+                'skipped': self.skipped,
+                'fallback_rate': self.fallbacks / estimated if estimated else 0.0,
+                'misroute_bound': self._misroute_bound / self.approximated if self.approximated else 0.0,
+                'sample_fraction': self._sampled / self._elements if self._elements else 0.0
+            }
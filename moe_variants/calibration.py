@@ -0,0 +1,147 @@
+import math
+import threading
+import numpy as np
+
+# Weights are renormalized before they can overflow a float64
+_RENORMALIZE_AT = 1e150
+
+class DecayingQuantileSketch:
+    """Quantile sketch over a stream in which older values fade out.
+
+    Values are counted in logarithmic buckets as in LatencySketch, but each
+    new value weighs 2 ** (1 / half_life) times the previous one, so a
+    value's influence halves every half_life observations.
+    """
+
+    def __init__(self, half_life=1000, relative_accuracy=0.01, min_value=1e-4, max_value=1e4):
+        self.half_life = half_life
+        self.min_value = min_value
+        self._growth = 2.0 ** (1.0 / half_life)
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        # Bucket i holds values in (min_value * gamma**(i-1), min_value * gamma**i]
+        self.num_buckets = int(math.ceil(math.log(max_value / min_value) / self._log_gamma)) + 2
+        self.weights = np.zeros(self.num_buckets)
+        self._next_weight = 1.0
+        self.count = 0
+
+    def _index(self, value):
+        if value <= self.min_value:
+            return 0
+        index = int(math.ceil(math.log(value / self.min_value) / self._log_gamma))
+        return min(index, self.num_buckets - 1)
+
+    def upper_edge(self, index):
+        return self.min_value * self._gamma ** index
+
+    def add(self, value):
+        self.weights[self._index(value)] += self._next_weight
+        self._next_weight *= self._growth
+        self.count += 1
+        if self._next_weight > _RENORMALIZE_AT:
+            self.weights /= self._next_weight
+            self._next_weight = 1.0
+
+    @property
+    def total(self):
+        return float(self.weights.sum())
+
+    def fraction_below(self, bound):
+        """Decayed share of values in buckets entirely at or below bound."""
+        index = self._index(bound)
+        if index > 0 and self.upper_edge(index) > bound * (1 + 1e-12):
+            index -= 1  # Bucket straddles the bound; exclude it
+        total = self.total
+        return float(self.weights[:index + 1].sum()) / total if total else math.nan
+
+    def quantile(self, q):
+        """Upper edge of the bucket holding the decayed q-th quantile; NaN when empty."""
+        total = self.total
+        if not total:
+            return math.nan
+        index = int(np.searchsorted(np.cumsum(self.weights), q * total, side='left'))
+        return self.upper_edge(min(index, self.num_buckets - 1))
+
+class ThresholdCalibrator:
+    """Move expert boundaries toward a target load split as traffic changes.
+
+    Routing sends complexity c to expert k when boundaries[k-1] <= c <
+    boundaries[k]. Every observed score feeds a DecayingQuantileSketch.
+    Every update_every observations (after warmup), the calibrator
+    estimates the split that the current boundaries give on recent traffic.
+    If some expert's share misses its target by more than hysteresis, the
+    boundaries move to the matching quantiles. Small drifts never move
+    them, which keeps routing from flapping.
+    """
+
+    def __init__(self, num_experts=3, target_split=None, half_life=1000, hysteresis=0.05, warmup=100,
+                 update_every=50, boundaries=None):
+        if target_split is None:
+            target_split = np.full(num_experts, 1.0 / num_experts)
+        target_split = np.asarray(target_split, dtype=np.float64)
+        if len(target_split) != num_experts or np.any(target_split < 0) or target_split.sum() <= 0:
+            raise ValueError("target_split needs one non-negative share per expert")
+        self.num_experts = num_experts
+        self.target_split = target_split / target_split.sum()
+        self.hysteresis = hysteresis
+        self.warmup = warmup
+        self.update_every = update_every
+        self.boundaries = list(boundaries) if boundaries is not None else None
+        self.sketch = DecayingQuantileSketch(half_life=half_life)
+        self.recalibrations = 0
+        self._load = np.zeros(num_experts)
+        self._load_weight = 1.0
+        self._lock = threading.Lock()
+
+    def observe(self, complexity, expert):
+        """Record one routed score and recalibrate when due."""
+        with self._lock:
+            self.sketch.add(complexity)
+            self._load[expert] += self._load_weight
+            self._load_weight *= self.sketch._growth
+            if self._load_weight > _RENORMALIZE_AT:
+                self._load /= self._load_weight
+                self._load_weight = 1.0
+            count = self.sketch.count
+            if count >= self.warmup and count % self.update_every == 0:
+                self._recalibrate()
+
+    def expected_split(self):
+        """Share of recent traffic each expert receives under the current boundaries."""
+        below = [0.0] + [self.sketch.fraction_below(b) for b in self.boundaries] + [1.0]
+        return np.diff(below)
+
+    def _recalibrate(self, force=False):
+        if self.boundaries is None or self.sketch.count == 0:
+            return False
+        if not force and np.abs(self.expected_split() - self.target_split).max() <= self.hysteresis:
+            return False
+        cumulative = np.cumsum(self.target_split)[:-1]
+        boundaries = [self.sketch.quantile(q) for q in cumulative]
+        # Keep boundaries ordered even where targets are zero or the data has ties
+        self.boundaries = np.maximum.accumulate(boundaries).tolist()
+        self.recalibrations += 1
+        return True
+
+    def recalibrate(self, force=False):
+        """Move the boundaries now if outside the hysteresis band (or if forced)."""
+        with self._lock:
+            return self._recalibrate(force)
+
+    def metrics(self):
+        """Return boundaries, observed and expected load split, and balance figures."""
+        with self._lock:
+            total = self._load.sum()
+            load_share = self._load / total if total else np.zeros(self.num_experts)
+            expected = self.expected_split() if self.sketch.count else np.full(self.num_experts, math.nan)
+        return {
+            'boundaries': list(self.boundaries),
+            'target_split': self.target_split.tolist(),
+            'load_share': load_share.tolist(),
+            'expected_split': expected.tolist(),
+            'imbalance': float(np.abs(load_share - self.target_split).max()) if total else 0.0,
+            # How much busier the hottest expert is than its target; 1.0 is perfectly balanced
+            'hot_expert_ratio': float((load_share / np.maximum(self.target_split, 1e-12)).max()) if total else 0.0,
+            'recalibrations': self.recalibrations,
+            'observations': self.sketch.count
+        }
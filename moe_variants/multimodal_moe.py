@@ -0,0 +1,185 @@
+import time
+import numpy as np
+from utils.latency_sketch import LatencySketch
+from utils.tracing import span
+from .base_moe import BaseMoE
+
+MODALITIES = ('text', 'image')
+PATCH_SIZE = 8
+NUM_FEATURES = 3  # Per-row features before modality blocking
+
+class MultimodalMoE(BaseMoE):
+    """Vision-language MoE routing text tokens and image patches in one batch.
+
+    Each (text, image) pair becomes rows of one feature batch: a row per
+    token and a row per 8x8 patch. All rows share one expert pool. Gating is
+    modality-aware: every modality has its own gate weights and bias, and
+    rows place their features in a modality-specific column block so one
+    matrix product gates the whole batch.
+    """
+
+    def __init__(self, num_experts=6, seed=0, modality_bias=1.0):
+        super().__init__(num_experts, input_dim=len(MODALITIES) * NUM_FEATURES)
+        rng = np.random.default_rng(seed)
+        self.gate_weights = rng.normal(0.0, 1.0, size=(self.input_dim, num_experts))
+        # Prior: text rows lean towards the first half of the pool, image rows the second
+        self.gate_bias = np.zeros((len(MODALITIES), num_experts))
+        half = num_experts // 2
+        self.gate_bias[0, :half] = modality_bias
+        self.gate_bias[1, half:] = modality_bias
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        self._stats = {
+            modality: {
+                'requests': 0,
+                'rows': 0,
+                'expert_load': np.zeros(self.num_experts, dtype=np.int64),
+                'latency': LatencySketch()
+            }
+            for modality in MODALITIES
+        }
+
+    @staticmethod
+    def _as_pairs(inputs):
+        """Accept one (text, image) pair or a sequence of pairs."""
+        if isinstance(inputs, tuple) and len(inputs) == 2 and isinstance(inputs[0], str):
+            inputs = [inputs]
+        pairs = list(inputs)
+        if not pairs:
+            raise ValueError("Input must contain at least one (text, image) pair")
+        for text, image in pairs:
+            if not text or not isinstance(text, str):
+                raise ValueError("Text must be a non-empty string")
+            if not isinstance(image, np.ndarray) or image.ndim != 2 or image.size == 0:
+                raise ValueError("Image must be a non-empty 2D numpy array")
+        return pairs
+
+    @staticmethod
+    def _token_features(text):
+        """Return (tokens, features) with length, character variety and vowel share per token."""
+        cleaned = ''.join(c.lower() for c in text if c.isalnum() or c.isspace())
+        tokens = cleaned.split()
+        features = np.empty((len(tokens), NUM_FEATURES))
+        for row, token in enumerate(tokens):
+            length = len(token)
+            features[row] = (min(length / 10, 2.0), len(set(token)) / length,
+                             sum(c in 'aeiou' for c in token) / length)
+        return tokens, features
+
+    @staticmethod
+    def _patch_features(image):
+        """Return per-patch mean, std and edge strength for all 8x8 patches at once.
+
+        Images whose sides are not multiples of 8 are edge-padded.
+        """
+        height, width = image.shape
+        pad_h, pad_w = -height % PATCH_SIZE, -width % PATCH_SIZE
+        if pad_h or pad_w:
+            image = np.pad(image, ((0, pad_h), (0, pad_w)), mode='edge')
+        rows, cols = image.shape[0] // PATCH_SIZE, image.shape[1] // PATCH_SIZE
+        patches = (image.reshape(rows, PATCH_SIZE, cols, PATCH_SIZE)
+                   .transpose(0, 2, 1, 3)
+                   .reshape(rows * cols, PATCH_SIZE, PATCH_SIZE))
+        edges = np.abs(np.diff(patches, axis=2)).mean(axis=(1, 2))
+        return np.column_stack([patches.mean(axis=(1, 2)), patches.std(axis=(1, 2)), edges])
+
+    def _build_batch(self, pairs):
+        """Stack every token and patch of every pair into one gating batch.
+
+        Returns the blocked feature matrix, per-row modality and pair index,
+        and the feature extraction time per pair and modality.
+        """
+        blocks, modalities, owners = [], [], []
+        timings = np.zeros((len(pairs), len(MODALITIES)))
+        timer = time.perf_counter
+        for index, (text, image) in enumerate(pairs):
+            start = timer()
+            _, text_features = self._token_features(text)
+            middle = timer()
+            image_features = self._patch_features(image)
+            timings[index] = (middle - start, timer() - middle)
+
+            for modality, features in enumerate((text_features, image_features)):
+                blocks.append((modality, features))
+                modalities.append(np.full(len(features), modality, dtype=np.int8))
+                owners.append(np.full(len(features), index, dtype=np.int64))
+
+        modalities = np.concatenate(modalities)
+        batch = np.zeros((len(modalities), self.input_dim))
+        offset = 0
+        for modality, features in blocks:
+            column = modality * NUM_FEATURES
+            batch[offset:offset + len(features), column:column + NUM_FEATURES] = features
+            offset += len(features)
+        return batch, modalities, np.concatenate(owners), timings
+
+    def _gate(self, batch, modalities):
+        """Top-1 gating for the whole batch in one pass; returns (experts, confidence)."""
+        logits = batch @ self.gate_weights + self.gate_bias[modalities]
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        experts = probabilities.argmax(axis=1)
+        return experts, probabilities[np.arange(len(experts)), experts]
+
+    def route(self, inputs):
+        """Return the expert of every row: tokens then patches, pair by pair."""
+        batch, modalities, _, _ = self._build_batch(self._as_pairs(inputs))
+        return self._gate(batch, modalities)[0]
+
+    def process(self, inputs):
+        """Route one or more (text, image) pairs through the shared expert pool."""
+        pairs = self._as_pairs(inputs)
+        with span("multimodal.process"):
+            with span("multimodal.features"):
+                batch, modalities, owners, timings = self._build_batch(pairs)
+
+            start = time.perf_counter()
+            with span("multimodal.gate", rows=len(batch)):
+                experts, confidence = self._gate(batch, modalities)
+            gate_time = time.perf_counter() - start
+
+            # Charge gating time to each pair and modality by its share of rows
+            row_counts = np.zeros((len(pairs), len(MODALITIES)), dtype=np.int64)
+            np.add.at(row_counts, (owners, modalities), 1)
+            latencies = timings + gate_time * row_counts / len(batch)
+            for modality, name in enumerate(MODALITIES):
+                stats = self._stats[name]
+                mask = modalities == modality
+                stats['requests'] += len(pairs)
+                stats['rows'] += int(mask.sum())
+                stats['expert_load'] += np.bincount(experts[mask], minlength=self.num_experts)
+                stats['latency'].add_many(latencies[:, modality])
+
+            with span("multimodal.format"):
+                return self._format_results(pairs, experts, confidence, modalities, owners)
+
+    def _format_results(self, pairs, experts, confidence, modalities, owners):
+        output = []
+        for index in range(len(pairs)):
+            parts = []
+            for modality, (name, unit) in enumerate((('text', 'tokens'), ('image', 'patches'))):
+                mask = (owners == index) & (modalities == modality)
+                counts = np.bincount(experts[mask], minlength=self.num_experts)
+                load = ", ".join(f"{expert}:{count}" for expert, count in enumerate(counts) if count)
+                parts.append(f"{int(mask.sum())} {unit} → experts [{load}]")
+            mean_confidence = confidence[owners == index].mean()
+            output.append(f"Pair {index}: {'; '.join(parts)} [conf: {mean_confidence:.2f}]")
+        return "\n".join(output)
+
+    def get_metrics(self):
+        """Return per-modality expert load and latency across processed pairs."""
+        metrics = {'num_experts': self.num_experts, 'modalities': {}}
+        for name, stats in self._stats.items():
+            load = stats['expert_load']
+            total = load.sum()
+            metrics['modalities'][name] = {
+                'requests': stats['requests'],
+                'rows': stats['rows'],
+                'expert_load': load.tolist(),
+                'load_share': (load / total).tolist() if total else [0.0] * self.num_experts,
+                'latency': stats['latency'].quantiles(),
+                'mean_latency': stats['latency'].mean
+            }
+        return metrics
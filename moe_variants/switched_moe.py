@@ -1,102 +1,276 @@
+import bisect
 import numpy as np
-from rich.console import Console
+from utils.text_features import IncrementalTextFeatures, text_features, text_features_batch
+from utils.tracing import span, traced
 from .base_moe import BaseMoE
 
 class SwitchedMoE(BaseMoE):
-    """Switched Mixture of Experts - routes each input to a single expert."""
+    """Switched Mixture of Experts - routes each input to a single expert.
 
-    def __init__(self, num_experts=3, complexity_threshold=0.5):
+    By default the expert boundaries are fixed at 0.33 and 0.66 times
+    complexity_threshold. With a ThresholdCalibrator they start there and
+    then follow the observed complexity distribution toward the
+    calibrator's target load split. With a SampledComplexity, very large
+    inputs are scored from a sample unless it lands near a boundary; a
+    small share of those routes, bounded by the approximator's confidence,
+    can then differ from the exact route.
+    """
+
+    def __init__(self, num_experts=3, complexity_threshold=0.5, recorder=None, calibrator=None, approximator=None):
         super().__init__(num_experts)
         self.complexity_threshold = complexity_threshold
-        self.console = Console()
+        self.recorder = recorder  # Optional utils.routing_trace.TraceRecorder
+        self.calibrator = calibrator  # Optional moe_variants.calibration.ThresholdCalibrator
+        self.approximator = approximator  # Optional moe_variants.approximation.SampledComplexity
+        if calibrator is not None:
+            if calibrator.num_experts != len(self.fixed_boundaries()) + 1:
+                raise ValueError("Calibrator must balance exactly one share per SwitchedMoE expert")
+            if calibrator.boundaries is None:
+                calibrator.boundaries = self.fixed_boundaries()
+        self._console = None
+
+    @property
+    def console(self):
+        """Rich console, created on first use so routing never imports rich."""
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return self._console
+
+    @traced("switched.complexity")
+    def complexity_breakdown(self, input_data):
+        """Return the complexity score with the weighted terms and input features behind it."""
+        if self.approximator is not None:
+            breakdown = self._approximate_breakdown(input_data)
+            if breakdown is not None:
+                return breakdown
 
-    def _compute_complexity(self, input_data):
-        """Compute input complexity score with improved metrics."""
         if isinstance(input_data, str):
-            # Text complexity: based on length, unique chars ratio, and special characters
-            length = len(input_data)
-            if length == 0:
-                return 0.0
-
-            unique_ratio = len(set(input_data.lower())) / length
-            special_chars = sum(not c.isalnum() and not c.isspace() for c in input_data) / length
-            word_length_avg = sum(len(word) for word in input_data.split()) / len(input_data.split()) if input_data.split() else 0
-
-            complexity = (
-                length / 100 * 0.3 +  # Length factor
-                unique_ratio * 0.3 +   # Character variety
-                special_chars * 0.2 +  # Special character complexity
-                word_length_avg / 10 * 0.2  # Average word length
-            )
-
-            # Ensure very simple inputs go to expert 0
-            if length <= 1 or complexity < 0.2:
-                return 0.1  # This will ensure routing to expert 0
-            return complexity
+            return self._text_breakdown(text_features(input_data))
 
         elif isinstance(input_data, np.ndarray):
             # Image complexity: based on variance, edge density, and local patterns
             if input_data.size == 0:
-                return 0.0
-
-            variance = np.var(input_data)
-            edges = np.mean(np.abs(np.diff(input_data)))
-            local_patterns = np.mean(np.abs(input_data - np.mean(input_data)))
+                return {'complexity': 0.0, 'terms': {}, 'features': {}}
 
-            return (
-                variance * 0.4 +
-                edges * 0.4 +
-                local_patterns * 0.2
-            )
+            terms = {
+                'variance': np.var(input_data) * 0.4,
+                'edges': np.mean(np.abs(np.diff(input_data))) * 0.4,
+                'local_patterns': np.mean(np.abs(input_data - np.mean(input_data))) * 0.2
+            }
+            return {'complexity': sum(terms.values()), 'terms': terms, 'features': {}}
         else:
             raise ValueError("Unsupported input type")
 
+    def _approximate_breakdown(self, input_data):
+        """Sampled breakdown, or None when the input is small or its interval spans a boundary."""
+        if isinstance(input_data, str):
+            estimate = self.approximator.text_estimate(input_data)
+            if estimate is None:
+                return None
+            breakdown = self._text_breakdown(estimate['features'])
+            # Text complexity never decreases as any feature grows, so the bounds map to bounds
+            low = self._text_breakdown(estimate['lower'])['complexity']
+            high = self._text_breakdown(estimate['upper'])['complexity']
+        elif isinstance(input_data, np.ndarray):
+            estimate = self.approximator.image_estimate(input_data)
+            if estimate is None:
+                return None
+            terms = estimate['terms']
+            complexity = sum(terms.values())
+            breakdown = {'complexity': complexity, 'terms': terms, 'features': {}}
+            low, high = complexity - estimate['half_width'], complexity + estimate['half_width']
+        else:
+            return None
+
+        fallback = self._select_expert(low) != self._select_expert(high)
+        self.approximator.record(fallback, estimate['sample_size'], estimate['population'],
+                                 estimate['misroute_bound'])
+        if fallback:
+            return None
+        breakdown['approximation'] = {'low': low, 'high': high, 'sample_size': estimate['sample_size']}
+        return breakdown
+
+    @staticmethod
+    def _text_breakdown(features):
+        """Text complexity from text_features(): based on length, unique chars ratio, and special characters."""
+        length = features['length']
+        if length == 0:
+            return {'complexity': 0.0, 'terms': {}, 'features': features}
+
+        terms = {
+            'length': length / 100 * 0.3,  # Length factor
+            'variety': features['unique_ratio'] * 0.3,  # Character variety
+            'special': features['special_ratio'] * 0.2,  # Special character complexity
+            'word_length': features['mean_word_length'] / 10 * 0.2  # Average word length
+        }
+        complexity = sum(terms.values())
+
+        # Ensure very simple inputs go to expert 0
+        if length <= 1 or complexity < 0.2:
+            complexity = 0.1  # This will ensure routing to expert 0
+        return {'complexity': complexity, 'terms': terms, 'features': features}
+
+    def _compute_complexity(self, input_data):
+        """Compute input complexity score with improved metrics."""
+        return self.complexity_breakdown(input_data)['complexity']
+
+    def fixed_boundaries(self):
+        """Static expert boundaries derived from complexity_threshold."""
+        # Adjusted thresholds for better expert distribution
+        return [self.complexity_threshold * 0.33, self.complexity_threshold * 0.66]
+
+    @property
+    def boundaries(self):
+        """Current expert boundaries: calibrated when adaptive, fixed otherwise."""
+        if self.calibrator is not None:
+            return self.calibrator.boundaries
+        return self.fixed_boundaries()
+
+    def _select_expert(self, complexity):
+        # Expert 0 below the first boundary (simple patterns), the last expert above the last
+        return bisect.bisect_right(self.boundaries, complexity)
+
     def route(self, inputs):
         """Route input to a single expert based on complexity with improved thresholds."""
-        complexity = self._compute_complexity(inputs)
+        return self.explain(inputs)['expert_id']
 
-        # Adjusted thresholds for better expert distribution
-        if complexity < self.complexity_threshold * 0.33:
-            return 0  # Simple patterns expert
-        elif complexity < self.complexity_threshold * 0.66:
-            return 1  # Medium complexity expert
-        else:
-            return 2  # High complexity expert
+    def stream(self, text=""):
+        """Return a StreamingRoute that routes text as it grows, in O(k) per append."""
+        return StreamingRoute(self, text)
 
-    def process(self, inputs):
-        """Process input using the switched routing strategy with detailed metrics."""
-        chosen_expert = self.route(inputs)
-        complexity = self._compute_complexity(inputs)
+    def explain(self, inputs):
+        """Route input and return the decision with its complexity breakdown.
+
+        Every routing entry point (route, process, process_batch) ends in
+        _decide(), so the calibrator and recorder see each decision exactly
+        once. The features are computed once; display code should read the
+        breakdown instead of recomputing them.
+        """
+        with span("switched.route"):
+            breakdown = self.complexity_breakdown(inputs)
+        return self._decide(inputs, breakdown)
+
+    def _decide(self, inputs, breakdown):
+        """Pick the expert for a computed breakdown and report the decision."""
+        complexity = breakdown['complexity']
+        chosen_expert = self._select_expert(complexity)
 
         # Calculate confidence based on distance from threshold boundaries
-        thresholds = [self.complexity_threshold * 0.33, self.complexity_threshold * 0.66]
-        distances = [abs(complexity - t) for t in thresholds]
+        distances = [abs(complexity - t) for t in self.boundaries]
         confidence = 1.0 - min(distances) / self.complexity_threshold
+        if self.calibrator is not None:
+            self.calibrator.observe(complexity, chosen_expert)
+        if self.recorder is not None:
+            self.recorder.record('SwitchedMoE', inputs, chosen_expert, complexity, confidence)
 
-        result = {
+        return {
             'expert_id': chosen_expert,
             'complexity_score': complexity,
-            'confidence': confidence
+            'confidence': confidence,
+            'breakdown': breakdown
         }
 
+    def format_decision(self, decision):
+        """Format a decision from explain() for display."""
         # Enhanced expert descriptions with clearer roles
         expert_desc = {
             0: "simple patterns specialist (basic structures)",
             1: "medium complexity specialist (common patterns)",
             2: "high complexity specialist (advanced patterns)"
         }
-
-        # Format output with more detailed metrics
+        chosen_expert = decision['expert_id']
         return (f"Routed to Expert {chosen_expert} ({expert_desc[chosen_expert]}) "
-                f"[complexity: {complexity:.2f}, conf: {confidence:.2f}]")
+                f"[complexity: {decision['complexity_score']:.2f}, conf: {decision['confidence']:.2f}]")
+
+    def process(self, inputs):
+        """Process input using the switched routing strategy with detailed metrics."""
+        return self.process_with_decision(inputs)[0]
+
+    def process_with_decision(self, inputs):
+        """process() that also returns the decision from explain() behind the output."""
+        with span("switched.process"):
+            decision = self.explain(inputs)
+
+            # Format output with more detailed metrics
+            with span("switched.format"):
+                return self.format_decision(decision), decision
+
+    def process_batch(self, inputs):
+        """process() for a list of inputs, with all text features computed in one pass.
+
+        Returns one entry per input in order: the formatted output, or the
+        exception that input raised, so one bad input fails alone.
+        """
+        with span("switched.process_batch", size=len(inputs)):
+            texts = [item for item in inputs if isinstance(item, str)]
+            if self.approximator is None and len(texts) > 1:
+                with span("switched.complexity"):
+                    features = iter(text_features_batch(texts))
+            else:
+                features = None
+
+            results = []
+            for item in inputs:
+                try:
+                    if features is not None and isinstance(item, str):
+                        breakdown = self._text_breakdown(next(features))
+                    else:
+                        breakdown = self.complexity_breakdown(item)
+                    results.append(self.format_decision(self._decide(item, breakdown)))
+                except Exception as error:
+                    results.append(error)
+            return results
 
     def get_metrics(self):
         """Return current routing metrics for dashboard integration."""
-        return {
+        metrics = {
             'complexity_threshold': self.complexity_threshold,
+            'boundaries': list(self.boundaries),
             'expert_descriptions': {
                 0: "Simple patterns",
                 1: "Medium complexity",
                 2: "High complexity"
             }
-        }
\ No newline at end of file
+        }
+        if self.calibrator is not None:
+            metrics['balance'] = self.calibrator.metrics()
+        if self.approximator is not None:
+            metrics['approximation'] = self.approximator.metrics()
+        return metrics
+
+
+class StreamingRoute:
+    """Routing decision for append-only text, such as a generation in progress.
+
+    Each append() updates running text features in time proportional to
+    the appended text. The complexity and expert always equal
+    SwitchedMoE.route() on the full text, with the router's current
+    boundaries. Streaming updates are not reported to the router's
+    calibrator or recorder; route the finished text with process() for that.
+    """
+
+    def __init__(self, moe, text=""):
+        self.moe = moe
+        self.features = IncrementalTextFeatures(text)
+
+    def append(self, delta):
+        """Append a string delta and return the expert for the whole text so far."""
+        self.features.append(delta)
+        return self.expert
+
+    @property
+    def text(self):
+        return self.features.text
+
+    @property
+    def breakdown(self):
+        return self.moe._text_breakdown(self.features.features())
+
+    @property
+    def complexity(self):
+        return self.breakdown['complexity']
+
+    @property
+    def expert(self):
+        return self.moe._select_expert(self.complexity)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from moe_variants.approximation import SampledComplexity
+from moe_variants.switched_moe import SwitchedMoE
+
+def test_image_estimate_within_half_width():
+    """Sampled image terms land within the reported half-width of the exact score."""
+    rng = np.random.default_rng(0)
+    image = rng.random((400, 500))
+    exact = SwitchedMoE().complexity_breakdown(image)
+    for method in ('random', 'strided'):
+        estimate = SampledComplexity(min_size=1000, method=method).image_estimate(image)
+        complexity = sum(estimate['terms'].values())
+        assert abs(complexity - exact['complexity']) <= estimate['half_width']
+        assert estimate['half_width'] <= 0.01 * 1.5
+        assert estimate['sample_size'] < image.size
+
+def test_small_inputs_stay_exact():
+    """Inputs below min_size are never sampled."""
+    moe = SwitchedMoE(approximator=SampledComplexity())
+    image = np.random.default_rng(1).random((64, 64))
+    assert moe.complexity_breakdown(image) == SwitchedMoE().complexity_breakdown(image)
+    assert moe.get_metrics()['approximation']['approximated'] == 0
+
+def test_boundary_falls_back_to_exact():
+    """Estimates near a boundary fall back to the exact score; sampled routes rarely differ."""
+    rng = np.random.default_rng(2)
+    moe = SwitchedMoE(approximator=SampledComplexity(min_size=1000))
+    misroutes = 0
+    for scale in np.linspace(0.7, 0.9, 20):
+        image = rng.random((300, 300)) * scale
+        decision = moe.explain(image)
+        if 'approximation' not in decision['breakdown']:
+            assert decision['complexity_score'] == SwitchedMoE()._compute_complexity(image)
+            assert decision['expert_id'] == SwitchedMoE().route(image)
+        else:
+            misroutes += decision['expert_id'] != SwitchedMoE().route(image)
+
+    metrics = moe.get_metrics()['approximation']
+    assert metrics['fallbacks'] > 0 and metrics['approximated'] > 0
+    assert metrics['fallback_rate'] == metrics['fallbacks'] / 20
+    assert metrics['misroute_bound'] == pytest.approx(0.01)
+    assert misroutes <= 1
+
+def test_text_estimate_brackets_exact_features():
+    """Sampled text features bracket the exact ones; this text routes like the exact one."""
+    words = np.random.default_rng(3).choice(["moe", "expert", "routing", "gate", "x", "a,b!"], size=40000)
+    text = " ".join(words)
+    estimate = SampledComplexity(min_size=1000).text_estimate(text)
+    exact = SwitchedMoE().complexity_breakdown(text)['features']
+    for name in ('unique_ratio', 'special_ratio', 'mean_word_length'):
+        assert estimate['lower'][name] <= exact[name] <= estimate['upper'][name]
+    assert estimate['features']['length'] == len(text)
+
+    moe = SwitchedMoE(approximator=SampledComplexity(min_size=1000))
+    decision = moe.explain(text)
+    assert decision['expert_id'] == SwitchedMoE().route(text)
+    assert 'approximation' in decision['breakdown']
+    assert moe.get_metrics()['approximation']['misroute_bound'] == pytest.approx(0.03)
+
+def test_rejects_bad_settings():
+    """Invalid confidence or sampling method raises ValueError."""
+    with pytest.raises(ValueError):
+        SampledComplexity(confidence=1.0)
+    with pytest.raises(ValueError):
+        SampledComplexity(method='systematic')
@@ -0,0 +1,154 @@
+import gc
+import numpy as np
+import pytest
+from benchmarking.harness import GCDisabled, format_ns, measure
+from benchmarking.performance_metrics import MoEBenchmark
+from moe_variants.switched_moe import SwitchedMoE
+
+def test_measure_reports_per_op_stats():
+    """Test harness statistics for a cheap call."""
+    stats = measure(len, ["a", "bb", "ccc"], rounds=5, min_round_time=0.001)
+
+    assert stats['rounds'] == 5
+    assert len(stats['round_ns_per_op']) == 5
+    assert stats['inner_loops'] > 1  # Sub-microsecond calls are batched
+    assert stats['ns_per_op'] >= 0
+    assert stats['ops_per_sec'] > 0
+
+    with pytest.raises(ValueError):
+        measure(len, [])
+
+def test_gc_disabled_restores_state():
+    """Test that timing regions restore the collector state."""
+    assert gc.isenabled()
+    with GCDisabled():
+        assert not gc.isenabled()
+    assert gc.isenabled()
+
+class _CountingRouter:
+    def __init__(self):
+        self.routed = 0
+
+    def process(self, sample):
+        return sample
+
+    def route(self, sample):
+        self.routed += 1
+        return len(sample) % 3
+
+def test_benchmark_routes_each_sample_once():
+    """Test that repeated samples reuse their routing decision when caching is enabled."""
+    router = _CountingRouter()
+    benchmark = MoEBenchmark(router, num_iterations=30, cache_routes=True)
+    benchmark.run_full_benchmark('text', warmup=0)
+
+    assert len(benchmark.results['execution_times']) == 30
+    assert sum(benchmark.results['expert_usage'].values()) == 30
+    # Nine distinct words across the three complexity pools
+    assert router.routed <= 9
+
+def test_benchmark_routes_every_call_by_default():
+    """Test that without cache_routes every call is routed, so changing routes are reported."""
+    router = _CountingRouter()
+    benchmark = MoEBenchmark(router, num_iterations=30)
+    benchmark.run_full_benchmark('text', warmup=0)
+
+    assert router.routed == 30
+    assert benchmark._route_cache == {}
+
+def test_route_cache_is_bounded_and_keeps_no_arrays():
+    """Test that cached decisions are keyed by content and evicted least recently used first."""
+    import weakref
+    from benchmarking import performance_metrics
+
+    router = _CountingRouter()
+    benchmark = MoEBenchmark(router)
+    image = np.ones((4, 4))
+    reference = weakref.ref(image)
+    benchmark._route_once(image)
+    benchmark._route_once(np.ones((4, 4)))  # Same content, new object
+    assert router.routed == 1
+    del image
+    assert reference() is None
+
+    for i in range(performance_metrics.ROUTE_CACHE_SIZE + 10):
+        benchmark._route_once(f"sample {i}")
+    assert len(benchmark._route_cache) == performance_metrics.ROUTE_CACHE_SIZE
+
+def test_benchmark_takes_experts_from_decisions():
+    """Test that adaptive routers are observed once per call and report the expert they chose."""
+    from moe_variants.calibration import ThresholdCalibrator
+
+    moe = SwitchedMoE(calibrator=ThresholdCalibrator(warmup=5, update_every=5))
+    benchmark = MoEBenchmark(moe, num_iterations=30)
+    benchmark.run_full_benchmark('text', warmup=0)
+
+    assert moe.calibrator.sketch.count == 30
+    assert sum(benchmark.results['expert_usage'].values()) == 30
+    assert benchmark._route_cache == {}
+
+def test_benchmark_inputs_are_seeded():
+    """Test that the same seed yields the same inputs."""
+    first = MoEBenchmark(SwitchedMoE(), seed=3)._prepare_inputs('text', 'simple', 10)
+    second = MoEBenchmark(SwitchedMoE(), seed=3)._prepare_inputs('text', 'simple', 10)
+    assert first == second
+
+def test_format_ns():
+    """Test adaptive duration formatting."""
+    assert format_ns(12.0) == "12.0 ns"
+    assert format_ns(1500.0) == "1.50 µs"
+    assert format_ns(2.5e6) == "2.50 ms"
+
+def test_scaling_helpers():
+    """Test scaling input generation and exponent fitting."""
+    from benchmarking.scaling import fit_exponent, generate_text
+
+    text = generate_text(1000)
+    assert len(text) == 1000
+    assert text == generate_text(1000)
+    assert not text.startswith(' ') and not text.endswith(' ')
+
+    sizes = [10, 100, 1000]
+    assert fit_exponent(sizes, [s ** 2 for s in sizes]) == pytest.approx(2.0)
+
+def test_run_scaling_skips_over_budget_sizes():
+    """Test that sizes predicted to exceed the time budget are skipped."""
+    import time
+    from benchmarking.scaling import run_scaling
+
+    scaling = run_scaling("sleep", lambda n: time.sleep(n * 1e-4), [1, 2, 4, 1000],
+                          make_input=lambda size: size, count_units=lambda size: size,
+                          max_call_time=0.01, rounds=1)
+
+    assert [p['size'] for p in scaling['points']] == [1, 2, 4]
+    assert scaling['skipped'] == [1000]
+    assert scaling['exponent'] == pytest.approx(1.0, abs=0.3)
+
+def _allocate_rows(count):
+    rows = []
+    for _ in range(count):
+        rows.append(np.zeros(1000))
+    return rows
+
+def test_profile_allocations():
+    """Test peak, result size and allocation sites of a profiled call."""
+    from benchmarking.memory import deep_sizeof, profile_allocations
+
+    profile = profile_allocations(_allocate_rows, 10, site_files=('test_benchmarking.py',))
+
+    assert profile['peak_bytes'] >= 10 * 8000
+    assert profile['allocated_bytes'] >= 10 * 8000
+    assert profile['result_bytes'] == deep_sizeof(_allocate_rows(10))
+    top = profile['sites'][0]
+    assert top['file'] == 'test_benchmarking.py'
+    assert top['bytes'] >= 10 * 8000
+
+def test_profile_allocations_without_sites():
+    """Test that totals and block counts are recorded even when sites are not listed."""
+    from benchmarking.memory import profile_allocations
+
+    profile = profile_allocations(_allocate_rows, 10, trace_sites=False)
+    assert profile['allocated_bytes'] >= 10 * 8000
+    assert profile['growth_events'] > 0
+    assert profile['retained_blocks'] >= 10
+    assert 'sites' not in profile
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from moe_variants.calibration import DecayingQuantileSketch, ThresholdCalibrator
+from moe_variants.switched_moe import SwitchedMoE
+
+def test_decaying_sketch_forgets_old_values():
+    """Test quantiles and that a shifted stream takes over after a few half-lives."""
+    slow, fast = DecayingQuantileSketch(half_life=1e9), DecayingQuantileSketch(half_life=100)
+    for value in np.linspace(1.0, 2.0, 1000):
+        slow.add(value)
+        fast.add(value)
+    assert slow.quantile(0.5) == pytest.approx(1.5, rel=0.03)
+    assert slow.fraction_below(1.5) == pytest.approx(0.5, abs=0.03)  # Within one bucket
+    # The last 100 values carry half the weight
+    assert fast.quantile(0.5) == pytest.approx(1.9, rel=0.03)
+
+    for value in np.linspace(10.0, 20.0, 1000):
+        fast.add(value)
+    assert fast.quantile(0.95) == pytest.approx(19.7, rel=0.03)
+    assert fast.fraction_below(2.0) < 0.01
+
+def test_calibrator_balances_skewed_traffic():
+    """Test that boundaries move to target quantiles and settle there."""
+    rng = np.random.default_rng(0)
+    calibrator = ThresholdCalibrator(half_life=300, boundaries=[0.165, 0.33])
+    for value in rng.lognormal(0.0, 0.5, 3000):
+        expert = int(np.searchsorted(calibrator.boundaries, value, side='right'))
+        calibrator.observe(value, expert)
+
+    metrics = calibrator.metrics()
+    assert np.allclose(metrics['expected_split'], 1 / 3, atol=calibrator.hysteresis)
+    assert metrics['boundaries'][0] == pytest.approx(np.exp(-0.5 * 0.4307), rel=0.1)
+    # Hysteresis: a stable distribution does not keep moving the boundaries
+    assert metrics['recalibrations'] <= 5
+    assert metrics['hot_expert_ratio'] < 1.5
+
+def test_calibrator_validates_split():
+    """Test rejection of malformed target splits."""
+    with pytest.raises(ValueError):
+        ThresholdCalibrator(num_experts=3, target_split=[0.5, 0.5])
+    with pytest.raises(ValueError):
+        SwitchedMoE(calibrator=ThresholdCalibrator(num_experts=4))
+
+def test_adaptive_switched_moe_uses_idle_expert():
+    """Test that adaptive routing gives expert 0 work a fixed threshold leaves idle."""
+    texts = [f"longer sentence number {i} with several ordinary words" for i in range(300)]
+    fixed = SwitchedMoE()
+    adaptive = SwitchedMoE(calibrator=ThresholdCalibrator(target_split=[0.2, 0.3, 0.5], warmup=20,
+                                                          update_every=10))
+    rng = np.random.default_rng(1)
+    fixed_load, adaptive_load = np.zeros(3), np.zeros(3)
+    for index in rng.integers(0, len(texts), 600):
+        text = texts[index][:20 + index % 40]
+        fixed_load[fixed.explain(text)['expert_id']] += 1
+        adaptive_load[adaptive.explain(text)['expert_id']] += 1
+
+    assert fixed_load[0] == 0
+    assert adaptive_load[0] > 0
+    balance = adaptive.get_metrics()['balance']
+    assert balance['boundaries'] == adaptive.get_metrics()['boundaries']
+    assert balance['recalibrations'] >= 1
+    assert 'balance' not in fixed.get_metrics()
+
+def test_route_feeds_calibrator():
+    """Test that route() is observed like process(), once per call."""
+    moe = SwitchedMoE(calibrator=ThresholdCalibrator())
+    moe.route("some text")
+    moe.process("more text here")
+    assert moe.calibrator.sketch.count == 2
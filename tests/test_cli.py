@@ -0,0 +1,33 @@
+import json
+from benchmarking.cli import main
+from benchmarking.performance_metrics import MoEBenchmark
+from moe_variants.switched_moe import SwitchedMoE
+
+def test_cli_writes_reports_without_plots(tmp_path):
+    """Test a headless run writes JSON and text reports but no figures."""
+    assert main(["--variants", "SwitchedMoE", "--iterations", "6", "--text-length", "40",
+                 "--output-dir", str(tmp_path)]) == 0
+
+    record = json.loads((tmp_path / "switchedmoe_benchmark.json").read_text())
+    assert len(record['variants']['SwitchedMoE']['samples']['execution_time']) == 6
+    assert (tmp_path / "switchedmoe_benchmark.txt").exists()
+    assert not list(tmp_path.glob("*.png"))
+
+def test_cli_plots_from_saved_results(tmp_path):
+    """Test deferred plotting and parallel variant runs."""
+    assert main(["--variants", "SwitchedMoE", "TextMoE", "--iterations", "6", "--jobs", "2",
+                 "--output-dir", str(tmp_path)]) == 0
+    assert main(["--plot-only", "--output-dir", str(tmp_path)]) == 0
+
+    assert (tmp_path / "switchedmoe_execution_times.png").exists()
+    assert (tmp_path / "textmoe_complexity_performance.png").exists()
+
+def test_plot_only_without_results_fails(tmp_path):
+    """Test that plotting an empty directory reports an error."""
+    assert main(["--plot-only", "--output-dir", str(tmp_path)]) == 1
+
+def test_text_length_option():
+    """Test that text samples are built up to the requested length."""
+    benchmark = MoEBenchmark(SwitchedMoE(), text_length=60)
+    sample = benchmark._generate_text_sample('simple')
+    assert 55 <= len(sample) <= 60 and ' ' in sample
@@ -0,0 +1,27 @@
+import pytest
+from benchmarking.concurrency import make_workload, run_concurrent
+
+def test_workload_is_seeded():
+    """Test that workers get reproducible inputs."""
+    assert make_workload('TextMoE', 3, seed=5) == make_workload('TextMoE', 3, seed=5)
+    assert make_workload('ImageMoE', 2, image_side=16)[0].shape == (16, 16)
+
+@pytest.mark.parametrize("mode", ["threads", "processes"])
+def test_run_concurrent_completes_fixed_workload(mode):
+    """Test that the whole workload is processed across workers."""
+    result = run_concurrent('TextMoE', workers=2, mode=mode, shared_dashboard=True,
+                            total_calls=11, text_length=50)
+
+    assert result['calls'] == 11
+    assert result['throughput'] > 0
+    assert result['latency'][0.5] <= result['latency'][0.99]
+
+def test_run_concurrent_rejects_unknown_mode():
+    """Test mode validation."""
+    with pytest.raises(ValueError):
+        run_concurrent('SwitchedMoE', workers=1, mode='fibers', total_calls=1)
+
+def test_run_concurrent_reports_dead_worker():
+    """Test that a worker process dying before reporting raises instead of hanging."""
+    with pytest.raises(RuntimeError, match="exited with code"):
+        run_concurrent('NoSuchVariant', workers=2, mode='processes', total_calls=4, text_length=20)
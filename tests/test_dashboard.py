@@ -40,3 +40,113 @@ def test_create_complexity_table():
     
     table = dashboard._create_complexity_table()
     assert table is not None
+
+def test_update_many():
+    """Test batch metric updates."""
+    dashboard = ComplexityDashboard()
+    dashboard.update_many('text_complexity', [0.1, 0.2, 0.3])
+    dashboard.update_many('expert_assignment', [0, 1, 1])
+
+    assert dashboard.metrics['text_complexity'] == [0.1, 0.2, 0.3]
+    assert dashboard.metrics['expert_assignments'] == {0: 1, 1: 2}
+
+    dashboard.update_many('processing_time', range(150))
+    assert dashboard.metrics['processing_times'] == list(range(50, 150))
+
+def test_threaded_updates_merge():
+    """Test that per-thread shards merge into consistent totals."""
+    import threading
+
+    dashboard = ComplexityDashboard()
+
+    def worker():
+        for _ in range(1000):
+            dashboard.update_metrics('expert_assignment', 2)
+            dashboard.update_metrics('text_complexity', 0.5)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    metrics = dashboard.merge()
+    assert metrics['expert_assignments'][2] == 4000
+    assert len(metrics['text_complexity']) == 100
+    assert dashboard._updates_count == 8000
+
+def test_render_once_rebuilds_only_changed_panels():
+    """Test change-driven panel rebuilds."""
+    dashboard = ComplexityDashboard()
+    assert set(dashboard.render_once()) == {"metrics", "experts", "footer", "header"}
+
+    # Nothing changed: nothing to rebuild
+    assert dashboard.render_once() == []
+
+    dashboard.update_metrics('expert_assignment', 1)
+    assert dashboard.render_once() == ["experts", "footer", "header"]
+
+    dashboard.update_metrics('processing_time', 0.01)
+    assert dashboard.render_once() == ["metrics", "header"]
+
+    stats = dashboard.get_render_stats()
+    assert stats['ticks'] == 4
+    assert stats['renders'] == 3
+    assert stats['cpu_time'] > 0
+    assert stats['lock_acquisitions'] > 0
+
+def test_latency_sketch_keeps_all_samples():
+    """Test that processing times beyond the recent window reach the sketch."""
+    dashboard = ComplexityDashboard()
+    for i in range(150):
+        dashboard.update_metrics('processing_time', 0.001)
+    dashboard.update_many('processing_time', [0.1] * 50)
+
+    metrics = dashboard.merge()
+    assert len(metrics['processing_times']) == 100
+    assert metrics['latency_sketch'].count == 200
+    assert metrics['latency_sketch'].quantile(0.5) == pytest.approx(0.001, rel=0.02)
+    assert metrics['latency_sketch'].quantile(0.999) == pytest.approx(0.1, rel=0.02)
+
+def test_exited_thread_shards_are_retired():
+    """Test that shards of finished threads fold into one retired shard without losing metrics."""
+    import threading
+
+    dashboard = ComplexityDashboard()
+
+    def work(i):
+        dashboard.update_metrics('expert_assignment', i % 3)
+        dashboard.update_metrics('processing_time', 0.001 * (i + 1))
+
+    for i in range(200):
+        thread = threading.Thread(target=work, args=(i,))
+        thread.start()
+        thread.join()
+
+    metrics = dashboard.merge()
+    assert len(dashboard._shards) <= 2
+    assert sum(metrics['expert_assignments'].values()) == 200
+    assert metrics['latency_sketch'].count == 200
+    assert metrics['processing_times'] == [0.001 * (i + 1) for i in range(100, 200)]
+    assert dashboard.totals()['metrics']['processing_times'][0] == 200
+
+def test_totals_pair_each_count_with_its_sum():
+    """Test that totals read during concurrent batches never split a count from its sum."""
+    import threading
+
+    dashboard = ComplexityDashboard()
+    done = threading.Event()
+
+    def work():
+        while not done.is_set():
+            dashboard.update_many('text_complexity', [1.0] * 7)
+
+    writer = threading.Thread(target=work)
+    writer.start()
+    try:
+        for _ in range(2000):
+            count, total = dashboard.totals()['metrics']['text_complexity']
+            assert total == count
+    finally:
+        done.set()
+        writer.join()
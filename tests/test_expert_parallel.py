@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from benchmarking.expert_parallel import (DTYPE, ExpertParallelSimulator, _expert_weights,
+                                          balanced_placement, contiguous_placement, round_robin_placement)
+
+def test_placements():
+    """Test the built-in expert placements."""
+    assert round_robin_placement(6, 3).tolist() == [0, 1, 2, 0, 1, 2]
+    assert contiguous_placement(6, 3).tolist() == [0, 0, 1, 1, 2, 2]
+    placement = balanced_placement([100, 10, 10, 80], 2)
+    assert placement[0] != placement[3]
+
+def test_step_matches_local_experts():
+    """Test that outputs computed by worker processes match a local reference."""
+    rng = np.random.default_rng(0)
+    tokens = rng.standard_normal((64, 16)).astype(DTYPE)
+    with ExpertParallelSimulator(num_experts=4, num_workers=2, hidden_dim=16, capacity_factor=4.0) as simulator:
+        outputs, stats = simulator.step(tokens)
+        experts, gate = simulator.route(tokens)
+
+    for row in (0, 17, 63):
+        w_in, w_out = _expert_weights(int(experts[row]), 16, seed=0)
+        expected = np.maximum(tokens[row] @ w_in, 0) @ w_out * gate[row]
+        np.testing.assert_allclose(outputs[row], expected, rtol=1e-4, atol=1e-5)
+    assert stats['dropped'] == 0
+    assert stats['expert_load'].sum() == stats['worker_rows'].sum() == 64
+    assert stats['bytes_moved'] == 2 * int(stats['remote_fraction'] * 64 + 0.5) * 16 * 4
+
+def test_capacity_drops_tokens_of_hot_experts():
+    """Test that a skewed gate overflows expert capacity."""
+    with ExpertParallelSimulator(num_experts=4, num_workers=2, hidden_dim=8, capacity_factor=1.0,
+                                 gate_skew=5.0) as simulator:
+        result = simulator.run(steps=2, tokens_per_step=128, warmup=0)
+
+    summary = result['summary']
+    assert summary['drop_rate'] > 0
+    assert summary['expert_load'].max() <= 2 * 32
+    assert summary['expert_imbalance'] > 1.0
+
+def test_invalid_placement():
+    """Test placement validation."""
+    with pytest.raises(ValueError):
+        ExpertParallelSimulator(num_experts=4, num_workers=2, placement=[0, 1, 2, 0])
+
+def test_dead_worker_is_reported_and_queues_released():
+    """Test that a crashed expert worker raises a clear error and its shared memory is unlinked."""
+    import os
+
+    simulator = ExpertParallelSimulator(num_experts=4, num_workers=2, hidden_dim=8)
+    tokens = np.random.default_rng(0).standard_normal((32, 8)).astype(DTYPE)
+    simulator.step(tokens)
+    names = [w[key].name for w in simulator._workers for key in ('inputs_shm', 'outputs_shm')]
+    victim = simulator._workers[1]['process']
+    victim.kill()
+    victim.join()
+
+    with pytest.raises(RuntimeError, match=r"Expert worker 1 \(experts \[1, 3\]\) died"):
+        simulator.step(tokens, step_id=1)
+    assert simulator._workers == []
+    if os.path.isdir("/dev/shm"):
+        assert not any(os.path.exists(os.path.join("/dev/shm", name.lstrip("/"))) for name in names)
@@ -0,0 +1,46 @@
+import math
+import numpy as np
+import pytest
+from utils.latency_sketch import LatencySketch, format_quantile_label
+
+def test_quantiles_within_relative_accuracy():
+    """Test sketch quantiles against exact percentiles."""
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(mean=-7, sigma=1.5, size=100000)
+    sketch = LatencySketch.from_values(values)
+
+    for q, estimate in sketch.quantiles().items():
+        exact = np.quantile(values, q)
+        assert abs(estimate / exact - 1) <= 0.02
+
+def test_add_matches_add_many():
+    """Test scalar and vectorized insertion agree."""
+    values = [1e-6, 3e-4, 0.02, 0.5, 2.0]
+    single = LatencySketch()
+    for value in values:
+        single.add(value)
+    batch = LatencySketch.from_values(values)
+
+    assert np.array_equal(single.counts, batch.counts)
+    assert single.count == batch.count == 5
+    assert single.min == batch.min and single.max == batch.max
+
+def test_merge_equals_combined():
+    """Test that merged shard sketches equal one sketch over all values."""
+    rng = np.random.default_rng(1)
+    a, b = rng.exponential(0.01, 5000), rng.exponential(0.1, 5000)
+    merged = LatencySketch.from_values(a).merge(LatencySketch.from_values(b))
+    combined = LatencySketch.from_values(np.concatenate([a, b]))
+
+    assert np.array_equal(merged.counts, combined.counts)
+    assert merged.quantiles() == combined.quantiles()
+
+    with pytest.raises(ValueError):
+        merged.merge(LatencySketch(relative_accuracy=0.05))
+
+def test_empty_sketch():
+    """Test empty sketches report NaN."""
+    sketch = LatencySketch()
+    assert math.isnan(sketch.quantile(0.5))
+    assert math.isnan(sketch.mean)
+    assert format_quantile_label(0.999) == "p99.9"
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from benchmarking.loadgen import (find_saturation, make_load_router, make_payloads,
+                                  poisson_arrivals, run_open_loop, scale_arrivals)
+
+def test_poisson_arrivals_match_rate():
+    """Test that arrivals are seeded, sorted and near the target rate."""
+    arrivals = poisson_arrivals(1000, 2.0, seed=3)
+
+    assert np.array_equal(arrivals, poisson_arrivals(1000, 2.0, seed=3))
+    assert np.all(np.diff(arrivals) >= 0) and arrivals[-1] < 2.0
+    assert 1800 < len(arrivals) < 2200
+
+def test_scale_arrivals_keeps_trace_shape():
+    """Test that trace rescaling hits the requested rate."""
+    scaled = scale_arrivals([5.0, 5.5, 7.0, 9.0], rate=3.0)
+
+    assert scaled[0] == 0.0
+    assert (len(scaled) - 1) / scaled[-1] == pytest.approx(3.0)
+    assert scaled[1] / scaled[2] == pytest.approx(0.5 / 2.0)
+
+def test_run_open_loop_records_every_request():
+    """Test an underloaded open-loop run against a mixed payload pool."""
+    payloads = make_payloads(8, text_fraction=0.5, image_side=16, text_length=40)
+    router = make_load_router('SwitchedMoE')
+    result = run_open_loop([router], payloads, poisson_arrivals(200, 0.1, seed=1))
+
+    assert result['completed'] == result['requests'] > 0
+    assert result['timed_out'] == 0
+    assert result['latency'][0.99] >= result['latency'][0.5] > 0
+
+def test_find_saturation():
+    """Test that saturation is the highest load that is still sustained."""
+    def point(offered, achieved, dropped=0):
+        return {'offered_rate': offered, 'achieved_rate': achieved, 'requests': 100,
+                'completed': 100 - dropped, 'timed_out': dropped, 'latency': {0.99: 0.01}}
+
+    points = [point(10, 10), point(20, 19.5), point(40, 25), point(80, 26, dropped=30)]
+    assert find_saturation(points) == 20
+    assert find_saturation(points, latency_slo=0.001) is None
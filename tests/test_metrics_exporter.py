@@ -0,0 +1,65 @@
+import urllib.error
+import urllib.request
+import pytest
+from utils.dashboard import ComplexityDashboard
+from utils.metrics_exporter import CONTENT_TYPE, MetricsExporter
+
+def test_render_openmetrics():
+    """Test OpenMetrics rendering of dashboard metrics."""
+    dashboard = ComplexityDashboard()
+    dashboard.update_many('expert_assignment', [0, 2, 2])
+    dashboard.update_many('processing_time', [0.0002, 0.002, 0.02])
+
+    text = MetricsExporter(dashboard).render()
+    lines = text.splitlines()
+
+    assert lines[-1] == "# EOF"
+    assert 'moe_expert_assignments_total{expert="2"} 2' in lines
+    assert 'moe_processing_time_seconds_bucket{le="0.001"} 1' in lines
+    assert 'moe_processing_time_seconds_bucket{le="0.01"} 2' in lines
+    assert 'moe_processing_time_seconds_bucket{le="+Inf"} 3' in lines
+    assert 'moe_processing_time_seconds_count 3' in lines
+    assert 'moe_update_batches_total 2' in lines
+    assert 'moe_update_batch_values_total 6' in lines
+
+def test_collectors_add_families():
+    """Test custom metric families from collectors."""
+    exporter = MetricsExporter(ComplexityDashboard())
+    exporter.add_collector(lambda: [
+        ("moe_batch_size", "gauge", "Mean batch size.", [("moe_batch_size", {}, 4.0)])
+    ])
+    assert "moe_batch_size 4.0" in exporter.render().splitlines()
+
+def test_label_escaping_and_quantile_summary():
+    """Test escaped label values, the quantile summary and that rendering leaves the dashboard alone."""
+    dashboard = ComplexityDashboard()
+    dashboard.update_many('processing_time', [0.001, 0.002])
+    exporter = MetricsExporter(dashboard)
+    exporter.add_collector(lambda: [
+        ("moe_info", "gauge", "Info.", [("moe_info", {'path': 'a\\b "c"\nd'}, 1.0)])
+    ])
+    merged_before = dashboard._merged
+    lines = exporter.render().splitlines()
+
+    assert 'moe_info{path="a\\\\b \\"c\\"\\nd"} 1.0' in lines
+    assert "# TYPE moe_processing_time_summary_seconds summary" in lines
+    assert "moe_processing_time_summary_seconds_count 2" in lines
+    assert not any(line.startswith("# TYPE") and "quantile" in line and "gauge" in line for line in lines)
+    assert dashboard._merged is merged_before
+    assert dashboard.get_render_stats()['lock_acquisitions'] == 0
+
+def test_scrape_over_http():
+    """Test scraping the exporter with a local HTTP client."""
+    dashboard = ComplexityDashboard()
+    dashboard.update_metrics('expert_assignment', 1)
+    exporter = MetricsExporter(dashboard, port=0).start()
+    try:
+        with urllib.request.urlopen(exporter.url, timeout=5) as response:
+            assert response.headers['Content-Type'] == CONTENT_TYPE
+            body = response.read().decode()
+        assert 'moe_expert_assignments_total{expert="1"} 1' in body
+
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(exporter.url.replace("/metrics", "/other"), timeout=5)
+    finally:
+        exporter.stop()
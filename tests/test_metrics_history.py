@@ -0,0 +1,67 @@
+import pytest
+from utils.dashboard import ComplexityDashboard
+from utils.metrics_history import METRICS, MetricsHistory, show_history
+
+T0 = 1_700_000_040  # Minute-aligned
+
+def _fill(history, dashboard, seconds):
+    history.sample(dashboard, now=T0)
+    for second in range(seconds):
+        dashboard.update_many('processing_time', [0.002] * 4 + [0.02])
+        dashboard.update_many('text_complexity', [0.5, 1.5])
+        dashboard.update_many('expert_assignment', [second % 3] * 5)
+        history.sample(dashboard, now=T0 + second + 0.5)
+
+def test_dashboard_totals_cover_every_value():
+    """Test that totals count all values, not just the recent buffer."""
+    dashboard = ComplexityDashboard(publish=False)
+    dashboard.update_many('text_complexity', [1.0] * 150)
+    dashboard.update_metrics('text_complexity', 2.0)
+    assert dashboard.totals()['metrics']['text_complexity'] == (151, 152.0)
+    assert len(dashboard.metrics['text_complexity']) == 100
+
+def test_history_downsamples_consistently(tmp_path):
+    """Test that every resolution holds the same totals and the per-second detail."""
+    history = MetricsHistory(tmp_path, resolutions=((1, 600), (60, 10)))
+    _fill(history, ComplexityDashboard(publish=False), 120)
+
+    seconds = history.query(T0, T0 + 120, resolution=1)
+    minutes = history.query(T0, T0 + 120, resolution=60)
+    assert len(seconds) == 120 and len(minutes) == 2
+    assert seconds[0]['counts']['processing_times'] == 5
+    assert seconds[0]['means']['text_complexity'] == pytest.approx(1.0)
+    assert minutes[0]['counts']['processing_times'] == 300
+    assert minutes[0]['experts'] == {0: 100, 1: 100, 2: 100}
+
+    for resolution in (1, 60):
+        summary = history.summary(T0, T0 + 120, resolution=resolution)
+        assert summary['counts']['processing_times'] == 600
+        assert summary['latency'][0.5] == pytest.approx(0.002, rel=0.06)
+        assert summary['latency'][0.99] == pytest.approx(0.02, rel=0.06)
+
+def test_ring_overwrites_old_buckets(tmp_path):
+    """Test that the file size is fixed and expired buckets are replaced."""
+    history = MetricsHistory(tmp_path, resolutions=((1, 30),))
+    size = (tmp_path / "history_1s.npy").stat().st_size
+    _fill(history, ComplexityDashboard(publish=False), 100)
+
+    assert (tmp_path / "history_1s.npy").stat().st_size == size
+    rows = history.query(T0, T0 + 100, resolution=1)
+    assert [row['start'] for row in rows] == list(range(T0 + 70, T0 + 100))
+    assert history.pick_resolution(T0 + 80, now=T0 + 100) == 1
+
+def test_history_persists_and_reopens(tmp_path):
+    """Test reading a history back read-only after the dashboard closes."""
+    dashboard = ComplexityDashboard(publish=False, history=tmp_path)
+    dashboard.update_many('processing_time', [0.001] * 7)
+    dashboard.update_many('expert_assignment', [1] * 7)
+    dashboard.close()
+
+    history = MetricsHistory(tmp_path, readonly=True)
+    summary = history.summary(0, 2 ** 40, resolution=3600)
+    assert summary['counts']['processing_times'] == 7
+    assert summary['experts'] == {1: 7}
+    assert set(summary['counts']) == set(METRICS)
+    with pytest.raises(ValueError):
+        MetricsHistory(tmp_path, resolutions=((1, 10),))
+    assert show_history(tmp_path, last=2 ** 40, resolution=3600)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from moe_variants.multimodal_moe import MultimodalMoE
+
+@pytest.fixture
+def moe():
+    return MultimodalMoE(num_experts=6)
+
+def test_single_pair_routes_tokens_and_patches(moe):
+    """Test one (text, image) pair yields a row per token and per patch."""
+    image = np.random.default_rng(0).random((16, 24))
+    experts = moe.route(("The quick brown fox", image))
+
+    assert experts.shape == (4 + 6,)
+    assert experts.min() >= 0 and experts.max() < 6
+    assert "4 tokens" in moe.process(("The quick brown fox", image))
+
+def test_batch_matches_individual_routing(moe):
+    """Test batched gating gives the same experts as routing pairs one by one."""
+    rng = np.random.default_rng(1)
+    pairs = [("Hello world", rng.random((8, 8))), ("Mixture of experts!", rng.random((20, 13)))]
+
+    batched = moe.route(pairs)
+    individual = np.concatenate([moe.route(pair) for pair in pairs])
+    assert np.array_equal(batched, individual)
+
+def test_metrics_are_per_modality(moe):
+    """Test expert load and latency are tracked per modality."""
+    moe.process([("one two three", np.zeros((8, 16))), ("four", np.ones((8, 8)))])
+    metrics = moe.get_metrics()['modalities']
+
+    assert metrics['text']['rows'] == 4 and sum(metrics['text']['expert_load']) == 4
+    assert metrics['image']['rows'] == 3 and sum(metrics['image']['expert_load']) == 3
+    assert metrics['text']['requests'] == metrics['image']['requests'] == 2
+    assert metrics['image']['latency'][0.5] > 0
+
+def test_modality_bias_shapes_expert_choice():
+    """Test a strong modality prior sends each modality to its half of the pool."""
+    moe = MultimodalMoE(num_experts=4, modality_bias=50.0)
+    experts = moe.route(("alpha beta", np.random.default_rng(2).random((16, 16))))
+
+    assert np.all(experts[:2] < 2) and np.all(experts[2:] >= 2)
+
+def test_invalid_inputs(moe):
+    """Test input validation."""
+    with pytest.raises(ValueError):
+        moe.process(("", np.zeros((8, 8))))
+    with pytest.raises(ValueError):
+        moe.process(("text", np.zeros(8)))
+    with pytest.raises(ValueError):
+        moe.process([])
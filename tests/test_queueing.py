@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from benchmarking.queueing import (_simulate_batched, _simulate_multi_server, _simulate_single_server,
+                                   plan_capacity, routing_distribution, simulate_queues, synthetic_jobs,
+                                   trace_jobs)
+from utils.routing_trace import TraceRecorder
+
+def test_mm1_matches_theory():
+    """Test M/M/1 latency and utilization against closed-form results."""
+    arrivals, experts = synthetic_jobs(800, 200_000, [1.0], seed=1)
+    result = simulate_queues(arrivals, experts, 1, service_time=1e-3)
+    expert = result['experts'][0]
+    # Sojourn time in M/M/1 is exponential with rate mu - lambda
+    assert result['p50'] == pytest.approx(np.log(2) / 200, rel=0.05)
+    assert result['p99'] == pytest.approx(np.log(100) / 200, rel=0.1)
+    assert expert['utilization'] == pytest.approx(0.8, abs=0.02)
+
+def test_mm2_matches_erlang_c():
+    """Test mean latency with two workers against the Erlang C formula."""
+    arrivals, experts = synthetic_jobs(1600, 200_000, [1.0], seed=2)
+    expert = simulate_queues(arrivals, experts, 1, service_time=1e-3, workers=2)['experts'][0]
+    rho = 0.8
+    wait = 2 * rho ** 2 / (1 + rho) / (2000 - 1600)
+    assert expert['mean_wait'] == pytest.approx(wait, rel=0.1)
+
+def test_event_loops_agree_without_batching():
+    """Test that the vectorized, multi-worker and batched paths agree when batches are single jobs."""
+    arrivals, _ = synthetic_jobs(900, 2000, [1.0], seed=3)
+    factors = np.random.default_rng(0).exponential(1.0, size=len(arrivals))
+    vectorized, _ = _simulate_single_server(arrivals, factors * 1e-3)
+    looped, sizes = _simulate_batched(arrivals, factors, 1e-3, 1, 0.0, 1, 1.0)
+    multi, _ = _simulate_multi_server(arrivals, factors * 1e-3, 1)
+    assert np.allclose(vectorized, looped) and np.allclose(vectorized, multi)
+    assert sizes.max() == 1
+
+def test_batching_relieves_overload():
+    """Test that batching keeps an overloaded expert stable and raises the mean batch."""
+    arrivals, experts = synthetic_jobs(3000, 50_000, [0.5, 0.5], seed=4)
+    plain = simulate_queues(arrivals, experts, 2, service_time=1e-3, distribution='deterministic')
+    batched = simulate_queues(arrivals, experts, 2, service_time=1e-3, distribution='deterministic',
+                              max_batch=16, batch_window=5e-4, batch_cost=0.2)
+    assert all(expert['offered_load'] == pytest.approx(1.5, rel=0.05) for expert in plain['experts'])
+    assert batched['p99'] < plain['p99'] / 10
+    assert all(expert['mean_batch'] > 1 for expert in batched['experts'])
+    assert all(expert['utilization'] < 1 for expert in batched['experts'])
+
+def test_routing_sources(tmp_path):
+    """Test live routing distributions, trace jobs and an end-to-end plan."""
+    probabilities = routing_distribution('SwitchedMoE', samples=["a", "The quick brown fox", "x" * 200])
+    assert probabilities.tolist() == pytest.approx([1 / 3, 0, 2 / 3])
+
+    with TraceRecorder(tmp_path) as recorder:
+        for step, expert in enumerate([0, 2, 2, 1]):
+            recorder.record('SwitchedMoE', f"input {step}", expert, 0.5, 1.0, timestamp=10.0 + step)
+    arrivals, experts = trace_jobs(tmp_path)
+    assert arrivals.tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert experts.tolist() == [0, 2, 2, 1]
+
+    result = plan_capacity('SwitchedMoE', rate=100, service_time=1e-3, num_jobs=10_000, trace=tmp_path)
+    assert result['routing'] == pytest.approx([0.25, 0.25, 0.5])
+    assert [expert['jobs'] for expert in result['experts']][2] > 4000
+
+def test_trace_plans_use_only_their_variant(tmp_path):
+    """A mixed trace plans each variant from its own decisions; replay keeps its arrivals."""
+    with TraceRecorder(tmp_path) as recorder:
+        for step, expert in enumerate([0, 2, 2, 1]):
+            recorder.record('SwitchedMoE', f"input {step}", expert, 0.5, 1.0, timestamp=10.0 + step)
+        for step in range(6):
+            recorder.record('TextMoE', f"text {step}", 3, 0.5, 1.0, timestamp=10.5 + step)
+
+    arrivals, experts = trace_jobs(tmp_path, 'SwitchedMoE')
+    assert experts.tolist() == [0, 2, 2, 1]
+    result = plan_capacity('SwitchedMoE', rate=100, service_time=1e-3, num_jobs=10_000, trace=tmp_path)
+    assert result['routing'] == pytest.approx([0.25, 0.25, 0.5])
+    result = plan_capacity('TextMoE', rate=100, service_time=1e-3, num_jobs=1000, trace=tmp_path)
+    assert result['routing'] == pytest.approx([0, 0, 0, 1])
+
+    with pytest.raises(ValueError, match="no ImageMoE decisions"):
+        plan_capacity('ImageMoE', rate=100, service_time=1e-3, trace=tmp_path)
+    with pytest.raises(ValueError, match="no ImageMoE decisions"):
+        plan_capacity('ImageMoE', rate=None, service_time=1e-3, trace=tmp_path, replay=True)
+
+    replayed = plan_capacity('SwitchedMoE', rate=None, service_time=1e-3, trace=tmp_path, replay=True)
+    assert replayed['jobs'] == 4
+    assert replayed['routing'] == pytest.approx([0.25, 0.25, 0.5])
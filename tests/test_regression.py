@@ -0,0 +1,59 @@
+import json
+import numpy as np
+from benchmarking.regression import (build_run, compare_runs, load_run, main,
+                                     mann_whitney_greater, save_results_json)
+
+def _results(times):
+    return {'execution_times': list(times), 'expert_usage': {0: 2, 1: 1}, 'complexity_scores': []}
+
+def test_mann_whitney_detects_shift():
+    """Test the one-sided test on shifted and identical samples."""
+    rng = np.random.default_rng(0)
+    baseline = rng.normal(1.0, 0.05, 50)
+    _, p_slower = mann_whitney_greater(baseline, baseline + 0.2)
+    _, p_same = mann_whitney_greater(baseline, baseline)
+    _, p_faster = mann_whitney_greater(baseline, baseline - 0.2)
+
+    assert p_slower < 1e-6
+    assert p_same > 0.4
+    assert p_faster > 0.99
+
+def test_save_and_load_run(tmp_path):
+    """Test JSON round trip with environment info."""
+    path = save_results_json(_results([0.001, 0.002]), "TextMoE", tmp_path)
+    data = json.loads(path.read_text())
+    assert {'python', 'numpy', 'cpu', 'commit'} <= set(data['environment'])
+
+    run = load_run(tmp_path)
+    assert run['variants']['TextMoE']['samples']['execution_time'] == [0.001, 0.002]
+    assert run['variants']['TextMoE']['expert_usage'] == {'0': 2, '1': 1}
+
+def test_compare_runs_flags_regressions():
+    """Test per-variant regression detection."""
+    rng = np.random.default_rng(1)
+    base_times = rng.normal(0.010, 0.0005, 60)
+    baseline = build_run({'A': _results(base_times), 'B': _results(base_times)}, environment={})
+    current = build_run({'A': _results(base_times * 1.3), 'B': _results(base_times)}, environment={})
+
+    rows = {row['variant']: row for row in compare_runs(baseline, current)}
+    assert rows['A']['regression']
+    assert not rows['B']['regression']
+
+def test_build_run_keeps_explicit_environment():
+    """Test that an explicitly empty environment is not replaced by the collected one."""
+    assert build_run({'A': _results([0.001])}, environment={})['environment'] == {}
+    assert 'python' in build_run({'A': _results([0.001])})['environment']
+
+def test_main_exit_status(tmp_path):
+    """Test that the compare command exits non-zero on regression."""
+    rng = np.random.default_rng(2)
+    times = rng.normal(0.010, 0.0005, 60)
+    baseline = tmp_path / "baseline.json"
+    current = tmp_path / "current.json"
+    baseline.write_text(json.dumps(build_run({'A': _results(times)}, environment={})))
+
+    current.write_text(json.dumps(build_run({'A': _results(times)}, environment={})))
+    assert main([str(baseline), str(current)]) == 0
+
+    current.write_text(json.dumps(build_run({'A': _results(times * 2)}, environment={})))
+    assert main([str(baseline), str(current)]) == 1
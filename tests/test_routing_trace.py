@@ -0,0 +1,96 @@
+import numpy as np
+from benchmarking.replay import replay_trace, trace_arrivals
+from image_processing.image_moe import ImageMoE
+from moe_variants.switched_moe import SwitchedMoE
+from text_processing.text_moe import TextMoE
+from utils.dashboard import ComplexityDashboard
+from utils.routing_trace import (TRACE_DTYPE, TraceReader, TraceRecorder, analyze_trace, input_hash)
+
+def test_input_hash_is_stable():
+    """Test that hashes depend on content, type and shape only."""
+    image = np.arange(16.0).reshape(4, 4)
+    assert input_hash("hello") == input_hash("hello") != input_hash("hellp")
+    assert input_hash(image) == input_hash(image.copy()) != input_hash(image.reshape(2, 8))
+
+def test_recorder_writes_fixed_width_chunks(tmp_path):
+    """Test chunk rollover and reading the records back memory-mapped."""
+    with TraceRecorder(tmp_path, chunk_size=4) as recorder:
+        recorder.record('TextMoE', "a b c", [0, 1, 2], [0.1, 0.2, 0.3], [1.0, 1.0, 1.0])
+        recorder.record('SwitchedMoE', "xyz", 2, 0.9, 0.5)
+        recorder.record('TextMoE', "a b c", [0, 1, 2], [0.1, 0.2, 0.3], [1.0, 1.0, 1.0])
+
+    reader = TraceReader(tmp_path)
+    chunks = list(reader)
+    assert [len(chunk) for chunk in chunks] == [4, 3]
+    assert all(isinstance(chunk, np.memmap) and chunk.dtype == TRACE_DTYPE for chunk in chunks)
+    assert TRACE_DTYPE.itemsize == 35
+    records = np.concatenate(chunks)
+    assert records['call'].tolist() == [0, 0, 0, 1, 2, 2, 2]
+    assert records['expert'].tolist() == [0, 1, 2, 2, 0, 1, 2]
+    # Each distinct input is stored once per chunk
+    assert sorted(reader.load_inputs().values()) == ["a b c", "xyz"]
+    assert len(list(tmp_path.glob("inputs_*.npz"))) == 2
+
+def test_recorder_copies_array_inputs(tmp_path):
+    """Test that reusing a buffer after recording leaves the stored input intact."""
+    image = np.arange(16.0).reshape(4, 4)
+    digest = input_hash(image)
+    with TraceRecorder(tmp_path) as recorder:
+        recorder.record('ImageMoE', image, 1, 0.5, 1.0)
+        image[:] = 0.0
+    stored = TraceReader(tmp_path).load_inputs()[digest]
+    assert input_hash(stored) == digest
+
+def test_recorder_appends_to_existing_trace(tmp_path):
+    """Test that a second session continues chunk and call numbering."""
+    with TraceRecorder(tmp_path) as recorder:
+        recorder.record('SwitchedMoE', "one", 0, 0.1, 1.0)
+    with TraceRecorder(tmp_path) as recorder:
+        recorder.record('SwitchedMoE', "two", 1, 0.2, 1.0)
+    reader = TraceReader(tmp_path)
+    assert len(reader.chunks) == 2
+    assert [call for records in reader for call in records['call']] == [0, 1]
+
+def test_routers_record_their_decisions(tmp_path):
+    """Test that each router records one decision per token, region or input."""
+    image = np.random.default_rng(0).random((16, 16))
+    with TraceRecorder(tmp_path) as recorder:
+        TextMoE(dashboard=ComplexityDashboard(publish=False), recorder=recorder).process("a tiny sentence")
+        ImageMoE(dashboard=ComplexityDashboard(publish=False), recorder=recorder).process(image)
+        SwitchedMoE(recorder=recorder).process("a tiny sentence")
+
+    analysis = analyze_trace(tmp_path)
+    assert analysis['decisions'] == 3 + 4 + 1
+    assert analysis['experts']['TextMoE'].tolist()[:3] == [1, 1, 1]
+    assert analysis['experts']['ImageMoE'].sum() == 4
+    assert analysis['experts']['SwitchedMoE'].sum() == 1
+
+def test_analyzer_detects_drift(tmp_path):
+    """Test per-window expert shares and drift on a trace whose routing shifts."""
+    recorder = TraceRecorder(tmp_path, chunk_size=16)
+    for step in range(40):
+        recorder.record('SwitchedMoE', f"input {step}", 0 if step < 20 else 2, 0.5, 1.0,
+                        timestamp=1000.0 + step)
+    recorder.close()
+
+    analysis = analyze_trace(tmp_path, window_seconds=10)
+    assert [w['decisions'] for w in analysis['windows']] == [10, 10, 10, 10]
+    assert analysis['experts']['SwitchedMoE'].tolist() == [20, 0, 20]
+    assert np.allclose([w['drift'] for w in analysis['windows']], 0.5)
+    assert np.allclose(analysis['windows'][0]['expert_share'], [1.0, 0.0, 0.0])
+
+def test_replay_through_another_variant(tmp_path):
+    """Test replaying recorded inputs and recording the new variant's decisions."""
+    texts = ["short words", "considerably longer vocabulary appears", "short words"]
+    with TraceRecorder(tmp_path / "source") as recorder:
+        router = SwitchedMoE(recorder=recorder)
+        for text in texts:
+            router.process(text)
+
+    with TraceRecorder(tmp_path / "replay") as recorder:
+        stats = replay_trace(tmp_path / "source", 'TextMoE', recorder=recorder)
+    assert stats['calls'] == stats['replayed'] == 3
+    assert stats['missing'] == stats['skipped'] == 0
+    replayed = TraceReader(tmp_path / "replay").load_inputs()
+    assert sorted(replayed.values()) == sorted(set(texts))
+    assert len(trace_arrivals(tmp_path / "source")) == 3
@@ -0,0 +1,141 @@
+import json
+import asyncio
+from utils.routing_service import RoutingHTTPServer, RoutingService
+from benchmarking.serving import encode_payload, run_http_load, run_serving_benchmark
+
+class _EchoRouter:
+    def __init__(self):
+        self.batches = []
+
+    def process(self, payload):
+        if payload == "fail":
+            raise ValueError("bad payload")
+        return payload.upper()
+
+    def process_batch(self, payloads):
+        self.batches.append(len(payloads))
+        results = []
+        for payload in payloads:
+            try:
+                results.append(self.process(payload))
+            except ValueError as error:
+                results.append(error)
+        return results
+
+class _BrokenBatchRouter:
+    def __init__(self):
+        self.calls = 0
+
+    def process(self, payload):
+        self.calls += 1
+        return payload
+
+    def process_batch(self, payloads):
+        self.calls += len(payloads)
+        raise RuntimeError("batch failed")
+
+def test_each_request_gets_its_own_result():
+    """Concurrent requests are batched but resolved with their own results."""
+    async def run():
+        router = _EchoRouter()
+        async with RoutingService(router, max_batch_size=4, max_wait=0.05) as service:
+            results = await asyncio.gather(*(service.route(f"item{i}") for i in range(10)))
+        return router, service, results
+
+    router, service, results = asyncio.run(run())
+    assert results == [f"ITEM{i}" for i in range(10)]
+    assert max(router.batches) <= 4
+    assert service.stats()['batch_sizes'] == {2: 1, 4: 2}
+    assert service.stats()['requests'] == 10
+
+def test_max_wait_flushes_partial_batch():
+    """A lone request is served after max_wait rather than waiting for a full batch."""
+    async def run():
+        async with RoutingService(_EchoRouter(), max_batch_size=64, max_wait=0.01) as service:
+            result = await asyncio.wait_for(service.route("solo"), 1.0)
+        return service, result
+
+    service, result = asyncio.run(run())
+    assert result == "SOLO"
+    stats = service.stats()
+    assert stats['batch_sizes'] == {1: 1}
+    assert 0.005 <= stats['mean_queue_wait'] < 0.5
+
+def test_failure_is_isolated_to_its_request():
+    """One failing payload raises for its caller only; the rest of the batch succeeds."""
+    async def run():
+        async with RoutingService(_EchoRouter(), max_batch_size=8, max_wait=0.05) as service:
+            return await asyncio.gather(service.route("a"), service.route("fail"), service.route("b"),
+                                        return_exceptions=True), service
+
+    (a, failed, b), service = asyncio.run(run())
+    assert (a, b) == ("A", "B")
+    assert isinstance(failed, ValueError)
+    assert service.stats()['errors'] == 1
+
+def test_raising_batch_is_not_rerun():
+    """A process_batch that raises fails its whole batch without routing any item twice."""
+    async def run():
+        router = _BrokenBatchRouter()
+        async with RoutingService(router, max_batch_size=8, max_wait=0.05) as service:
+            results = await asyncio.gather(*(service.route(i) for i in range(3)), return_exceptions=True)
+        return router, results
+
+    router, results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert router.calls == 3
+
+def test_http_endpoint_routes_and_reports_stats():
+    """POST /route returns the routed result and GET /stats the batching stats."""
+    async def run():
+        server = await RoutingHTTPServer(RoutingService(_EchoRouter(), max_batch_size=8), port=0).start()
+        try:
+            load = await run_http_load(server.host, server.port, [encode_payload("hello")], 40, connections=4)
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            writer.write(b"GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+        finally:
+            await server.stop()
+        return load, json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+    load, stats = asyncio.run(run())
+    assert load['failures'] == 0
+    assert stats['requests'] == 40
+    assert sum(int(size) * count for size, count in stats['batch_sizes'].items()) == 40
+
+def test_serving_benchmark_runs_real_router():
+    """The benchmark serves a real variant and records every request."""
+    results = run_serving_benchmark('TextMoE', batch_sizes=(1, 8), total_requests=60, connections=8,
+                                    pool_size=4, text_length=50)
+    assert [r['max_batch_size'] for r in results] == [1, 8]
+    for r in results:
+        assert r['client']['failures'] == 0
+        assert r['server']['requests'] == 60
+        assert r['server']['p99_batch'] <= r['max_batch_size']
+
+def test_http_status_separates_bad_requests_from_faults():
+    """Bad payloads and malformed requests get 400, router faults 500."""
+    async def exchange(server, raw):
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        writer.write(raw)
+        response = await reader.read()
+        writer.close()
+        return response.split(b' ', 2)[1]
+
+    def post(body):
+        return (f"POST /route HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+                f"{body}").encode()
+
+    async def run(router, requests):
+        server = await RoutingHTTPServer(RoutingService(router, max_batch_size=8), port=0).start()
+        try:
+            return [await exchange(server, raw) for raw in requests]
+        finally:
+            await server.stop()
+
+    statuses = asyncio.run(run(_EchoRouter(), [
+        post('{"text": "fail"}'), post('{"text": "ok"}'), b"GARBAGE\r\n\r\n",
+        b"POST /route HTTP/1.1\r\nContent-Length: ten\r\n\r\n"]))
+    assert statuses == [b'400', b'200', b'400', b'400']
+    assert asyncio.run(run(_BrokenBatchRouter(), [post('{"text": "ok"}')])) == [b'500']
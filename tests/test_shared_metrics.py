@@ -0,0 +1,69 @@
+import os
+import pytest
+from utils.dashboard import ComplexityDashboard
+from utils.shared_metrics import SharedMetricsReader, SharedMetricsWriter, list_segments
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="requires POSIX shared memory")
+
+def test_writer_reader_roundtrip():
+    """Test that a published snapshot is visible through a reader."""
+    writer = SharedMetricsWriter()
+    try:
+        metrics = {
+            'expert_assignments': {0: 3, 2: 5},
+            'text_complexity': [0.1, 0.2],
+            'image_complexity': [],
+            'processing_times': [0.001]
+        }
+        writer.publish(metrics, updates=11, last_update=123.0)
+        assert writer.name in list_segments()
+
+        reader = SharedMetricsReader(writer.name)
+        snapshot = reader.read()
+        reader.close()
+
+        assert snapshot['expert_assignments'] == {0: 3, 2: 5}
+        assert snapshot['text_complexity'] == [0.1, 0.2]
+        assert snapshot['processing_times'] == [0.001]
+        assert snapshot['updates'] == 11
+    finally:
+        writer.close()
+    assert writer.name not in list_segments()
+
+def test_reader_is_read_only():
+    """Test that readers cannot modify the published segment."""
+    writer = SharedMetricsWriter()
+    reader = SharedMetricsReader(writer.name)
+    try:
+        with pytest.raises(ValueError):
+            reader._record['updates'] = 1
+    finally:
+        reader.close()
+        writer.close()
+
+def test_reader_rejects_other_layout_version():
+    """Test that a segment written with another layout version is refused."""
+    writer = SharedMetricsWriter()
+    try:
+        writer._record['magic'] = int.from_bytes(b"MoEMetr1", 'big')
+        with pytest.raises(ValueError, match="layout 1"):
+            SharedMetricsReader(writer.name)
+    finally:
+        writer.close()
+
+def test_dashboard_attaches_published_metrics():
+    """Test that a dashboard shows metrics published by another dashboard."""
+    router = ComplexityDashboard(publish=True)
+    monitor = ComplexityDashboard(publish=False)
+    try:
+        router.update_many('expert_assignment', [1, 1, 2])
+        router.update_metrics('processing_time', 0.002)
+        router.publish()
+
+        monitor.attach_shared([router._publisher.name])
+        metrics = monitor.merge()
+        assert metrics['expert_assignments'] == {1: 2, 2: 1}
+        assert metrics['processing_times'] == [0.002]
+    finally:
+        monitor.close()
+        router.close()
@@ -0,0 +1,26 @@
+import subprocess
+import sys
+from benchmarking.startup import PROJECT_ROOT, ROUTING_MODULES, check_startup, parse_importtime
+
+def test_routing_imports_need_only_numpy():
+    """Test that routers import without rich, matplotlib or the tutorial."""
+    code = ("import sys; " + "; ".join(f"import {module}" for module in ROUTING_MODULES) +
+            "; print(sorted({m.split('.')[0] for m in sys.modules} & {'rich', 'matplotlib'}),"
+            " 'utils.tutorial' in sys.modules)")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=PROJECT_ROOT, check=True).stdout.strip()
+    assert output == "[] False"
+
+def test_parse_importtime():
+    """Test parsing of -X importtime output."""
+    output = ("import time: self [us] | cumulative | imported package\n"
+              "import time:        50 |         50 |   numpy.core\n"
+              "import time:       100 |        150 | numpy\n")
+    assert parse_importtime(output) == [("numpy.core", 50, 50, 1), ("numpy", 100, 150, 0)]
+
+def test_check_startup_flags_budget():
+    """Test that budgets are enforced per module."""
+    generous, impossible = check_startup({'moe_variants.switched_moe': 5000, 'benchmarking': 0.001}, runs=1)
+
+    assert generous['ok'] and not generous['heavy_imports']
+    assert not impossible['ok']
@@ -52,3 +52,41 @@ def test_get_metrics():
     assert 'complexity_threshold' in metrics
     assert 'expert_descriptions' in metrics
     assert len(metrics['expert_descriptions']) == 3
+
+def test_explain_exposes_breakdown():
+    """Test that explain() returns the decision with its complexity terms."""
+    moe = SwitchedMoE()
+    text = "The @ quick # brown & fox * jumped!"
+    decision = moe.explain(text)
+
+    assert decision['expert_id'] == moe.route(text)
+    assert decision['complexity_score'] == moe._compute_complexity(text)
+    assert set(decision['breakdown']['terms']) == {'length', 'variety', 'special', 'word_length'}
+    assert decision['breakdown']['features']['word_count'] == 9
+    assert moe.process(text) == moe.format_decision(decision)
+
+def test_streaming_route_matches_batch():
+    """Test that a growing text routes exactly like the full text at every step."""
+    moe = SwitchedMoE()
+    stream = moe.stream("The")
+    text = "The"
+    for delta in [" quick", " brown fox", "", " jumps @ over", " Supercalifragilistic", "expialidocious!!"]:
+        expert = stream.append(delta)
+        text += delta
+        assert expert == moe.route(text)
+        assert stream.complexity == moe._compute_complexity(text)
+    assert stream.text == text
+    assert stream.breakdown == moe.complexity_breakdown(text)
+
+def test_process_batch_matches_process():
+    """Test that a batch gives each input the same output as process(), errors included."""
+    inputs = ["The quick brown fox", "a", "", np.random.default_rng(0).random((8, 8)), 42,
+              "Complex @ text # with $ special & characters " * 4]
+    results = SwitchedMoE().process_batch(inputs)
+    for item, result in zip(inputs, results):
+        if isinstance(result, Exception):
+            with pytest.raises(type(result)):
+                SwitchedMoE().process(item)
+        else:
+            assert result == SwitchedMoE().process(item)
+    assert isinstance(results[4], ValueError)
@@ -0,0 +1,85 @@
+import numpy as np
+from utils.text_features import (VECTORIZE_MIN_LENGTH, IncrementalTextFeatures, text_features,
+                                 text_features_batch, token_features, token_features_batch)
+
+SAMPLES = [
+    "",
+    "A",
+    "The @ quick # brown & fox * jumped!",
+    "  leading\tand trailing\nwhitespace\x1f ",
+    "Ünïcödé text with ß and İ falls back to the str path",
+    "Python programming is fun & efficient @ 2x " * 20,
+    "".join(chr(code) for code in range(128)) * 3,
+]
+
+def reference_features(text):
+    words = text.split()
+    length = len(text)
+    return {
+        'length': length,
+        'unique_ratio': len(set(text.lower())) / length if length else 0.0,
+        'special_ratio': sum(not c.isalnum() and not c.isspace() for c in text) / length if length else 0.0,
+        'word_count': len(words),
+        'mean_word_length': sum(len(word) for word in words) / len(words) if words else 0
+    }
+
+def test_text_features_match_reference():
+    """Test both the ASCII fast path and the str fallback against plain Python."""
+    assert any(len(sample) >= VECTORIZE_MIN_LENGTH and sample.isascii() for sample in SAMPLES)
+    for sample in SAMPLES:
+        assert text_features(sample) == reference_features(sample)
+
+def test_token_features_match_reference():
+    """Test tokens, lengths and distinct-character counts against plain Python."""
+    for sample in SAMPLES:
+        tokens, lengths, unique_counts = token_features(sample)
+        expected = ''.join(c.lower() for c in sample if c.isalnum() or c.isspace()).split()
+        assert tokens == expected
+        assert lengths.tolist() == [len(token) for token in expected]
+        assert unique_counts.tolist() == [len(set(token)) for token in expected]
+
+def test_random_ascii_agrees():
+    """Test random ASCII text, including control characters, on both paths."""
+    rng = np.random.default_rng(0)
+    for length in (5, VECTORIZE_MIN_LENGTH, 1000):
+        text = rng.integers(0, 128, size=length, dtype=np.uint8).tobytes().decode('ascii')
+        assert text_features(text) == reference_features(text)
+        assert token_features(text)[0] == ''.join(c.lower() for c in text if c.isalnum() or c.isspace()).split()
+
+def test_batch_kernels_match_single_texts():
+    """Test that one pass over a batch gives each text's own features and tokens."""
+    rng = np.random.default_rng(2)
+    batch = SAMPLES + ["", " ", "word", "  x  "] + [
+        "".join(rng.choice(list("ab XY\t\n!@.,12"), size=rng.integers(0, 300))) for _ in range(50)]
+    for sample, features in zip(batch, text_features_batch(batch)):
+        assert features == text_features(sample)
+    for sample, (tokens, lengths, unique_counts) in zip(batch, token_features_batch(batch)):
+        expected = token_features(sample)
+        assert tokens == expected[0]
+        assert lengths.tolist() == expected[1].tolist()
+        assert unique_counts.tolist() == expected[2].tolist()
+
+def test_incremental_features_match_batch():
+    """Test that running counts equal a full rescan after every append."""
+    rng = np.random.default_rng(1)
+    alphabet = list("ab XY\t\n!@.,12") + ['Σ', 'é', 'İ', 'ß']
+    for _ in range(50):
+        incremental, text = IncrementalTextFeatures(), ""
+        for _ in range(20):
+            delta = "".join(rng.choice(alphabet, size=rng.integers(0, 6)))
+            incremental.append(delta)
+            text += delta
+            assert incremental.features() == text_features(text)
+    assert incremental.text == text
+
+def test_incremental_sigma_follows_later_context():
+    """Test that a trailing capital sigma settles correctly across case-ignorable appends."""
+    rng = np.random.default_rng(2)
+    alphabet = ["a", "Σ", "σ", "ς", " ", "'", "́", ".", "1"]
+    for _ in range(300):
+        incremental, text = IncrementalTextFeatures(), ""
+        for _ in range(15):
+            delta = "".join(rng.choice(alphabet, size=rng.integers(0, 4)))
+            incremental.append(delta)
+            text += delta
+            assert incremental.features() == text_features(text)
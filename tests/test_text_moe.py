@@ -19,20 +19,20 @@ def test_compute_complexity():
     # Test with special characters
     assert moe._compute_complexity("@#$%") > moe._compute_complexity("test")
 
-def test_get_expert_weights():
+def test_weights_for_length():
     """Test expert weight assignment."""
     moe = TextMoE(num_experts=3)
     
     # Test short word
-    weights = moe._get_expert_weights("the")
+    weights = moe._weights_for_length(len("the"))
     assert np.argmax(weights) == 0  # Should be assigned to expert 0 (short words)
     
     # Test medium word
-    weights = moe._get_expert_weights("python")
+    weights = moe._weights_for_length(len("python"))
     assert np.argmax(weights) == 1  # Should be assigned to expert 1 (medium words)
     
     # Test long word
-    weights = moe._get_expert_weights("programming")
+    weights = moe._weights_for_length(len("programming"))
     assert np.argmax(weights) == 2  # Should be assigned to expert 2 (long words)
 
 def test_process_invalid_input():
@@ -53,3 +53,13 @@ def test_process_valid_input():
     assert isinstance(result, str)
     assert "Expert" in result
     assert "specialist" in result
+
+def test_process_batch_isolates_failures():
+    """Test that a batch matches process() per text and fails only the bad texts."""
+    moe = TextMoE()
+    texts = ["The quick brown fox", "", "!!!", None, "Python programming is fun & efficient " * 5]
+    results = moe.process_batch(texts)
+    assert [isinstance(result, ValueError) for result in results] == [False, True, True, True, False]
+    assert results[0] == TextMoE().process(texts[0])
+    assert results[4] == TextMoE().process(texts[4])
+    assert len(moe.dashboard.metrics['processing_times']) == 2
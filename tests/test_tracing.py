@@ -0,0 +1,57 @@
+import json
+import time
+from utils import tracing
+from utils.tracing import Tracer, span, traced
+from text_processing.text_moe import TextMoE
+from moe_variants.switched_moe import SwitchedMoE
+
+def test_spans_are_noops_when_disabled():
+    """Test that nothing is recorded while tracing is off."""
+    assert not tracing.is_enabled()
+    with span("idle") as first, span("idle") as second:
+        pass
+    assert first is second
+
+def test_stage_summary_separates_self_time():
+    """Test total and self time for nested spans."""
+    with tracing.recording() as tracer:
+        with span("outer"):
+            with span("inner"):
+                time.sleep(0.01)
+    summary = tracer.stage_summary()
+
+    assert not tracing.is_enabled()
+    assert summary['outer']['total_ns'] >= summary['inner']['total_ns'] >= 10_000_000
+    assert summary['outer']['self_ns'] < summary['inner']['self_ns']
+    assert summary['outer']['self_ns'] + summary['inner']['self_ns'] == summary['outer']['total_ns']
+
+def test_traced_decorator_and_chrome_export(tmp_path):
+    """Test that decorated calls export as complete trace events."""
+    @traced("work")
+    def work(x):
+        return x * 2
+
+    tracer = Tracer()
+    with tracing.recording(tracer):
+        assert work(21) == 42
+    path = tracer.export_chrome_trace(tmp_path / "trace.json")
+
+    events = json.loads(path.read_text())['traceEvents']
+    complete = [event for event in events if event['ph'] == 'X']
+    assert [event['name'] for event in complete] == ['work']
+    assert complete[0]['dur'] >= 0 and complete[0]['cat'] == 'work'
+
+def test_routers_record_stages():
+    """Test that router stages show up in the summary."""
+    text_moe = TextMoE()
+    switched = SwitchedMoE()
+    with tracing.recording() as tracer:
+        text_moe.process("The quick brown fox")
+        switched.process("The quick brown fox")
+    summary = tracer.stage_summary()
+
+    for stage in ("text.process", "text.tokenize", "text.route", "text.dashboard", "text.format",
+                  "switched.process", "switched.route", "switched.format"):
+        assert summary[stage]['count'] == 1
+    # The complexity is computed once per call and reused for the confidence
+    assert summary['switched.complexity']['count'] == 1
@@ -0,0 +1,50 @@
+import numpy as np
+from benchmarking.performance_metrics import MoEBenchmark
+from benchmarking.workloads import (Corpus, IMAGE_KINDS, Workload, generate_corpus, generate_images,
+                                    load_corpus, load_images)
+from moe_variants.switched_moe import SwitchedMoE
+
+def test_corpus_is_seeded_with_zipfian_lengths():
+    """Test reproducibility and a short-word-heavy length distribution."""
+    docs = generate_corpus(50, 40, seed=1)
+    assert docs == generate_corpus(50, 40, seed=1)
+    assert docs != generate_corpus(50, 40, seed=2)
+
+    lengths = np.bincount([len(token) for doc in docs for token in doc.split()])
+    assert lengths[1] > lengths[5] > lengths[15]
+
+def test_images_cover_every_kind():
+    """Test image shapes, value range and reproducibility."""
+    images = generate_images(8, 32, seed=3)
+    assert images.shape == (8, 32, 32)
+    assert images.min() >= 0.0 and images.max() <= 1.0
+    assert np.array_equal(images, generate_images(8, 32, seed=3))
+    # Checkerboards are binary; textures are not
+    assert set(np.unique(images[IMAGE_KINDS.index('checkerboard')])) == {0.0, 1.0}
+    assert len(np.unique(images[IMAGE_KINDS.index('texture')])) > 100
+
+def test_cache_round_trip_is_memory_mapped(tmp_path):
+    """Test that cached datasets reload memory-mapped and unchanged."""
+    corpus = load_corpus(10, 20, seed=4, cache_dir=tmp_path)
+    images = load_images(4, 16, seed=4, cache_dir=tmp_path)
+    files = sorted(tmp_path.iterdir())
+
+    assert list(corpus) == generate_corpus(10, 20, seed=4)
+    assert isinstance(images, np.memmap)
+    assert np.array_equal(images, generate_images(4, 16, seed=4))
+    assert list(load_corpus(10, 20, seed=4, cache_dir=tmp_path)) == list(corpus)
+    assert sorted(tmp_path.iterdir()) == files
+
+def test_corpus_indexing():
+    """Test sequence access on a corpus."""
+    corpus = Corpus.from_texts(["a b", "cd", "e"])
+    assert len(corpus) == 3 and corpus[1] == "cd" and corpus[-1] == "e"
+
+def test_benchmark_uses_workload(tmp_path):
+    """Test that two benchmarks see identical workload inputs."""
+    first = MoEBenchmark(SwitchedMoE(), workload=Workload(cache_dir=tmp_path, docs_per_tier=4))
+    second = MoEBenchmark(SwitchedMoE(), workload=Workload(cache_dir=tmp_path, docs_per_tier=4))
+
+    assert first._prepare_inputs('text', 'complex', 6) == second._prepare_inputs('text', 'complex', 6)
+    image = first._prepare_inputs('image', 'simple', 1)[0]
+    assert type(image) is np.ndarray and image.shape == (32, 32)
@@ -1,13 +1,23 @@
 import numpy as np
-from rich.console import Console
 from utils.dashboard import ComplexityDashboard
+from utils.text_features import token_features, token_features_batch
+from utils.tracing import span
 import time
 
 class TextMoE:
-    def __init__(self, num_experts=3):
+    def __init__(self, num_experts=3, dashboard=None, recorder=None):
         self.num_experts = num_experts
-        self.console = Console()
-        self.dashboard = ComplexityDashboard()
+        self._console = None
+        self.dashboard = dashboard if dashboard is not None else ComplexityDashboard()
+        self.recorder = recorder  # Optional utils.routing_trace.TraceRecorder
+
+    @property
+    def console(self):
+        """Rich console, created on first use so routing never imports rich."""
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return self._console
 
     def _compute_complexity(self, token):
         """Compute token complexity score."""
@@ -22,17 +32,10 @@ class TextMoE:
 
     def _tokenize(self, text):
         """Simple tokenization by splitting on spaces and removing punctuation."""
-        # Remove basic punctuation and split
-        text = ''.join(c.lower() for c in text if c.isalnum() or c.isspace())
-        return text.split()
-
-    def _get_expert_weights(self, token):
-        """Compute expert weights for a token based on characteristics."""
-        # Enhanced heuristic: consider token length and content
-        complexity = self._compute_complexity(token)
-        self.dashboard.update_metrics('text_complexity', complexity)
+        return token_features(text)[0]
 
-        length = len(token)
+    def _weights_for_length(self, length):
+        """Compute one-hot expert weights from a token length."""
         weights = np.zeros(self.num_experts)
 
         # Expert 0: Short tokens (1-3 chars)
@@ -47,31 +50,84 @@ class TextMoE:
 
         return weights
 
-    def process(self, text):
-        """Process text using Mixture of Experts."""
+    @staticmethod
+    def _check_input(text):
         if not text or not isinstance(text, str):
             raise ValueError("Input must be a non-empty string")
 
-        start_time = time.perf_counter()
-        tokens = self._tokenize(text)
+    def process(self, text):
+        """Process text using Mixture of Experts."""
+        self._check_input(text)
+
+        with span("text.process"):
+            start_time = time.perf_counter()
+            with span("text.tokenize"):
+                tokens, lengths, unique_counts = token_features(text)
+            return self._route_tokens(text, tokens, lengths, unique_counts, start_time)
+
+    def process_batch(self, texts):
+        """process() for a list of texts, with all of them tokenized in one pass.
+
+        Returns one entry per text in order: the formatted output, or the
+        exception that text raised, so one bad text fails alone.
+        """
+        results = [None] * len(texts)
+        valid = []
+        for index, text in enumerate(texts):
+            try:
+                self._check_input(text)
+                valid.append(index)
+            except ValueError as error:
+                results[index] = error
+
+        with span("text.process_batch", size=len(texts)):
+            start_time = time.perf_counter()
+            with span("text.tokenize"):
+                features = token_features_batch([texts[index] for index in valid])
+            # Tokenizing was shared, so each text is charged an equal part of it
+            shared = (time.perf_counter() - start_time) / max(len(valid), 1)
+            for index, (tokens, lengths, unique_counts) in zip(valid, features):
+                try:
+                    results[index] = self._route_tokens(texts[index], tokens, lengths, unique_counts,
+                                                        time.perf_counter() - shared)
+                except Exception as error:
+                    results[index] = error
+        return results
+
+    def _route_tokens(self, text, tokens, lengths, unique_counts, start_time):
+        """Route the tokens of one text, publish its metrics and format the result."""
         if not tokens:
             raise ValueError("No valid tokens found in input text")
 
         results = []
-        for token in tokens:
-            expert_weights = self._get_expert_weights(token)
-            chosen_expert = np.argmax(expert_weights)
-            self.dashboard.update_metrics('expert_assignment', chosen_expert)
-            results.append({
-                'token': token,
-                'expert': chosen_expert,
-                'confidence': expert_weights[chosen_expert]
-            })
-
-        processing_time = time.perf_counter() - start_time
-        self.dashboard.update_metrics('processing_time', processing_time)
-
-        return self._format_results(results)
+        assignments = []
+        with span("text.route", tokens=len(tokens)):
+            # Same score as _compute_complexity, for all tokens at once
+            complexities = ((lengths / 10) * 0.7 + (unique_counts / lengths) * 0.3).tolist()
+            for token, length in zip(tokens, lengths.tolist()):
+                expert_weights = self._weights_for_length(length)
+                chosen_expert = np.argmax(expert_weights)
+                assignments.append(chosen_expert)
+                results.append({
+                    'token': token,
+                    'expert': chosen_expert,
+                    'confidence': expert_weights[chosen_expert]
+                })
+
+        # Publish per-token metrics as two batches instead of two updates per token
+        with span("text.dashboard"):
+            self.dashboard.update_many('text_complexity', complexities)
+            self.dashboard.update_many('expert_assignment', assignments)
+
+            processing_time = time.perf_counter() - start_time
+            self.dashboard.update_metrics('processing_time', processing_time)
+
+        if self.recorder is not None:
+            self.recorder.record('TextMoE', text, assignments, complexities,
+                                 [result['confidence'] for result in results])
+
+        with span("text.format"):
+            return self._format_results(results)
 
     def _format_results(self, results):
         """Format results for display with enhanced descriptions."""
@@ -1,2 +1,16 @@
-from .visualizer import print_banner, print_separator
-from .tutorial import run_tutorial
\ No newline at end of file
+# Re-exports are resolved on first access so that importing a lightweight
+# submodule (utils.tracing, utils.dashboard, ...) does not load rich.
+_LAZY_EXPORTS = {
+    'print_banner': 'visualizer',
+    'print_separator': 'visualizer',
+    'run_tutorial': 'tutorial',
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        import importlib
+        module = importlib.import_module(f"{__name__}.{_LAZY_EXPORTS[name]}")
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,32 +1,157 @@
 import time
-from rich.console import Console
-from rich.live import Live
-from rich.layout import Layout
-from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.table import Table
-from rich import box
 import numpy as np
+import weakref
+import itertools
+import threading
+from collections import deque
 from threading import Lock
+from utils.latency_sketch import DEFAULT_QUANTILES, LatencySketch, format_quantile_label
+from utils.shared_metrics import (SharedMetricsReader, SharedMetricsWriter,
+                                  default_publish, list_segments)
 
-console = Console()
+# rich is imported inside the rendering methods: routers create dashboards
+# only to record metrics and should not pay for the UI at import time.
+
+_RECENT_LIMIT = 100  # Keep last 100 values per buffered metric
+_BUFFERED_METRICS = {
+    'text_complexity': 'text_complexity',
+    'image_complexity': 'image_complexity',
+    'processing_time': 'processing_times'
+}
+
+class _MetricShard:
+    """Per-thread metric accumulator.
+
+    Only the owning thread writes to a shard, so updates never take a lock.
+    The display thread reads shards when merging; under the GIL, deque appends
+    and dict copies are atomic, so a merge always sees a consistent value.
+    """
 
-class ComplexityDashboard:
     def __init__(self):
-        self.layout = Layout()
-        self._metrics_lock = Lock()
-        self.metrics = {
+        self.buffers = {name: deque(maxlen=_RECENT_LIMIT) for name in _BUFFERED_METRICS.values()}
+        # (count, sum) of every value, replaced as one tuple so readers never see a count without its sum
+        self.totals = {name: (0, 0.0) for name in _BUFFERED_METRICS.values()}
+        self.expert_assignments = {}
+        self.latency = LatencySketch()  # Every processing time, not just the last 100
+        self.updates = 0
+        self.batches = 0  # update_many calls and their values, for batch stats
+        self.batched_values = 0
+        self.metric_seq = 0  # Change counters read by the display thread
+        self.expert_seq = 0
+        self.last_update = time.time()
+
+    def folded(self, other):
+        """Return a new shard holding this shard's metrics plus other's."""
+        shard = _MetricShard()
+        for name in shard.buffers:
+            samples = sorted(itertools.chain(_copy_buffer(self.buffers[name]), _copy_buffer(other.buffers[name])),
+                             key=lambda sample: sample[0])
+            shard.buffers[name].extend(samples[-_RECENT_LIMIT:])
+            shard.totals[name] = tuple(a + b for a, b in zip(self.totals[name], other.totals[name]))
+        for source in (self, other):
+            for expert_id, count in source.expert_assignments.copy().items():
+                shard.expert_assignments[expert_id] = shard.expert_assignments.get(expert_id, 0) + count
+            shard.latency.merge(source.latency)
+        for field in ('updates', 'batches', 'batched_values', 'metric_seq', 'expert_seq'):
+            setattr(shard, field, getattr(self, field) + getattr(other, field))
+        shard.last_update = max(self.last_update, other.last_update)
+        return shard
+
+class _ShardOwner:
+    """Kept in the owning thread's local storage; freed when that thread exits."""
+    __slots__ = ('__weakref__',)
+
+def _shard_released(dashboard_ref, shard):
+    # Runs in the exiting thread, possibly inside a dashboard call, so only queue the shard
+    dashboard = dashboard_ref()
+    if dashboard is not None:
+        dashboard._released.append(shard)
+
+def _copy_buffer(buffer):
+    """Copy a shard buffer that its owning thread may be appending to."""
+    while True:
+        try:
+            return list(buffer)
+        except RuntimeError:  # Mutated mid-copy; retry
+            continue
+
+class ComplexityDashboard:
+    def __init__(self, publish=None, publish_interval=0.1, history=None):
+        """Create a dashboard.
+
+        publish: True or a segment name to mirror metrics into shared memory so
+            a dashboard in another process can display them. Defaults to the
+            MOE_DASHBOARD_PUBLISH environment variable.
+        history: a directory (or MetricsHistory) to persist per-second
+            aggregates to; see utils.metrics_history.
+        """
+        self._layout = None
+        self._metrics_lock = Lock()  # Guards the shard registry and merged view only
+        self._local = threading.local()
+        # Index 0 accumulates the shards of exited threads; the rest belong to live threads
+        self._shards = [_MetricShard()]
+        self._released = deque()  # Shards of exited threads awaiting _retire_released()
+        self._stamp = itertools.count()  # Global ordering for buffered samples
+        self._merged = {
             'text_complexity': [],
             'image_complexity': [],
             'expert_assignments': {},
-            'processing_times': []
+            'processing_times': [],
+            'latency_sketch': LatencySketch()
         }
-        self._setup_layout()
         self._last_update = time.time()
         self._updates_count = 0
 
+        if publish is None:
+            publish = default_publish()
+        self._publisher = None
+        if publish:
+            self._publisher = SharedMetricsWriter(publish if isinstance(publish, str) else None)
+        self._publish_lock = Lock()
+        self._publish_interval = publish_interval
+        self._last_publish = 0.0
+
+        self._readers = {}
+        self._discover_shared = False
+
+        self._history = None
+        if history is not None:
+            from utils.metrics_history import MetricsHistory
+            self._history = history if isinstance(history, MetricsHistory) else MetricsHistory(history)
+            self._history.start(self)
+
+        self._seen_seq = (-1, -1)
+        self._footer_active = None
+        self._header_built = 0.0
+        self._render_stats = {
+            'ticks': 0,
+            'renders': 0,
+            'table_rebuilds': 0,
+            'expert_rebuilds': 0,
+            'cpu_time': 0.0,
+            'lock_hold_time': 0.0,
+            'lock_acquisitions': 0,
+            'started': time.perf_counter()
+        }
+
+    @property
+    def metrics(self):
+        """Merged view of all per-thread shards."""
+        return self.merge()
+
+    @property
+    def layout(self):
+        """Rich layout of the live view, built on first use."""
+        if self._layout is None:
+            from rich.layout import Layout
+            self._layout = Layout()
+            self._setup_layout()
+        return self._layout
+
     def _setup_layout(self):
         """Initialize the dashboard layout."""
+        from rich.layout import Layout
+
         self.layout.split(
             Layout(name="header", size=3),
             Layout(name="main", size=15),
@@ -40,95 +165,403 @@ class ComplexityDashboard:
 
     def _create_header(self):
         """Create the dashboard header."""
+        from rich import box
+        from rich.panel import Panel
+
+        stats = self.get_render_stats()
         return Panel(
             "[bold blue]Model Complexity Dashboard[/]\n"
-            f"[dim]Updates: {self._updates_count} | Last update: {time.time() - self._last_update:.1f}s ago[/]",
+            f"[dim]Updates: {self._updates_count} | Last update: {time.time() - self._last_update:.1f}s ago | "
+            f"Dashboard CPU: {stats['cpu_fraction'] * 100:.1f}% | "
+            f"Lock hold: {stats['avg_lock_hold'] * 1e6:.1f} µs[/]",
             box=box.ROUNDED
         )
 
-    def _create_complexity_table(self):
+    def _create_complexity_table(self, metrics=None):
         """Create a table showing current complexity metrics."""
+        from rich import box
+        from rich.table import Table
+
         table = Table(title="Model Complexity Metrics", box=box.ROUNDED)
         table.add_column("Metric", style="cyan")
         table.add_column("Value", justify="right", style="green")
         table.add_column("Status", justify="right", style="yellow")
 
-        with self._metrics_lock:
-            if self.metrics['text_complexity']:
-                avg_text = np.mean(self.metrics['text_complexity'])
-                table.add_row(
-                    "Text Complexity",
-                    f"{avg_text:.2f}",
-                    "✓ Active"
-                )
+        if metrics is None:
+            metrics = self.merge()
 
-            if self.metrics['image_complexity']:
-                avg_image = np.mean(self.metrics['image_complexity'])
-                table.add_row(
-                    "Image Complexity",
-                    f"{avg_image:.2f}",
-                    "✓ Active"
-                )
+        if metrics['text_complexity']:
+            avg_text = np.mean(metrics['text_complexity'])
+            table.add_row(
+                "Text Complexity",
+                f"{avg_text:.2f}",
+                "✓ Active"
+            )
 
-            if self.metrics['processing_times']:
-                avg_time = np.mean(self.metrics['processing_times']) * 1000
-                table.add_row(
-                    "Processing Time (ms)",
-                    f"{avg_time:.2f}",
-                    "✓ Active"
-                )
+        if metrics['image_complexity']:
+            avg_image = np.mean(metrics['image_complexity'])
+            table.add_row(
+                "Image Complexity",
+                f"{avg_image:.2f}",
+                "✓ Active"
+            )
+
+        if metrics['processing_times']:
+            avg_time = np.mean(metrics['processing_times']) * 1000
+            table.add_row(
+                "Processing Time (ms)",
+                f"{avg_time:.2f}",
+                "✓ Active"
+            )
 
-            if not any([self.metrics['text_complexity'], 
-                       self.metrics['image_complexity'], 
-                       self.metrics['processing_times']]):
+        latency = metrics['latency_sketch']
+        if latency.count:
+            for q, value in latency.quantiles(DEFAULT_QUANTILES).items():
                 table.add_row(
-                    "[yellow]Waiting for data...[/]",
-                    "",
-                    "⋯ Pending"
+                    f"Processing Time {format_quantile_label(q)} (ms)",
+                    f"{value * 1000:.2f}",
+                    f"n={latency.count}"
                 )
 
+        if not any([metrics['text_complexity'],
+                    metrics['image_complexity'],
+                    metrics['processing_times']]):
+            table.add_row(
+                "[yellow]Waiting for data...[/]",
+                "",
+                "⋯ Pending"
+            )
+
         return table
 
-    def _create_expert_panel(self):
+    def _create_expert_panel(self, metrics=None):
         """Create a panel showing expert assignments."""
-        with self._metrics_lock:
-            content = []
-            total = sum(self.metrics['expert_assignments'].values()) or 1
+        from rich import box
+        from rich.panel import Panel
 
-            if not self.metrics['expert_assignments']:
-                content = ["[yellow]Waiting for expert assignments...[/]"]
-            else:
-                for expert_id, count in sorted(self.metrics['expert_assignments'].items()):
-                    percentage = (count / total) * 100
-                    bar_length = int(percentage / 5)
-                    bar = "█" * bar_length
-                    content.append(
-                        f"Expert {expert_id}: {count} assignments ({percentage:.1f}%)\n"
-                        f"[blue]{bar}[/]"
-                    )
+        if metrics is None:
+            metrics = self.merge()
+        assignments = metrics['expert_assignments']
+        content = []
+        total = sum(assignments.values()) or 1
+
+        if not assignments:
+            content = ["[yellow]Waiting for expert assignments...[/]"]
+        else:
+            for expert_id, count in sorted(assignments.items()):
+                percentage = (count / total) * 100
+                bar_length = int(percentage / 5)
+                bar = "█" * bar_length
+                content.append(
+                    f"Expert {expert_id}: {count} assignments ({percentage:.1f}%)\n"
+                    f"[blue]{bar}[/]"
+                )
 
         return Panel("\n".join(content), title="Expert Utilization", box=box.ROUNDED)
 
+    def _shard(self):
+        """Return the calling thread's shard, registering it on first use."""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = _MetricShard()
+            with self._metrics_lock:
+                self._retire_released()
+                self._shards.append(shard)
+            owner = _ShardOwner()
+            weakref.finalize(owner, _shard_released, weakref.ref(self), shard)
+            self._local.shard = shard
+            self._local.owner = owner
+            return shard
+
+    def _retire_released(self):
+        """Fold shards of exited threads into the retired shard (metrics lock held).
+
+        The shard list is replaced rather than edited, so a merge that copied
+        the old list sees each value exactly once.
+        """
+        if not self._released:
+            return
+        retired, live = self._shards[0], self._shards[1:]
+        while self._released:
+            shard = self._released.popleft()
+            retired = retired.folded(shard)
+            live = [s for s in live if s is not shard]
+        self._shards = [retired] + live
+
     def update_metrics(self, metric_type, value):
-        """Update dashboard metrics thread-safely."""
+        """Update dashboard metrics thread-safely without taking a shared lock."""
+        shard = self._shard()
+        if metric_type == 'expert_assignment':
+            shard.expert_assignments[value] = shard.expert_assignments.get(value, 0) + 1
+            shard.expert_seq += 1
+        elif metric_type in _BUFFERED_METRICS:
+            name = _BUFFERED_METRICS[metric_type]
+            shard.buffers[name].append((next(self._stamp), value))
+            count, total = shard.totals[name]
+            shard.totals[name] = (count + 1, total + value)
+            if metric_type == 'processing_time':
+                shard.latency.add(value)
+            shard.metric_seq += 1
+
+        shard.updates += 1
+        shard.last_update = time.time()
+        if self._publisher is not None and shard.last_update - self._last_publish >= self._publish_interval:
+            self.publish()
+
+    def update_many(self, metric_type, values):
+        """Record a batch of values for one metric in a single update."""
+        values = list(values)
+        if not values:
+            return
+
+        shard = self._shard()
+        if metric_type == 'expert_assignment':
+            counts = shard.expert_assignments
+            for value in values:
+                counts[value] = counts.get(value, 0) + 1
+            shard.expert_seq += 1
+        elif metric_type in _BUFFERED_METRICS:
+            name = _BUFFERED_METRICS[metric_type]
+            shard.buffers[name].extend(
+                (next(self._stamp), value) for value in values[-_RECENT_LIMIT:]
+            )
+            count, total = shard.totals[name]
+            shard.totals[name] = (count + len(values), total + float(sum(values)))
+            if metric_type == 'processing_time':
+                shard.latency.add_many(values)
+            shard.metric_seq += 1
+
+        shard.updates += len(values)
+        shard.batches += 1
+        shard.batched_values += len(values)
+        shard.last_update = time.time()
+        if self._publisher is not None and shard.last_update - self._last_publish >= self._publish_interval:
+            self.publish()
+
+    def _merge_shards(self, record_lock=True):
+        """Combine this process's per-thread shards."""
+        with self._metrics_lock:
+            acquired = time.perf_counter()
+            self._retire_released()
+            shards = list(self._shards)
+            if record_lock:
+                self._record_lock_hold(acquired)
+
+        buffers = {name: [] for name in _BUFFERED_METRICS.values()}
+        assignments = {}
+        latency = LatencySketch()
+        updates = 0
+        last_update = self._last_update
+
+        for shard in shards:
+            for name, buffer in shard.buffers.items():
+                buffers[name].extend(_copy_buffer(buffer))
+            for expert_id, count in shard.expert_assignments.copy().items():
+                assignments[expert_id] = assignments.get(expert_id, 0) + count
+            latency.merge(shard.latency)
+            updates += shard.updates
+            last_update = max(last_update, shard.last_update)
+
+        merged = {'expert_assignments': assignments, 'latency_sketch': latency}
+        for name, samples in buffers.items():
+            samples.sort(key=lambda sample: sample[0])
+            merged[name] = [value for _, value in samples[-_RECENT_LIMIT:]]
+        return merged, updates, last_update
+
+    def totals(self):
+        """Cumulative per-metric (count, sum), expert counts and latency sketch of this process.
+
+        Unlike the merged view, these cover every value ever recorded, so
+        the difference between two calls describes the time in between
+        (see utils.metrics_history).
+        """
         with self._metrics_lock:
-            if metric_type in ['text_complexity', 'image_complexity']:
-                self.metrics[metric_type].append(value)
-                if len(self.metrics[metric_type]) > 100:  # Keep last 100 values
-                    self.metrics[metric_type].pop(0)
-            elif metric_type == 'expert_assignment':
-                self.metrics['expert_assignments'][value] = \
-                    self.metrics['expert_assignments'].get(value, 0) + 1
-            elif metric_type == 'processing_time':
-                self.metrics['processing_times'].append(value)
-                if len(self.metrics['processing_times']) > 100:
-                    self.metrics['processing_times'].pop(0)
-
-            self._updates_count += 1
-            self._last_update = time.time()
+            self._retire_released()
+            shards = list(self._shards)
+        counts = {name: (0, 0.0) for name in _BUFFERED_METRICS.values()}
+        assignments = {}
+        latency = LatencySketch()
+        for shard in shards:
+            for name, (count, total) in shard.totals.copy().items():
+                counts[name] = (counts[name][0] + count, counts[name][1] + total)
+            for expert_id, count in shard.expert_assignments.copy().items():
+                assignments[expert_id] = assignments.get(expert_id, 0) + count
+            latency.merge(shard.latency)
+        return {'metrics': counts, 'expert_assignments': assignments, 'latency_sketch': latency}
+
+    def _merge_remote(self, merged, updates, last_update):
+        """Fold snapshots from attached shared memory segments into merged."""
+        for reader in list(self._readers.values()):
+            snapshot = reader.read()
+            if snapshot is None:
+                continue
+            for expert_id, count in snapshot['expert_assignments'].items():
+                merged['expert_assignments'][expert_id] = \
+                    merged['expert_assignments'].get(expert_id, 0) + count
+            for name in _BUFFERED_METRICS.values():
+                merged[name] = (merged[name] + snapshot[name])[-_RECENT_LIMIT:]
+            merged['latency_sketch'].merge(snapshot['latency_sketch'])
+            updates += snapshot['updates']
+            last_update = max(last_update, snapshot['last_update'])
+        return merged, updates, last_update
+
+    def merge(self):
+        """Merge all per-thread shards (and attached processes) into one snapshot."""
+        merged, updates, last_update = self._merge_shards()
+        if self._readers:
+            merged, updates, last_update = self._merge_remote(merged, updates, last_update)
+
+        with self._metrics_lock:
+            acquired = time.perf_counter()
+            self._merged = merged
+            self._updates_count = updates
+            self._last_update = last_update
+            self._record_lock_hold(acquired)
+        return merged
+
+    def snapshot(self):
+        """Return the merged metrics, update count and last update time without touching dashboard state.
+
+        Unlike merge(), this leaves the dashboard's merged view and render
+        stats alone, so other threads (such as a metrics scraper) can call it.
+        """
+        merged, updates, last_update = self._merge_shards(record_lock=False)
+        if self._readers:
+            merged, updates, last_update = self._merge_remote(merged, updates, last_update)
+        return {'metrics': merged, 'updates': updates, 'last_update': last_update}
+
+    def _record_lock_hold(self, acquired):
+        """Account time the metrics lock was held by the dashboard (lock held)."""
+        self._render_stats['lock_hold_time'] += time.perf_counter() - acquired
+        self._render_stats['lock_acquisitions'] += 1
+
+    def change_seq(self):
+        """Return (metrics, experts) change counters without merging or locking."""
+        metric_seq = expert_seq = 0
+        for shard in list(self._shards):
+            metric_seq += shard.metric_seq
+            expert_seq += shard.expert_seq
+        remote_seq = sum(reader.seq for reader in list(self._readers.values()))
+        return metric_seq + remote_seq, expert_seq + remote_seq
+
+    def render_once(self, header_interval=1.0):
+        """Rebuild only the panels whose metrics changed since the last render.
+
+        Returns the names of the rebuilt panels; an empty list means the
+        screen does not need a refresh.
+        """
+        cpu_start = time.thread_time()
+        stats = self._render_stats
+        stats['ticks'] += 1
+        rebuilt = []
+
+        seq = self.change_seq()
+        if seq != self._seen_seq:
+            metrics = self.merge()
+            if seq[0] != self._seen_seq[0]:
+                self.layout["main"]["metrics"].update(self._create_complexity_table(metrics))
+                stats['table_rebuilds'] += 1
+                rebuilt.append("metrics")
+            if seq[1] != self._seen_seq[1]:
+                self.layout["main"]["experts"].update(self._create_expert_panel(metrics))
+                stats['expert_rebuilds'] += 1
+                rebuilt.append("experts")
+            self._seen_seq = seq
+            if self._footer_active != (self._updates_count > 0):
+                self._footer_active = self._updates_count > 0
+                self.layout["footer"].update(self._create_status_indicator())
+                rebuilt.append("footer")
+
+        # The header shows elapsed time, so it also refreshes on a slow timer
+        now = time.perf_counter()
+        if rebuilt or now - self._header_built >= header_interval:
+            self.layout["header"].update(self._create_header())
+            self._header_built = now
+            rebuilt.append("header")
+
+        if rebuilt:
+            stats['renders'] += 1
+        stats['cpu_time'] += time.thread_time() - cpu_start
+        return rebuilt
+
+    def get_batch_stats(self):
+        """Return (update_many calls, values recorded through them)."""
+        batches = batched_values = 0
+        for shard in list(self._shards):
+            batches += shard.batches
+            batched_values += shard.batched_values
+        return batches, batched_values
+
+    def get_render_stats(self):
+        """Return the dashboard's own rendering overhead."""
+        stats = dict(self._render_stats)
+        elapsed = time.perf_counter() - stats.pop('started')
+        stats['cpu_fraction'] = stats['cpu_time'] / elapsed if elapsed > 0 else 0.0
+        stats['avg_lock_hold'] = (stats['lock_hold_time'] / stats['lock_acquisitions']
+                                  if stats['lock_acquisitions'] else 0.0)
+        return stats
+
+    def publish(self):
+        """Mirror this process's metrics into its shared memory segment."""
+        if self._publisher is None or not self._publish_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_publish = time.time()
+            merged, updates, last_update = self._merge_shards()
+            self._publisher.publish(merged, updates, last_update)
+        finally:
+            self._publish_lock.release()
+
+    def attach_shared(self, names=None):
+        """Display metrics published by other processes.
+
+        With no names, every published segment is attached and new router
+        processes are picked up while the dashboard is running.
+        """
+        if names is None:
+            self._discover_shared = True
+            self._refresh_shared()
+            return
+        for name in names:
+            if name not in self._readers:
+                self._readers[name] = SharedMetricsReader(name)
+
+    def _refresh_shared(self):
+        """Attach newly published segments and drop ones whose writer exited."""
+        own = self._publisher.name if self._publisher is not None else None
+        available = set(list_segments())
+        for name, reader in list(self._readers.items()):
+            if name not in available or not reader.is_alive():
+                reader.close()
+                del self._readers[name]
+        for name in available - set(self._readers) - {own}:
+            try:
+                reader = SharedMetricsReader(name)
+            except (OSError, ValueError):
+                continue
+            if reader.is_alive():
+                self._readers[name] = reader
+            else:
+                reader.close()
+
+    def close(self):
+        """Release shared memory held by this dashboard and flush its history."""
+        if self._history is not None:
+            self._history.stop(self)
+            self._history = None
+        if self._publisher is not None:
+            self.publish()
+            self._publisher.close()
+            self._publisher = None
+        for reader in self._readers.values():
+            reader.close()
+        self._readers = {}
 
     def _create_status_indicator(self):
         """Create a simple status indicator."""
+        from rich.progress import Progress, SpinnerColumn, TextColumn
+
         progress = Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -141,29 +574,53 @@ class ComplexityDashboard:
         )
         return progress
 
-    def display(self):
-        """Display the interactive dashboard."""
-        try:
-            with Live(self.layout, refresh_per_second=4) as live:
-                self.layout["header"].update(self._create_header())
-                self.layout["footer"].update(self._create_status_indicator())
+    def display(self, min_interval=0.05, max_interval=1.0):
+        """Display the interactive dashboard.
+
+        Refreshes only when metrics change: the poll interval resets to
+        min_interval (capping the refresh rate) while updates arrive and
+        doubles up to max_interval while idle.
+        """
+        from rich.console import Console
+        from rich.live import Live
 
+        try:
+            with Live(self.layout, auto_refresh=False) as live:
+                interval = min_interval
+                last_seq = None
+                last_discovery = time.time()
                 while True:
-                    self.layout["main"]["metrics"].update(self._create_complexity_table())
-                    self.layout["main"]["experts"].update(self._create_expert_panel())
-                    self.layout["header"].update(self._create_header())
-                    time.sleep(0.25)  # Refresh every 250ms
+                    if self._discover_shared and time.time() - last_discovery >= 1.0:
+                        self._refresh_shared()
+                        last_discovery = time.time()
+
+                    if self.render_once():
+                        live.refresh()
+                    if self._seen_seq != last_seq:
+                        last_seq = self._seen_seq
+                        interval = min_interval
+                    else:
+                        interval = min(interval * 2, max_interval)
+                    time.sleep(interval)
 
         except KeyboardInterrupt:
-            console.print("\n[green]Dashboard closed successfully![/]")
+            Console().print("\n[green]Dashboard closed successfully![/]")
 
 def launch_dashboard():
     """Launch the interactive complexity dashboard."""
-    dashboard = ComplexityDashboard()
+    from rich.console import Console
+
+    console = Console()
+    dashboard = ComplexityDashboard(publish=False)
+    dashboard.attach_shared()
     console.print("\n[bold green]Launching Model Complexity Dashboard...[/]")
-    console.print("[yellow]Tip: Run text or image processing demos in another terminal to see metrics[/]")
+    console.print("[yellow]Tip: Run text or image processing demos with MOE_DASHBOARD_PUBLISH=1 "
+                  "in another terminal to see metrics[/]")
     console.print("[dim]Press Ctrl+C to exit[/]\n")
-    dashboard.display()
+    try:
+        dashboard.display()
+    finally:
+        dashboard.close()
 
 if __name__ == "__main__":
     launch_dashboard()
\ No newline at end of file
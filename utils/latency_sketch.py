@@ -0,0 +1,125 @@
+import math
+import numpy as np
+
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99, 0.999)
+
+class LatencySketch:
+    """Fixed-memory, mergeable quantile sketch for latencies in seconds.
+
+    Values are counted in logarithmic buckets, so every quantile estimate is
+    within ``relative_accuracy`` of a true sample value. Memory does not grow
+    with the number of samples, and two sketches with the same parameters
+    merge exactly by adding their bucket counts.
+    """
+
+    def __init__(self, relative_accuracy=0.01, min_value=1e-9, max_value=1e3):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        # Bucket 0 holds values <= min_value; the last bucket absorbs overflow
+        self.num_buckets = int(math.ceil(math.log(max_value / min_value) / self._log_gamma)) + 2
+        self.counts = np.zeros(self.num_buckets, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value):
+        if value <= self.min_value:
+            return 0
+        index = int(math.ceil(math.log(value / self.min_value) / self._log_gamma))
+        return min(index, self.num_buckets - 1)
+
+    def _bucket_value(self, index):
+        if index == 0:
+            return self.min_value
+        return self.min_value * 2 * self._gamma ** index / (self._gamma + 1)
+
+    def add(self, value):
+        """Record a single value."""
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def add_many(self, values):
+        """Record an array of values in one vectorized pass."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size == 0:
+            return
+        clipped = np.maximum(values, self.min_value)
+        indices = np.ceil(np.log(clipped / self.min_value) / self._log_gamma).astype(np.int64)
+        np.clip(indices, 0, self.num_buckets - 1, out=indices)
+        self.counts += np.bincount(indices, minlength=self.num_buckets)
+        self.count += values.size
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def _check_compatible(self, other):
+        if (other.relative_accuracy, other.min_value, other.max_value) != \
+                (self.relative_accuracy, self.min_value, self.max_value):
+            raise ValueError("Cannot merge sketches with different parameters")
+
+    def merge(self, other):
+        """Add another sketch's samples into this one."""
+        self._check_compatible(other)
+        self.counts += other.counts
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def copy(self):
+        """Return an independent copy of this sketch."""
+        sketch = LatencySketch(self.relative_accuracy, self.min_value, self.max_value)
+        sketch.merge(self)
+        return sketch
+
+    def quantile(self, q):
+        """Estimate the q-th quantile (0 <= q <= 1); NaN when empty."""
+        return self.quantiles((q,))[q]
+
+    def quantiles(self, qs=DEFAULT_QUANTILES):
+        """Estimate several quantiles at once as a {q: value} dict."""
+        if self.count == 0:
+            return {q: math.nan for q in qs}
+        cumulative = np.cumsum(self.counts)
+        result = {}
+        for q in qs:
+            if q <= 0:
+                result[q] = self.min
+            elif q >= 1:
+                result[q] = self.max
+            else:
+                index = int(np.searchsorted(cumulative, q * (self.count - 1), side='right'))
+                result[q] = min(max(self._bucket_value(index), self.min), self.max)
+        return result
+
+    def count_at_or_below(self, bound):
+        """Number of recorded values in buckets entirely at or below bound."""
+        index = self._index(bound)
+        if index > 0 and self.min_value * self._gamma ** index > bound * (1 + 1e-12):
+            index -= 1  # Bucket index straddles the bound; exclude it
+        return int(self.counts[:index + 1].sum())
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+    @classmethod
+    def from_values(cls, values, **kwargs):
+        """Build a sketch from an existing sequence of values."""
+        sketch = cls(**kwargs)
+        sketch.add_many(values)
+        return sketch
+
+def format_quantile_label(q):
+    """Format a quantile as a short percentile label (0.999 -> 'p99.9')."""
+    return f"p{q * 100:g}"
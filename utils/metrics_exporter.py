@@ -0,0 +1,160 @@
+import math
+import threading
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Histogram bucket bounds (seconds) derived from the dashboard's latency sketch
+LATENCY_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0)
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(int(value))
+
+def _escape_label(value):
+    """Escape a label value as OpenMetrics requires: backslash, double quote and newline."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+def render_openmetrics(dashboard, collectors=()):
+    """Render a dashboard's metrics in OpenMetrics text format.
+
+    Reads a snapshot from the dashboard's lock-free shard merge, so scrapes
+    never block routers or change the dashboard's own view.
+    collectors are callables returning extra metric families as
+    (name, type, help, [(sample_name, labels, value), ...]) tuples.
+    """
+    snapshot = dashboard.snapshot()
+    metrics = snapshot['metrics']
+    families = []
+
+    families.append(("moe_updates", "counter", "Metric updates recorded by the dashboard.",
+                     [("moe_updates_total", {}, snapshot['updates'])]))
+    families.append(("moe_expert_assignments", "counter", "Tokens or regions routed to each expert.",
+                     [("moe_expert_assignments_total", {'expert': expert_id}, count)
+                      for expert_id, count in sorted(metrics['expert_assignments'].items())]))
+
+    for name in ('text_complexity', 'image_complexity'):
+        if metrics[name]:
+            families.append((f"moe_{name}_recent", "gauge",
+                             f"Mean {name.replace('_', ' ')} over recent samples.",
+                             [(f"moe_{name}_recent", {}, float(np.mean(metrics[name])))]))
+
+    latency = metrics['latency_sketch']
+    name = "moe_processing_time_seconds"
+    samples = [(f"{name}_bucket", {'le': bound}, latency.count_at_or_below(bound))
+               for bound in LATENCY_BUCKETS]
+    samples.append((f"{name}_bucket", {'le': '+Inf'}, latency.count))
+    samples.append((f"{name}_count", {}, latency.count))
+    samples.append((f"{name}_sum", {}, float(latency.total)))
+    families.append((name, "histogram", "Router processing time per call.", samples))
+    if latency.count:
+        # quantile is reserved for summaries, so the sketch's estimates form one
+        name = "moe_processing_time_summary_seconds"
+        samples = [(name, {'quantile': q}, float(value)) for q, value in latency.quantiles().items()]
+        samples.append((f"{name}_count", {}, latency.count))
+        samples.append((f"{name}_sum", {}, float(latency.total)))
+        families.append((name, "summary", "Processing time quantiles estimated by the latency sketch.", samples))
+
+    batches, batched_values = dashboard.get_batch_stats()
+    families.append(("moe_update_batches", "counter", "Batched dashboard updates (update_many calls).",
+                     [("moe_update_batches_total", {}, batches)]))
+    families.append(("moe_update_batch_values", "counter", "Values recorded through batched updates.",
+                     [("moe_update_batch_values_total", {}, batched_values)]))
+
+    stats = dashboard.get_render_stats()
+    families.append(("moe_dashboard_cpu_seconds", "counter", "CPU time spent rendering the dashboard.",
+                     [("moe_dashboard_cpu_seconds_total", {}, float(stats['cpu_time']))]))
+    families.append(("moe_dashboard_lock_hold_seconds", "counter", "Time the dashboard held the metrics lock.",
+                     [("moe_dashboard_lock_hold_seconds_total", {}, float(stats['lock_hold_time']))]))
+
+    for collector in collectors:
+        families.extend(collector())
+
+    lines = []
+    for name, metric_type, help_text, family_samples in families:
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"# HELP {name} {help_text}")
+        for sample_name, labels, value in family_samples:
+            lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+class MetricsExporter:
+    """Serve a dashboard's metrics over HTTP for Prometheus-style scraping.
+
+    Runs a stdlib HTTP server on a daemon thread; bind to port 0 to let the
+    OS pick a free port and read it back from ``port``.
+    """
+
+    def __init__(self, dashboard, host="127.0.0.1", port=9464):
+        self.dashboard = dashboard
+        self.host = host
+        self.port = port
+        self.collectors = []
+        self._server = None
+        self._thread = None
+
+    def add_collector(self, collector):
+        """Register a callable that returns extra metric families."""
+        self.collectors.append(collector)
+
+    def render(self):
+        """Render the current metrics in OpenMetrics text format."""
+        return render_openmetrics(self.dashboard, self.collectors)
+
+    def _make_handler(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the terminal dashboard
+
+        return Handler
+
+    def start(self):
+        """Start serving /metrics in the background."""
+        if self._server is not None:
+            return self
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server and wait for its thread."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/metrics"
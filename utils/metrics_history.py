@@ -0,0 +1,277 @@
+import math
+import time
+import threading
+import numpy as np
+from pathlib import Path
+from utils.latency_sketch import DEFAULT_QUANTILES, LatencySketch, format_quantile_label
+
+# rich is imported inside the view functions, as in utils.dashboard.
+
+# (seconds per bucket, buckets kept): an hour of seconds, a day of minutes, a month of hours
+DEFAULT_RESOLUTIONS = ((1, 3600), (60, 1440), (3600, 720))
+MAX_EXPERTS = 16
+METRICS = ('text_complexity', 'image_complexity', 'processing_times')
+# History keeps a coarser sketch than the dashboard: 5% accuracy in ~190 buckets per slot
+HISTORY_SKETCH = {'relative_accuracy': 0.05, 'min_value': 1e-6, 'max_value': 100.0}
+
+_SKETCH_BUCKETS = LatencySketch(**HISTORY_SKETCH).num_buckets
+HISTORY_DTYPE = np.dtype([
+    ('start', '<i8'),  # Bucket start in epoch seconds; -1 for a never-written slot
+    ('count', '<u8', (len(METRICS),)),
+    ('sum', '<f8', (len(METRICS),)),
+    ('latency', '<u4', (_SKETCH_BUCKETS,)),
+    ('experts', '<u8', (MAX_EXPERTS,))
+])
+
+def _bucket_map(source, target):
+    """Index of the target bucket holding each source bucket's representative value."""
+    return np.array([target._index(source._bucket_value(i)) for i in range(source.num_buckets)])
+
+def _sketch_from_counts(counts):
+    """Rebuild a history LatencySketch from stored bucket counts."""
+    sketch = LatencySketch(**HISTORY_SKETCH)
+    sketch.counts = counts.astype(np.int64)
+    sketch.count = int(sketch.counts.sum())
+    occupied = np.flatnonzero(sketch.counts)
+    if len(occupied):
+        # Only bucket counts are kept, so min and max are bucket values
+        sketch.min = sketch._bucket_value(int(occupied[0]))
+        sketch.max = sketch._bucket_value(int(occupied[-1]))
+        sketch.total = float((sketch.counts[occupied] * [sketch._bucket_value(int(i)) for i in occupied]).sum())
+    return sketch
+
+class MetricsHistory:
+    """Downsampled metrics history in fixed-size, memory-mapped ring buffers.
+
+    Each resolution is one history_<seconds>s.npy file of HISTORY_DTYPE
+    slots. The bucket starting at t lives in slot (t // seconds) % slots,
+    so a slot is simply overwritten once its bucket falls out of the
+    window. Every per-second delta is merged into the matching slot of every
+    resolution as it is written, so the coarser files need no separate
+    downsampling pass.
+
+    One process writes a history directory; any number may read it.
+    """
+
+    def __init__(self, path, resolutions=DEFAULT_RESOLUTIONS, readonly=False):
+        self.path = Path(path)
+        self.resolutions = tuple(sorted(resolutions))
+        self.readonly = readonly
+        self._rings = {}
+        if not readonly:
+            self.path.mkdir(parents=True, exist_ok=True)
+        for seconds, slots in self.resolutions:
+            file = self.path / f"history_{seconds}s.npy"
+            if file.exists():
+                ring = np.load(file, mmap_mode='r' if readonly else 'r+')
+                if ring.dtype != HISTORY_DTYPE or ring.shape != (slots,):
+                    raise ValueError(f"{file} does not match resolution {seconds}s x {slots} slots")
+            elif readonly:
+                raise FileNotFoundError(file)
+            else:
+                ring = np.lib.format.open_memmap(file, mode='w+', dtype=HISTORY_DTYPE, shape=(slots,))
+                ring['start'] = -1
+                ring.flush()
+            self._rings[seconds] = ring
+        self._source_map = _bucket_map(LatencySketch(), LatencySketch(**HISTORY_SKETCH))
+        self._previous = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def add(self, timestamp, counts=None, sums=None, latency=None, experts=None):
+        """Merge one delta into the bucket containing timestamp at every resolution.
+
+        counts and sums hold one value per METRICS entry, latency the history
+        sketch bucket counts and experts the assignments per expert id.
+        """
+        delta = np.zeros((), dtype=HISTORY_DTYPE)
+        if counts is not None:
+            delta['count'] = counts
+        if sums is not None:
+            delta['sum'] = sums
+        if latency is not None:
+            delta['latency'] = latency
+        if experts is not None:
+            delta['experts'][:len(experts)] = experts[:MAX_EXPERTS]
+
+        for seconds, ring in self._rings.items():
+            start = int(timestamp // seconds) * seconds
+            index = (start // seconds) % len(ring)
+            if ring['start'][index] != start:
+                # The slot still holds a bucket that has left the window
+                delta['start'] = start
+                ring[index] = delta
+            else:
+                for field in ('count', 'sum', 'latency', 'experts'):
+                    ring[field][index] += delta[field]
+
+    def sample(self, dashboard, now=None):
+        """Record what a dashboard observed since the previous sample."""
+        now = time.time() if now is None else now
+        totals = dashboard.totals()
+        counts = np.array([totals['metrics'][name][0] for name in METRICS], dtype=np.uint64)
+        sums = np.array([totals['metrics'][name][1] for name in METRICS])
+        latency = totals['latency_sketch'].counts
+        experts = np.zeros(MAX_EXPERTS, dtype=np.uint64)
+        for expert_id, count in totals['expert_assignments'].items():
+            if 0 <= int(expert_id) < MAX_EXPERTS:
+                experts[int(expert_id)] = count
+        current = (counts, sums, latency, experts)
+
+        if self._previous is not None:
+            previous_counts, previous_sums, previous_latency, previous_experts = self._previous
+            latency_delta = np.bincount(self._source_map, weights=latency - previous_latency,
+                                        minlength=_SKETCH_BUCKETS)
+            self.add(now, counts - previous_counts, sums - previous_sums, latency_delta, experts - previous_experts)
+        self._previous = current
+
+    def start(self, dashboard, interval=1.0):
+        """Sample dashboard every interval seconds in a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self.sample(dashboard)
+
+        def run():
+            while not self._stop.wait(interval):
+                self.sample(dashboard)
+
+        self._thread = threading.Thread(target=run, name="metrics-history", daemon=True)
+        self._thread.start()
+
+    def stop(self, dashboard=None):
+        """Stop sampling (after a final sample of dashboard, if given) and flush to disk."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if dashboard is not None:
+            self.sample(dashboard)
+        self.flush()
+
+    def flush(self):
+        if not self.readonly:
+            for ring in self._rings.values():
+                ring.flush()
+
+    def pick_resolution(self, start, now=None):
+        """Finest resolution whose window still reaches back to start."""
+        now = time.time() if now is None else now
+        for seconds, slots in self.resolutions:
+            if start >= now - seconds * slots:
+                return seconds
+        return self.resolutions[-1][0]
+
+    def _select(self, start, end, resolution):
+        ring = self._rings[resolution]
+        starts = np.asarray(ring['start'])
+        mask = (starts >= start - start % resolution) & (starts < end)
+        order = np.argsort(starts[mask])
+        return np.flatnonzero(mask)[order], ring
+
+    def query(self, start, end=None, resolution=None, quantiles=DEFAULT_QUANTILES):
+        """Return one row per stored bucket in [start, end), oldest first.
+
+        Rows hold per-metric counts and means, latency quantiles and expert
+        counts. Without a resolution, the finest one covering start is used.
+        """
+        end = time.time() if end is None else end
+        resolution = resolution or self.pick_resolution(start, now=end)
+        indices, ring = self._select(start, end, resolution)
+        rows = []
+        for index in indices:
+            counts, sums = ring['count'][index], ring['sum'][index]
+            rows.append({
+                'start': int(ring['start'][index]),
+                'resolution': resolution,
+                'counts': {name: int(counts[i]) for i, name in enumerate(METRICS)},
+                'means': {name: float(sums[i] / counts[i]) if counts[i] else math.nan
+                          for i, name in enumerate(METRICS)},
+                'latency': _sketch_from_counts(ring['latency'][index]).quantiles(quantiles),
+                'experts': {expert: int(count) for expert, count in enumerate(ring['experts'][index]) if count}
+            })
+        return rows
+
+    def summary(self, start, end=None, resolution=None, quantiles=DEFAULT_QUANTILES):
+        """Aggregate every bucket in [start, end) into one row, in constant memory."""
+        end = time.time() if end is None else end
+        resolution = resolution or self.pick_resolution(start, now=end)
+        indices, ring = self._select(start, end, resolution)
+        counts = np.zeros(len(METRICS), dtype=np.uint64)
+        sums = np.zeros(len(METRICS))
+        latency = np.zeros(_SKETCH_BUCKETS, dtype=np.uint64)
+        experts = np.zeros(MAX_EXPERTS, dtype=np.uint64)
+        for index in indices:
+            counts += ring['count'][index]
+            sums += ring['sum'][index]
+            latency += ring['latency'][index]
+            experts += ring['experts'][index]
+        return {
+            'start': start,
+            'end': end,
+            'resolution': resolution,
+            'buckets': len(indices),
+            'counts': {name: int(counts[i]) for i, name in enumerate(METRICS)},
+            'means': {name: float(sums[i] / counts[i]) if counts[i] else math.nan for i, name in enumerate(METRICS)},
+            'latency': _sketch_from_counts(latency).quantiles(quantiles),
+            'experts': {expert: int(count) for expert, count in enumerate(experts) if count}
+        }
+
+def history_table(rows, title="Metrics History"):
+    """Rich table with one line per history bucket."""
+    from rich.table import Table
+
+    table = Table(title=title)
+    table.add_column("Bucket start", style="cyan")
+    table.add_column("Calls", justify="right")
+    table.add_column("Mean text cx", justify="right")
+    table.add_column("Mean image cx", justify="right")
+    for q in DEFAULT_QUANTILES[:3]:
+        table.add_column(f"{format_quantile_label(q)} (ms)", justify="right", style="magenta")
+    table.add_column("Experts", style="green")
+
+    for row in rows:
+        means = row['means']
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row['start']))
+        table.add_row(
+            stamp,
+            str(row['counts']['processing_times']),
+            "-" if math.isnan(means['text_complexity']) else f"{means['text_complexity']:.3f}",
+            "-" if math.isnan(means['image_complexity']) else f"{means['image_complexity']:.3f}",
+            *("-" if math.isnan(row['latency'][q]) else f"{row['latency'][q] * 1000:.3f}"
+              for q in DEFAULT_QUANTILES[:3]),
+            " ".join(f"{expert}:{count}" for expert, count in row['experts'].items())
+        )
+    return table
+
+def show_history(path, last=3600, resolution=None, limit=60):
+    """Print the last `last` seconds of a history directory (newest `limit` buckets)."""
+    from rich.console import Console
+
+    history = MetricsHistory(path, readonly=True)
+    now = time.time()
+    rows = history.query(now - last, now, resolution=resolution)
+    summary = history.summary(now - last, now, resolution=resolution)
+    console = Console()
+    console.print(history_table(rows[-limit:], title=f"Metrics History ({rows[0]['resolution'] if rows else '-'}s buckets)"))
+    latency = ", ".join(f"{format_quantile_label(q)} {value * 1000:.3f} ms"
+                        for q, value in summary['latency'].items() if not math.isnan(value))
+    console.print(f"[bold]Window:[/] {summary['counts']['processing_times']} calls in "
+                  f"{summary['buckets']} buckets; latency {latency or '-'}")
+    return rows
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show a persisted metrics history")
+    parser.add_argument("path", help="History directory")
+    parser.add_argument("--last", type=float, default=3600, help="Window length in seconds")
+    parser.add_argument("--resolution", type=int, default=None, help="Bucket size in seconds (default: finest)")
+    parser.add_argument("--limit", type=int, default=60, help="Newest buckets to list")
+    args = parser.parse_args(argv)
+    show_history(args.path, args.last, args.resolution, args.limit)
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
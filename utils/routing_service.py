@@ -0,0 +1,280 @@
+import json
+import asyncio
+import numpy as np
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from utils.latency_sketch import LatencySketch
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+class _Request:
+    __slots__ = ('payload', 'future', 'enqueued')
+
+    def __init__(self, payload, future, enqueued):
+        self.payload = payload
+        self.future = future
+        self.enqueued = enqueued
+
+class RoutingService:
+    """asyncio front-end that routes requests in dynamic micro-batches.
+
+    route() queues a payload and awaits its result. A single batcher task
+    takes the oldest request, then keeps collecting until max_batch_size
+    requests are waiting or the oldest has waited max_wait seconds. The
+    batch runs in an executor thread (the router's process_batch() if it
+    has one, else process() per item) so the event loop never blocks.
+    process_batch() returns one entry per payload, an exception instance
+    for a payload that failed; if it raises, the whole batch fails with
+    that error rather than being rerun, since some items may already have
+    been routed and recorded. Each request's future is resolved with its
+    own result or exception. While one batch runs the next one fills up,
+    so batches grow with load.
+    """
+
+    def __init__(self, router, max_batch_size=32, max_wait=0.002, executor=None):
+        self.router = router
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._queue = None
+        self._arrived = None
+        self._task = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.batch_sizes = Counter()
+        self.queue_wait = LatencySketch()
+        self.batch_time = LatencySketch()
+        self.requests = 0
+        self.errors = 0
+
+    async def start(self):
+        if self._task is not None:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="routing-batch")
+        self._queue = asyncio.Queue()
+        self._arrived = asyncio.Event()
+        self._task = asyncio.create_task(self._batcher())
+
+    async def stop(self):
+        """Finish queued requests, then stop the batcher."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def route(self, payload):
+        """Queue one payload and return the router's result for it."""
+        loop = asyncio.get_running_loop()
+        request = _Request(payload, loop.create_future(), loop.time())
+        self._queue.put_nowait(request)
+        self._arrived.set()
+        return await request.future
+
+    def _process_batch(self, payloads):
+        """Run in the executor: results (or exceptions) in request order."""
+        process_batch = getattr(self.router, 'process_batch', None)
+        if process_batch is not None:
+            outputs = process_batch(payloads)
+            if len(outputs) != len(payloads):
+                raise RuntimeError(f"process_batch returned {len(outputs)} results for {len(payloads)} payloads")
+            errors = [output if isinstance(output, Exception) else None for output in outputs]
+            return outputs, errors
+        results, errors = [], []
+        for payload in payloads:
+            try:
+                results.append(self.router.process(payload))
+                errors.append(None)
+            except Exception as error:
+                results.append(None)
+                errors.append(error)
+        return results, errors
+
+    async def _collect(self):
+        """Wait for the oldest request, then fill the batch until it is full or too old."""
+        queue = self._queue
+        batch = [await queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = batch[0].enqueued + self.max_wait
+        while len(batch) < self.max_batch_size:
+            while not queue.empty() and len(batch) < self.max_batch_size:
+                batch.append(queue.get_nowait())
+            remaining = deadline - loop.time()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        return batch
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = loop.time()
+            for request in batch:
+                self.queue_wait.add(started - request.enqueued)
+            try:
+                results, errors = await loop.run_in_executor(
+                    self._executor, self._process_batch, [request.payload for request in batch])
+            except Exception as error:
+                results, errors = [None] * len(batch), [error] * len(batch)
+            self.batch_time.add(loop.time() - started)
+            self.batch_sizes[len(batch)] += 1
+            self.requests += len(batch)
+
+            for index, request in enumerate(batch):
+                error = errors[index] if errors else None
+                if request.future.done():
+                    pass  # The caller gave up (cancelled) while the batch ran
+                elif error is not None:
+                    self.errors += 1
+                    request.future.set_exception(error)
+                else:
+                    request.future.set_result(results[index])
+                self._queue.task_done()
+
+    def stats(self):
+        """Batch-size distribution, queue wait and batch time."""
+        sizes = np.array(sorted(self.batch_sizes.elements())) if self.batch_sizes else np.zeros(0)
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'batches': int(sum(self.batch_sizes.values())),
+            'batch_sizes': dict(sorted(self.batch_sizes.items())),
+            'mean_batch': float(sizes.mean()) if len(sizes) else 0.0,
+            'p50_batch': float(np.quantile(sizes, 0.5)) if len(sizes) else 0.0,
+            'p99_batch': float(np.quantile(sizes, 0.99)) if len(sizes) else 0.0,
+            'queue_wait': self.queue_wait.quantiles(),
+            'mean_queue_wait': self.queue_wait.mean,
+            'batch_time': self.batch_time.quantiles()
+        }
+
+def _decode_payload(body):
+    """Accept JSON {"text": ...} or {"image": [[...]]}; anything else is routed as UTF-8 text."""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body.decode('utf-8')
+    if isinstance(data, dict) and 'image' in data:
+        return np.asarray(data['image'], dtype=np.float64)
+    if isinstance(data, dict) and 'text' in data:
+        return data['text']
+    return body.decode('utf-8')
+
+def _response(status, body):
+    body = json.dumps(body).encode()
+    head = (f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode()
+    return head + body
+
+class RoutingHTTPServer:
+    """Minimal HTTP/1.1 keep-alive endpoint for a RoutingService, with no dependencies.
+
+    POST /route routes the request body and returns {"result": ...};
+    GET /stats returns the service's batching statistics. Malformed
+    requests and payloads the router rejects (ValueError or TypeError) get
+    400; any other routing failure is a server fault and gets 500.
+    """
+
+    def __init__(self, service, host="127.0.0.1", port=8765):
+        self.service = service
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        await self.service.start()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # Resolves port=0
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self.service.stop()
+
+    async def _route(self, body):
+        """Response for POST /route: 400 for a bad payload, 500 for a server fault."""
+        try:
+            result = await self.service.route(_decode_payload(body))
+        except (ValueError, TypeError) as error:
+            return _response("400 Bad Request", {'error': str(error)})
+        except Exception as error:
+            return _response("500 Internal Server Error", {'error': f"{type(error).__name__}: {error}"})
+        return _response("200 OK", {'result': result})
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def _read_head(self, reader, request_line):
+        """Method, path and lowercased headers; ValueError when they are malformed."""
+        parts = request_line.decode('latin-1').split()
+        if len(parts) != 3:
+            raise ValueError(f"malformed request line {request_line[:80]!r}")
+        method, path, _ = parts
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = headers.get('content-length', '0')
+        if not length.isdigit():
+            raise ValueError(f"invalid Content-Length {length!r}")
+        return method, path, headers
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, headers = await self._read_head(reader, request_line)
+                except ValueError as error:
+                    writer.write(_response("400 Bad Request", {'error': str(error)}))
+                    await writer.drain()
+                    break
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    writer.write(_response("413 Payload Too Large", {'error': 'body too large'}))
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                if method == 'POST' and path == '/route':
+                    writer.write(await self._route(body))
+                elif method == 'GET' and path == '/stats':
+                    writer.write(_response("200 OK", self.service.stats()))
+                else:
+                    writer.write(_response("404 Not Found", {'error': f"no route for {method} {path}"}))
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,240 @@
+import os
+import time
+import hashlib
+import threading
+import itertools
+import numpy as np
+from pathlib import Path
+
+# One fixed-width record per routing decision (35 bytes, unaligned)
+TRACE_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('call', '<u8'),
+    ('input_hash', '<u8'),
+    ('complexity', '<f4'),
+    ('confidence', '<f4'),
+    ('expert', '<i2'),
+    ('variant', 'u1')
+])
+VARIANT_CODES = {'TextMoE': 0, 'ImageMoE': 1, 'SwitchedMoE': 2, 'MultimodalMoE': 3}
+VARIANT_NAMES = {code: name for name, code in VARIANT_CODES.items()}
+UNKNOWN_VARIANT = 255
+
+CHUNK_PATTERN = "routing_*.npy"
+
+def input_hash(data):
+    """Stable 64-bit hash of a text or array input (unlike hash(), not salted per process)."""
+    digest = hashlib.blake2b(digest_size=8)
+    if isinstance(data, str):
+        digest.update(b"t")
+        digest.update(data.encode('utf-8'))
+    else:
+        array = np.ascontiguousarray(data)
+        digest.update(f"a{array.dtype.str}{array.shape}".encode())
+        digest.update(array.data)
+    return int.from_bytes(digest.digest(), 'little')
+
+def _chunk_index(path):
+    return int(path.stem.split('_')[1])
+
+class TraceRecorder:
+    """Append routing decisions to a chunked binary trace.
+
+    Records are buffered in a preallocated structured array and written as
+    routing_<n>.npy once chunk_size records have accumulated (and on
+    flush/close), so a crash loses at most one chunk. With store_inputs,
+    every distinct input is saved once per chunk in inputs_<n>.npz so the
+    trace can be replayed; arrays are copied when recorded, so callers may
+    reuse their buffers. Recording appends after any existing chunks and
+    is safe to share between threads.
+    """
+
+    def __init__(self, path, chunk_size=65536, store_inputs=True):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.store_inputs = store_inputs
+        existing = [_chunk_index(p) for p in self.path.glob(CHUNK_PATTERN)]
+        self._next_chunk = max(existing, default=-1) + 1
+        self._calls = itertools.count(TraceReader(self.path).num_calls() if existing else 0)
+        self._buffer = np.zeros(chunk_size, dtype=TRACE_DTYPE)
+        self._fill = 0
+        self._inputs = {}
+        self._seen = set()
+        self._lock = threading.Lock()
+        self.records_written = 0
+
+    def record(self, variant, data, experts, complexities, confidences, timestamp=None):
+        """Record the decisions of one routing call.
+
+        experts, complexities and confidences hold one entry per decision
+        (a token, a region or the whole input); all share the call's
+        timestamp (default: now) and input hash.
+        """
+        experts = np.atleast_1d(experts)
+        digest = input_hash(data)
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._append(variant, data, digest, experts, complexities, confidences, timestamp)
+
+    def _append(self, variant, data, digest, experts, complexities, confidences, timestamp):
+        count = len(experts)
+        fields = {
+            'timestamp': timestamp,
+            'call': next(self._calls),
+            'input_hash': digest,
+            'complexity': np.atleast_1d(complexities),
+            'confidence': np.atleast_1d(confidences),
+            'expert': experts,
+            'variant': VARIANT_CODES.get(variant, UNKNOWN_VARIANT)
+        }
+        if self.store_inputs and digest not in self._seen:
+            self._seen.add(digest)
+            self._inputs[digest] = data if isinstance(data, str) else np.array(data, copy=True)
+
+        written = 0
+        while written < count:
+            take = min(count - written, self.chunk_size - self._fill)
+            target = self._buffer[self._fill:self._fill + take]
+            for name, value in fields.items():
+                target[name] = value[written:written + take] if np.ndim(value) else value
+            self._fill += take
+            written += take
+            if self._fill == self.chunk_size:
+                self._write_chunk()
+
+    def flush(self):
+        """Write buffered records (and new inputs) as the next chunk."""
+        with self._lock:
+            self._write_chunk()
+
+    def _write_chunk(self):
+        if self._fill == 0:
+            return
+        index = self._next_chunk
+        chunk_path = self.path / f"routing_{index:05d}.npy"
+        tmp = self.path / f".routing_{index:05d}.{os.getpid()}.npy"
+        np.save(tmp, self._buffer[:self._fill])
+        os.replace(tmp, chunk_path)
+        if self._inputs:
+            arrays = {}
+            for digest, data in self._inputs.items():
+                if isinstance(data, str):
+                    arrays[f"t{digest:016x}"] = np.frombuffer(data.encode('utf-8'), dtype=np.uint8)
+                else:
+                    arrays[f"a{digest:016x}"] = np.asarray(data)
+            np.savez(self.path / f"inputs_{index:05d}.npz", **arrays)
+            self._inputs = {}
+        self._seen.clear()
+        self.records_written += self._fill
+        self._fill = 0
+        self._next_chunk += 1
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class TraceReader:
+    """Stream a recorded trace chunk by chunk through memory-mapped files."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.chunks = sorted(self.path.glob(CHUNK_PATTERN), key=_chunk_index)
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            yield np.load(chunk, mmap_mode='r')
+
+    def __len__(self):
+        return sum(len(np.load(chunk, mmap_mode='r')) for chunk in self.chunks)
+
+    def num_calls(self):
+        last = 0
+        for records in self:
+            if len(records):
+                last = max(last, int(records['call'].max()) + 1)
+        return last
+
+    def calls(self):
+        """Yield (timestamp, variant, input_hash) once per recorded call, in order."""
+        for records in self:
+            _, first = np.unique(records['call'], return_index=True)
+            for record in records[np.sort(first)]:
+                yield float(record['timestamp']), VARIANT_NAMES.get(int(record['variant'])), int(record['input_hash'])
+
+    def load_inputs(self):
+        """Return {input_hash: input} for every stored input."""
+        inputs = {}
+        for store in sorted(self.path.glob("inputs_*.npz")):
+            with np.load(store) as arrays:
+                for key in arrays.files:
+                    data = arrays[key]
+                    inputs[int(key[1:], 16)] = data.tobytes().decode('utf-8') if key[0] == 't' else data
+        return inputs
+
+def _total_variation(p, q):
+    return 0.5 * float(np.abs(p - q).sum())
+
+def analyze_trace(path, window_seconds=60.0, complexity_bins=20, complexity_range=(0.0, 2.0), max_experts=16):
+    """Compute expert histograms and routing drift in one streaming pass.
+
+    Only one chunk is mapped at a time. Returns per-variant expert counts,
+    a complexity histogram, and per-window expert distributions with their
+    total-variation distance from the overall distribution (drift).
+    """
+    experts = {}
+    complexity_edges = np.linspace(*complexity_range, complexity_bins + 1)
+    complexity_counts = np.zeros(complexity_bins, dtype=np.int64)
+    windows = {}
+    start = None
+    total = 0
+
+    for records in TraceReader(path):
+        if not len(records):
+            continue
+        total += len(records)
+        if start is None:
+            start = float(records['timestamp'][0])
+        expert_ids = np.clip(records['expert'].astype(np.int64), 0, max_experts - 1)
+        for code in np.unique(records['variant']):
+            mask = records['variant'] == code
+            name = VARIANT_NAMES.get(int(code), 'unknown')
+            counts = np.bincount(expert_ids[mask], minlength=max_experts)
+            experts[name] = experts.get(name, np.zeros(max_experts, dtype=np.int64)) + counts
+
+        complexity_counts += np.histogram(np.clip(records['complexity'], *complexity_range),
+                                          bins=complexity_edges)[0]
+
+        window_ids = ((records['timestamp'] - start) // window_seconds).astype(np.int64)
+        for window in np.unique(window_ids):
+            mask = window_ids == window
+            counts = np.bincount(expert_ids[mask], minlength=max_experts)
+            windows[int(window)] = windows.get(int(window), np.zeros(max_experts, dtype=np.int64)) + counts
+
+    overall = sum(experts.values()) if experts else np.zeros(max_experts, dtype=np.int64)
+    overall_share = overall / overall.sum() if overall.sum() else overall.astype(float)
+    drift = []
+    for window in sorted(windows):
+        counts = windows[window]
+        share = counts / counts.sum()
+        drift.append({
+            'window': window,
+            'start': start + window * window_seconds,
+            'decisions': int(counts.sum()),
+            'expert_share': share,
+            'drift': _total_variation(share, overall_share)
+        })
+
+    used = max((int(np.flatnonzero(c).max()) + 1 for c in experts.values() if c.any()), default=0)
+    return {
+        'decisions': total,
+        'experts': {name: counts[:used] for name, counts in experts.items()},
+        'complexity_histogram': (complexity_counts, complexity_edges),
+        'windows': [{**w, 'expert_share': w['expert_share'][:used]} for w in drift],
+        'max_drift': max((w['drift'] for w in drift), default=0.0)
+    }
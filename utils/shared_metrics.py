@@ -0,0 +1,197 @@
+import os
+import mmap
+import atexit
+import itertools
+import numpy as np
+from utils.latency_sketch import LatencySketch
+
+SEGMENT_PREFIX = "moe_metrics_"
+SHM_DIR = "/dev/shm"
+MAX_EXPERTS = 16
+RING_SIZE = 100
+RING_METRICS = ('text_complexity', 'image_complexity', 'processing_times')
+
+# Bump whenever SEGMENT_DTYPE changes so readers of another layout refuse the segment.
+# Version 1 had no latency sketch; version 2 added latency_stats and latency_counts.
+LAYOUT_VERSION = 2
+_MAGIC_PREFIX = b"MoEMetr"
+_MAGIC = int.from_bytes(_MAGIC_PREFIX + str(LAYOUT_VERSION).encode(), 'big')  # "MoEMetr2"
+_segment_ids = itertools.count()
+_LATENCY_BUCKETS = LatencySketch().num_buckets  # Segments use default sketch parameters
+
+# Fixed segment layout. The seqlock counter is odd while a write is in progress.
+SEGMENT_DTYPE = np.dtype([
+    ('magic', '<u8'),
+    ('seq', '<u8'),
+    ('pid', '<i8'),
+    ('updates', '<i8'),
+    ('last_update', '<f8'),
+    ('expert_assignments', '<i8', (MAX_EXPERTS,)),
+    ('ring_len', '<i8', (len(RING_METRICS),)),
+    ('rings', '<f8', (len(RING_METRICS), RING_SIZE)),
+    ('latency_stats', '<f8', (4,)),  # count, total, min, max
+    ('latency_counts', '<i8', (_LATENCY_BUCKETS,))
+], align=True)
+
+class SharedMetricsWriter:
+    """Publish dashboard metrics into a named shared memory segment.
+
+    Each router process owns one segment and is its only writer; readers in
+    other processes map the same segment and never block the writer.
+    """
+
+    def __init__(self, name=None):
+        from multiprocessing import shared_memory  # Only publishing processes need it
+
+        self.name = name or f"{SEGMENT_PREFIX}{os.getpid()}_{next(_segment_ids)}"
+        self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=SEGMENT_DTYPE.itemsize)
+        self._record = np.ndarray((), dtype=SEGMENT_DTYPE, buffer=self._shm.buf)
+        self._record[()] = np.zeros((), dtype=SEGMENT_DTYPE)
+        self._record['pid'] = os.getpid()
+        self._record['magic'] = _MAGIC
+        atexit.register(self.close)
+
+    def publish(self, metrics, updates, last_update):
+        """Write a merged metrics snapshot under the seqlock."""
+        record = self._record
+        if record is None:
+            return
+
+        record['seq'] += 1
+        record['updates'] = updates
+        record['last_update'] = last_update
+        counts = record['expert_assignments']
+        counts[...] = 0
+        for expert_id, count in metrics['expert_assignments'].items():
+            if 0 <= expert_id < MAX_EXPERTS:
+                counts[int(expert_id)] = count
+        for index, metric in enumerate(RING_METRICS):
+            samples = metrics[metric][-RING_SIZE:]
+            record['ring_len'][index] = len(samples)
+            record['rings'][index, :len(samples)] = samples
+        latency = metrics.get('latency_sketch')
+        if latency is not None:
+            record['latency_stats'] = (latency.count, latency.total, latency.min, latency.max)
+            record['latency_counts'] = latency.counts
+        record['seq'] += 1
+
+    def close(self):
+        """Release and unlink the segment."""
+        if self._shm is None:
+            return
+        atexit.unregister(self.close)
+        self._record = None  # Drop the view so the mapping can be released
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        self._shm = None
+
+class SharedMetricsReader:
+    """Read-only, zero-copy view of a segment published by another process."""
+
+    def __init__(self, name):
+        self.name = name
+        self._shm = None
+        path = os.path.join(SHM_DIR, name)
+        if os.path.isdir(SHM_DIR):
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                if os.fstat(fd).st_size < SEGMENT_DTYPE.itemsize:
+                    raise ValueError(f"{name} is smaller than a layout {LAYOUT_VERSION} metrics segment")
+                self._map = mmap.mmap(fd, SEGMENT_DTYPE.itemsize, access=mmap.ACCESS_READ)
+            finally:
+                os.close(fd)
+        else:
+            # No POSIX shm filesystem: fall back to a writable mapping but never
+            # let the resource tracker unlink a segment this process did not create.
+            from multiprocessing import resource_tracker, shared_memory
+
+            self._shm = shared_memory.SharedMemory(name=name, create=False)
+            try:
+                resource_tracker.unregister(self._shm._name, "shared_memory")
+            except Exception:
+                pass
+            self._map = self._shm.buf
+        self._record = np.ndarray((), dtype=SEGMENT_DTYPE, buffer=self._map)
+        magic = int(self._record['magic'])
+        if magic != _MAGIC:
+            self.close()
+            stamp = magic.to_bytes(8, 'big')
+            if stamp.startswith(_MAGIC_PREFIX):
+                raise ValueError(f"{name} uses metrics segment layout {stamp[-1:].decode(errors='replace')}, "
+                                 f"this reader expects layout {LAYOUT_VERSION}")
+            raise ValueError(f"{name} is not a metrics segment")
+
+    @property
+    def pid(self):
+        return int(self._record['pid'])
+
+    @property
+    def seq(self):
+        """Seqlock counter; changes whenever the writer publishes."""
+        return int(self._record['seq'])
+
+    def is_alive(self):
+        """Check whether the publishing process is still running."""
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def read(self, max_retries=100):
+        """Return a consistent snapshot, retrying while a write is in flight."""
+        record = self._record
+        for _ in range(max_retries):
+            seq_before = int(record['seq'])
+            if seq_before % 2:
+                continue
+            counts = record['expert_assignments'].copy()
+            ring_len = record['ring_len'].copy()
+            rings = record['rings'].copy()
+            latency_stats = record['latency_stats'].copy()
+            latency_counts = record['latency_counts'].copy()
+            updates = int(record['updates'])
+            last_update = float(record['last_update'])
+            if int(record['seq']) == seq_before:
+                break
+        else:
+            return None
+
+        snapshot = {
+            'expert_assignments': {int(i): int(c) for i, c in enumerate(counts) if c},
+            'updates': updates,
+            'last_update': last_update
+        }
+        for index, metric in enumerate(RING_METRICS):
+            snapshot[metric] = rings[index, :ring_len[index]].tolist()
+
+        latency = LatencySketch()
+        if latency_stats[0]:
+            latency.counts[:] = latency_counts
+            latency.count = int(latency_stats[0])
+            latency.total, latency.min, latency.max = (float(v) for v in latency_stats[1:])
+        snapshot['latency_sketch'] = latency
+        return snapshot
+
+    def close(self):
+        """Unmap the segment without unlinking it."""
+        self._record = None
+        if self._shm is not None:
+            self._shm.close()
+        else:
+            self._map.close()
+
+def list_segments(prefix=SEGMENT_PREFIX):
+    """List names of published metrics segments on this machine."""
+    if not os.path.isdir(SHM_DIR):
+        return []
+    return sorted(name for name in os.listdir(SHM_DIR) if name.startswith(prefix))
+
+def default_publish():
+    """Whether dashboards should publish by default (MOE_DASHBOARD_PUBLISH=1)."""
+    return os.environ.get("MOE_DASHBOARD_PUBLISH", "").lower() in ("1", "true", "yes")
@@ -0,0 +1,231 @@
+import io
+import functools
+import numpy as np
+
+# Per-byte character classes for the ASCII fast path, built from the str
+# methods themselves so both paths agree on every character
+_ASCII_CHARS = [chr(code) for code in range(128)]
+_IS_SPACE = np.array([c.isspace() for c in _ASCII_CHARS])
+_IS_SPECIAL = np.array([not c.isalnum() and not c.isspace() for c in _ASCII_CHARS])
+_LOWER = np.array([ord(c.lower()) for c in _ASCII_CHARS], dtype=np.uint8)
+_SPACE_CODES = np.flatnonzero(_IS_SPACE)
+_SPECIAL_CODES = np.flatnonzero(_IS_SPECIAL)
+
+# Below this many characters NumPy call overhead outweighs the vectorized scan
+VECTORIZE_MIN_LENGTH = 128
+
+def _features(length, unique, special, word_count, word_chars):
+    return {
+        'length': length,
+        'unique_ratio': unique / length if length else 0.0,
+        'special_ratio': special / length if length else 0.0,
+        'word_count': word_count,
+        'mean_word_length': word_chars / word_count if word_count else 0
+    }
+
+def text_features(text):
+    """Return length, unique-char ratio, special-char ratio, word count and mean word length.
+
+    Characters are compared case-insensitively for the unique ratio;
+    special characters are neither alphanumeric nor whitespace; words are
+    what str.split() returns. Long ASCII input is scanned once as bytes: a
+    byte histogram yields the character counts and one shifted comparison
+    the word boundaries.
+    """
+    length = len(text)
+    if length >= VECTORIZE_MIN_LENGTH and text.isascii():
+        codes = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+        counts = np.bincount(codes, minlength=128)
+        unique = len(np.unique(_LOWER[np.flatnonzero(counts)]))
+        spaces = _IS_SPACE[codes]
+        # A word starts at every non-space character preceded by a space (or the start)
+        word_count = int(not spaces[0]) + int(np.count_nonzero(spaces[:-1] & ~spaces[1:]))
+        word_chars = length - int(counts[_SPACE_CODES].sum())
+        return _features(length, unique, int(counts[_SPECIAL_CODES].sum()), word_count, word_chars)
+
+    words = text.split()
+    special = sum(not c.isalnum() and not c.isspace() for c in text)
+    return _features(length, len(set(text.lower())), special, len(words), sum(map(len, words)))
+
+def _join_ascii(texts):
+    """Byte codes of texts joined by single spaces, and the offset where each text starts."""
+    codes = np.frombuffer(' '.join(texts).encode('ascii'), dtype=np.uint8)
+    offsets = np.zeros(len(texts), dtype=np.int64)
+    np.cumsum([len(text) + 1 for text in texts[:-1]], out=offsets[1:])
+    return codes, offsets
+
+def text_features_batch(texts):
+    """text_features() of each text, with every ASCII text scanned in one vectorized pass.
+
+    The texts are joined by spaces, so no word spans two texts, and each
+    count is binned by the text its character came from.
+    """
+    results = [None] * len(texts)
+    ascii_index = [i for i, text in enumerate(texts) if text.isascii()]
+    for i, text in enumerate(texts):
+        if not text.isascii():
+            results[i] = text_features(text)
+    if not ascii_index:
+        return results
+
+    batch = [texts[i] for i in ascii_index]
+    count = len(batch)
+    codes, offsets = _join_ascii(batch)
+    owner = np.searchsorted(offsets, np.arange(len(codes)), side='right') - 1
+    spaces = _IS_SPACE[codes]
+    starts = ~spaces
+    starts[1:] &= spaces[:-1]
+    word_counts = np.bincount(owner[starts], minlength=count)
+    # Leave the joining spaces out of the character counts
+    inside = np.ones(len(codes), dtype=bool)
+    inside[offsets[1:] - 1] = False
+    owner, codes = owner[inside], codes[inside]
+    counts = np.bincount(owner * 128 + codes, minlength=count * 128).reshape(count, 128)
+    seen = np.zeros((count, 128), dtype=bool)
+    seen[owner, _LOWER[codes]] = True
+    unique = np.count_nonzero(seen, axis=1)
+    special = counts[:, _SPECIAL_CODES].sum(axis=1)
+    space_counts = counts[:, _SPACE_CODES].sum(axis=1)
+
+    for row, i in enumerate(ascii_index):
+        length = len(texts[i])
+        results[i] = _features(length, int(unique[row]), int(special[row]), int(word_counts[row]),
+                               length - int(space_counts[row]))
+    return results
+
+def _ascii_token_features(codes):
+    """token_features() of ASCII byte codes, plus the position in codes where each token starts."""
+    keep = np.flatnonzero(~_IS_SPECIAL[codes])
+    kept = _LOWER[codes[keep]]
+    tokens = kept.tobytes().decode('ascii').split()
+    chars = ~_IS_SPACE[kept]
+    starts = chars.copy()
+    starts[1:] &= ~chars[:-1]
+    token_ids = (np.cumsum(starts) - 1)[chars]
+    lengths = np.bincount(token_ids, minlength=len(tokens))
+    # Mark which of the 128 characters each token contains, then count the marks
+    seen = np.zeros(len(tokens) * 128, dtype=bool)
+    seen[token_ids * 128 + kept[chars]] = True
+    return tokens, lengths, np.count_nonzero(seen.reshape(-1, 128), axis=1), keep[starts]
+
+def token_features(text):
+    """Tokenize like TextMoE and return (tokens, lengths, unique_counts).
+
+    Tokens are the lowercased whitespace-separated words left after
+    dropping every character that is neither alphanumeric nor whitespace.
+    unique_counts holds the number of distinct characters per token.
+    """
+    if len(text) >= VECTORIZE_MIN_LENGTH and text.isascii():
+        return _ascii_token_features(np.frombuffer(text.encode('ascii'), dtype=np.uint8))[:3]
+
+    tokens = ''.join(c.lower() for c in text if c.isalnum() or c.isspace()).split()
+    lengths = np.array([len(token) for token in tokens], dtype=np.int64)
+    return tokens, lengths, np.array([len(set(token)) for token in tokens], dtype=np.int64)
+
+def token_features_batch(texts):
+    """token_features() of each text, with every ASCII text tokenized in one vectorized pass."""
+    results = [None] * len(texts)
+    ascii_index = [i for i, text in enumerate(texts) if text.isascii()]
+    for i, text in enumerate(texts):
+        if not text.isascii():
+            results[i] = token_features(text)
+    if not ascii_index:
+        return results
+
+    codes, offsets = _join_ascii([texts[i] for i in ascii_index])
+    tokens, lengths, unique_counts, positions = _ascii_token_features(codes)
+    # Joining spaces keep every token inside one text, so each text's tokens are contiguous
+    bounds = np.searchsorted(positions, offsets).tolist() + [len(tokens)]
+    for row, i in enumerate(ascii_index):
+        begin, end = bounds[row], bounds[row + 1]
+        results[i] = (tokens[begin:end], lengths[begin:end], unique_counts[begin:end])
+    return results
+
+# str.lower() maps a capital sigma to a final sigma when a cased letter
+# precedes it and none follows, skipping case-ignorable characters both
+# ways. Both character properties are probed through str.lower() itself so
+# the incremental count agrees with it exactly.
+@functools.lru_cache(maxsize=4096)
+def _is_cased(char):
+    """Whether char is cased and not case-ignorable, i.e. it keeps a sigma before it medial."""
+    return ('AΣ' + char).lower()[1] == 'σ'
+
+@functools.lru_cache(maxsize=4096)
+def _is_case_ignorable(char):
+    """Whether str.lower() skips char when looking around a capital sigma."""
+    return ('AΣ' + char + 'A').lower()[1] == 'σ' and not _is_cased(char)
+
+class IncrementalTextFeatures:
+    """text_features() of append-only text, updated in O(k) per k appended characters.
+
+    Keeps running counts (length, lowercased characters seen, special
+    characters, words and word characters), so features() always equals
+    text_features() of everything appended so far.
+    """
+
+    def __init__(self, text=""):
+        self.length = 0
+        self.special = 0
+        self.word_count = 0
+        self.word_chars = 0
+        self._lowered = set()  # Lowercased characters other than capital sigmas
+        self._in_word = False  # Whether the text ends inside a word
+        self._buffer = io.StringIO()
+        # A capital sigma's lowercase depends on its neighbours, so only the
+        # last one can still change: the forms of settled ones are kept, and
+        # for the pending one whether a cased letter precedes it
+        self._sigma_forms = set()
+        self._pending_sigma = None
+        self._after_cased = False  # Whether the last non-case-ignorable character is cased
+        if text:
+            self.append(text)
+
+    def append(self, delta):
+        """Account for delta appended to the text."""
+        if not delta:
+            return
+        self._buffer.write(delta)
+        self.length += len(delta)
+        if 'Σ' in delta or self._pending_sigma is not None:
+            self._lowered.update(delta.replace('Σ', '').lower())
+            self._track_sigmas(delta)
+        else:
+            self._lowered.update(delta.lower())
+            for char in reversed(delta):
+                if not _is_case_ignorable(char):
+                    self._after_cased = _is_cased(char)
+                    break
+        self.special += sum(not c.isalnum() and not c.isspace() for c in delta)
+
+        words = delta.split()
+        self.word_chars += sum(map(len, words))
+        self.word_count += len(words)
+        if words and self._in_word and not delta[0].isspace():
+            self.word_count -= 1  # The first word continues the previous one
+        self._in_word = not delta[-1].isspace()
+
+    def _track_sigmas(self, delta):
+        """Settle the pending sigma once a non-case-ignorable character follows it."""
+        for char in delta:
+            if _is_case_ignorable(char):
+                continue
+            cased = _is_cased(char)
+            if self._pending_sigma is not None:
+                self._sigma_forms.add('ς' if self._pending_sigma and not cased else 'σ')
+                self._pending_sigma = None
+            if char == 'Σ':
+                self._pending_sigma = self._after_cased
+            self._after_cased = cased
+
+    @property
+    def text(self):
+        return self._buffer.getvalue()
+
+    def features(self):
+        """Same dict as text_features(self.text), without rescanning the text."""
+        sigmas = self._sigma_forms
+        if self._pending_sigma is not None:
+            # Nothing follows the pending sigma yet, so it is final after a cased letter
+            sigmas = sigmas | {'ς' if self._pending_sigma else 'σ'}
+        unique = len(self._lowered) + len(sigmas - self._lowered)
+        return _features(self.length, unique, self.special, self.word_count, self.word_chars)
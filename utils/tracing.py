@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+
+# Active tracer, or None when tracing is off
+_tracer = None
+
+class _NullSpan:
+    """Shared no-op span returned while tracing is off."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.tracer.events.append((self.name, self.start, end - self.start, threading.get_ident(), self.args))
+        return False
+
+class Tracer:
+    """Collect spans as (name, start_ns, duration_ns, thread id, args) events.
+
+    Appending to a list is atomic under the GIL, so spans from several
+    threads can be recorded without a lock.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.origin_ns = time.perf_counter_ns()
+        self.pid = os.getpid()
+
+    def clear(self):
+        self.events = []
+        self.origin_ns = time.perf_counter_ns()
+
+    def to_chrome_trace(self, process_name="MoE"):
+        """Return the events in Chrome/Perfetto trace-event format."""
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': process_name}}]
+        for name, start, duration, tid, args in self.events:
+            event = {
+                'name': name,
+                'cat': name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': (start - self.origin_ns) / 1000,
+                'dur': duration / 1000,
+                'pid': self.pid,
+                'tid': tid
+            }
+            if args:
+                event['args'] = args
+            events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path, process_name="MoE"):
+        """Write a trace file that chrome://tracing and Perfetto can open."""
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(process_name), f)
+        return path
+
+    def stage_summary(self):
+        """Aggregate events per span name.
+
+        Returns {name: {'count', 'total_ns', 'self_ns', 'mean_ns'}}, where
+        self time excludes time spent in spans nested inside it on the
+        same thread.
+        """
+        summary = {}
+        self_ns = {}
+        by_thread = {}
+        for index, (_, start, duration, tid, _) in enumerate(self.events):
+            by_thread.setdefault(tid, []).append((start, -duration, index))
+            self_ns[index] = duration
+
+        for spans in by_thread.values():
+            spans.sort()  # Parents sort before the children they enclose
+            stack = []
+            for start, negative_duration, index in spans:
+                while stack and stack[-1][0] <= start:
+                    stack.pop()
+                if stack:
+                    self_ns[stack[-1][1]] -= -negative_duration
+                stack.append((start - negative_duration, index))
+
+        for index, (name, _, duration, _, _) in enumerate(self.events):
+            stats = summary.setdefault(name, {'count': 0, 'total_ns': 0, 'self_ns': 0})
+            stats['count'] += 1
+            stats['total_ns'] += duration
+            stats['self_ns'] += self_ns[index]
+        for stats in summary.values():
+            stats['mean_ns'] = stats['total_ns'] / stats['count']
+        return summary
+
+def span(name, **args):
+    """Time a block as a named span; a shared no-op while tracing is off.
+
+    Usage: with span("text.tokenize"): ...
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name, args)
+
+def traced(name=None):
+    """Decorator recording every call of a function as a span."""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with _Span(tracer, span_name, None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def enable(tracer=None):
+    """Start recording spans into tracer (a new Tracer by default)."""
+    global _tracer
+    _tracer = tracer if tracer is not None else Tracer()
+    return _tracer
+
+def disable():
+    """Stop recording and return the tracer that was active."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+def is_enabled():
+    return _tracer is not None
+
+@contextmanager
+def recording(tracer=None):
+    """Record spans inside a with block, restoring the previous state after."""
+    global _tracer
+    previous = _tracer
+    active = enable(tracer)
+    try:
+        yield active
+    finally:
+        _tracer = previous